@@ -1,11 +1,21 @@
-"""LLM-as-a-Judge: Automated evaluation system for RAG Q&A pairs."""
+"""LLM-as-a-Judge: Automated evaluation system for RAG Q&A pairs.
+
+Submodules and the names below are imported on first access (PEP 562), so
+``import src`` stays cheap for short CLI invocations."""
+
+from importlib import import_module
+from typing import Any
 
 __version__ = "1.0.0"
 __author__ = "MoveO AI"
 
-from .judge import Judge
-from .evaluation import precision_recall_f1, metrics_report
-from .safety import is_dangerous
+# Public name -> submodule that defines it
+_LAZY_ATTRS = {
+    "Judge": "judge",
+    "precision_recall_f1": "evaluation",
+    "metrics_report": "evaluation",
+    "is_dangerous": "safety",
+}
 
 __all__ = [
     "Judge", 
@@ -18,3 +28,18 @@ __all__ = [
     "openai_client",
     "io",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRS:
+        value = getattr(import_module(f".{_LAZY_ATTRS[name]}", __name__), name)
+    elif name in __all__:
+        value = import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+"""Offline batch-API mode for bulk evaluations.
+
+Instead of one interactive ``chat.complete`` call per row, every prompt is
+rendered into a JSONL job file, submitted through a :class:`BatchBackend`,
+polled until the provider finishes, and the completions are merged back
+through ``Judge._parse_completion``.  Throughput is then bounded by the
+provider's batch capacity rather than by our own concurrency.
+
+Backends:
+
+* :class:`MistralBatchBackend` – the Mistral batch API (files + batch jobs).
+* :class:`LocalBatchBackend` – runs the job in-process through any object
+  with a ``chat(system_prompt=..., user_prompt=...)`` method; a stand-in for
+  tests and dry runs."""
+
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+from .judge import Judge, gated_result
+from .safety import screen
+
+SUCCESS = "SUCCESS"
+TERMINAL_STATUSES = frozenset(
+    {"SUCCESS", "FAILED", "TIMEOUT_EXCEEDED", "CANCELLED"}
+)
+
+
+# -----------------------------------------------------------------------------
+# Backends
+# -----------------------------------------------------------------------------
+
+class BatchBackend:
+    """Interface every batch provider implements."""
+
+    # Whether job ids survive the process, i.e. a run can be resumed
+    persistent = True
+
+    def submit(self, job_file: Path, model: str) -> str:
+        """Upload *job_file* and start a job; return its id."""
+        raise NotImplementedError
+
+    def status(self, job_id: str) -> str:
+        """Return the job status (one of ``TERMINAL_STATUSES`` when done)."""
+        raise NotImplementedError
+
+    def results(self, job_id: str) -> Dict[str, str]:
+        """Return ``custom_id → completion text`` for every successful request."""
+        raise NotImplementedError
+
+
+class MistralBatchBackend(BatchBackend):
+    """Mistral batch jobs on ``/v1/chat/completions``."""
+
+    def __init__(self, sdk: Any = None) -> None:
+        if sdk is None:
+            from .config import config
+            from .openai_client import _get_api_key, shared_sdk
+
+            sdk = shared_sdk(_get_api_key(), config.MISTRAL_BASE_URL)
+        self._sdk = sdk
+
+    def submit(self, job_file: Path, model: str) -> str:
+        uploaded = self._sdk.files.upload(
+            file={"file_name": job_file.name, "content": job_file.read_bytes()},
+            purpose="batch",
+        )
+        job = self._sdk.batch.jobs.create(
+            input_files=[uploaded.id],
+            model=model,
+            endpoint="/v1/chat/completions",
+            metadata={"source": "llm-judge"},
+        )
+        return job.id
+
+    def status(self, job_id: str) -> str:
+        return str(self._sdk.batch.jobs.get(job_id=job_id).status)
+
+    def results(self, job_id: str) -> Dict[str, str]:
+        job = self._sdk.batch.jobs.get(job_id=job_id)
+        if not job.output_file:
+            return {}
+        response = self._sdk.files.download(file_id=job.output_file)
+        return parse_output_lines(response.read().decode("utf-8").splitlines())
+
+
+class LocalBatchBackend(BatchBackend):
+    """Runs a job file synchronously through *client* at submit time."""
+
+    persistent = False
+
+    def __init__(self, client: Any) -> None:
+        self._client = client
+        self._jobs: Dict[str, List[str]] = {}
+
+    def submit(self, job_file: Path, model: str) -> str:
+        lines: List[str] = []
+        with job_file.open(encoding="utf-8") as fh:
+            for line in fh:
+                request = json.loads(line)
+                body = request["body"]
+                completion = self._client.chat(
+                    system_prompt=body["messages"][0]["content"],
+                    user_prompt=body["messages"][1]["content"],
+                    **{k: body[k] for k in ("max_tokens", "response_format") if k in body},
+                )
+                lines.append(json.dumps({
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {"choices": [{"message": {"content": completion}}]},
+                    },
+                    "error": None,
+                }))
+        job_id = uuid.uuid4().hex
+        self._jobs[job_id] = lines
+        return job_id
+
+    def status(self, job_id: str) -> str:
+        return SUCCESS if job_id in self._jobs else "FAILED"
+
+    def results(self, job_id: str) -> Dict[str, str]:
+        return parse_output_lines(self._jobs.get(job_id, []))
+
+
+def parse_output_lines(lines: Iterable[str]) -> Dict[str, str]:
+    """Extract completions from batch output lines, skipping failed requests."""
+    completions: Dict[str, str] = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code", 200) != 200:
+            continue
+        try:
+            content = response["body"]["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            continue
+        completions[str(record["custom_id"])] = content.strip()
+    return completions
+
+
+# -----------------------------------------------------------------------------
+# Job helpers
+# -----------------------------------------------------------------------------
+
+def render_requests(
+    judge: Judge,
+    rows: Sequence[Dict[str, str]],
+    seen: Optional[Set[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield one batch request per distinct prompt that needs the LLM.
+
+    ``custom_id`` is the prompt's :meth:`Judge.request_key`, so duplicate
+    rows share one request and results can be merged back chunk by chunk.
+    Pass the same *seen* set for every chunk of a job.  Rows caught by the
+    safety gate or already in the judge's cache are skipped.
+    """
+    if seen is None:
+        seen = set()
+    flagged, _ = screen([row.get("answer", "") for row in rows])
+    for i, row in enumerate(rows):
+        if flagged.iat[i]:
+            continue
+        key = judge.request_key(row)
+        if key in seen:
+            continue
+        seen.add(key)
+        if judge.cache is not None and judge.cache.get(key) is not None:
+            continue
+        user_prompt = judge._build_user_prompt(row, record=True)
+        yield {
+            "custom_id": key,
+            "body": {
+                "messages": [
+                    {"role": "system", "content": judge.system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                "temperature": judge.temperature,
+                **judge.request_options(),
+            },
+        }
+
+
+def wait_for_job(
+    backend: BatchBackend,
+    job_id: str,
+    poll_interval: float = 30.0,
+    timeout: Optional[float] = None,
+) -> Dict[str, str]:
+    """Poll until *job_id* finishes and return its completions."""
+    started = time.monotonic()
+    while True:
+        status = backend.status(job_id)
+        if status in TERMINAL_STATUSES:
+            break
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise TimeoutError(f"Batch job {job_id} still {status} after {timeout}s")
+        time.sleep(poll_interval)
+    if status != SUCCESS:
+        raise RuntimeError(f"Batch job {job_id} ended with status {status}")
+    return backend.results(job_id)
+
+
+def merge_results(
+    judge: Judge,
+    rows: Sequence[Dict[str, str]],
+    completions: Dict[str, str],
+) -> List[Dict[str, str]]:
+    """Turn batch completions back into per-row results.
+
+    Gated and cached rows are resolved locally; a row whose request failed
+    inside the job falls back to an interactive :meth:`Judge.evaluate_row`.
+    """
+    flagged, rule_ids = screen([row.get("answer", "") for row in rows])
+    results: List[Dict[str, str]] = []
+    for i, row in enumerate(rows):
+        if flagged.iat[i]:
+            results.append(gated_result(rule_ids.iat[i]))
+            continue
+        key = judge.request_key(row)
+        completion = completions.get(key)
+        if completion is None:
+            results.append(judge.evaluate_row(row, safety_gate=False))
+            continue
+        judge._remember(key, completion)
+        results.append(judge._parse_completion(completion))
+    return results
+
+
+def remove_job_files(*paths: str | Path) -> None:
+    """Delete a job's sidecar files (request file, saved job id).
+
+    Only call this once the job's results are merged and stored: until then
+    the files are what lets a failed run be resumed without paying for a
+    second job.
+    """
+    for path in paths:
+        Path(path).unlink(missing_ok=True)
+
+
+def run_batch(
+    judge: Judge,
+    rows: Sequence[Dict[str, str]],
+    backend: BatchBackend,
+    job_dir: str | Path,
+    poll_interval: float = 30.0,
+    timeout: Optional[float] = None,
+) -> List[Dict[str, str]]:
+    """Judge *rows* through one offline batch job and return per-row results.
+
+    The job file is removed once the results are merged; if merging fails
+    it is left in *job_dir*.
+    """
+    job_file = Path(job_dir) / f"batch_{uuid.uuid4().hex[:8]}.jsonl"
+    job_file.parent.mkdir(parents=True, exist_ok=True)
+    with job_file.open("w", encoding="utf-8") as fh:
+        count = 0
+        for request in render_requests(judge, rows):
+            fh.write(json.dumps(request, ensure_ascii=False) + "\n")
+            count += 1
+
+    completions: Dict[str, str] = {}
+    if count:
+        job_id = backend.submit(job_file, judge.model)
+        completions = wait_for_job(backend, job_id, poll_interval, timeout)
+    results = merge_results(judge, rows, completions)
+    remove_job_files(job_file)
+    return results
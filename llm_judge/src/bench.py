@@ -0,0 +1,445 @@
+from __future__ import annotations
+
+"""Throughput benchmark against a local stand-in chat-completions server.
+
+:class:`MockChatServer` serves a minimal ``/v1/chat/completions`` endpoint
+from a separate process, with configurable latency, jitter, error rate and
+429 behaviour.  :func:`run_benchmark` drives the real pipeline (``Judge`` →
+SDK → HTTP → ``_parse_completion``) against it for every dataset size ×
+concurrency combination and returns machine-readable results: rows/sec,
+p50/p95/p99 call latency, peak traced memory and server-side counters.
+
+Run it with ``llm-judge bench``."""
+
+import json
+import multiprocessing as mp
+import os
+import platform
+import queue
+import random
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .judge import Judge
+from .ratelimit import RetryPolicy
+from .runner import judge_rows
+
+_LABELS = ("Correct", "Incorrect", "Dangerous")
+
+# Order of the shared server counters
+_COUNTERS = ("requests", "throttled", "errors", "connections", "cancelled")
+
+_COT = (
+    "Benchmark completion: the answer was checked against the fragments for "
+    "coverage, alignment and safety."
+)
+
+
+# -----------------------------------------------------------------------------
+# Mock chat-completions server
+# -----------------------------------------------------------------------------
+
+def _serve(options: Dict[str, Any], counters: Any, ready: Any) -> None:
+    """Server process body: answer chat completions until terminated."""
+    rng = random.Random(options["seed"])
+    lock = threading.Lock()
+
+    def _count(i: int) -> None:
+        with counters.get_lock():
+            counters[i] += 1
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+        disable_nagle_algorithm = True  # headers and body go out as two writes
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+        def setup(self) -> None:
+            super().setup()
+            _count(3)
+
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock:
+                roll = rng.random()
+                delay = options["latency"] + rng.uniform(
+                    -options["jitter"], options["jitter"]
+                )
+                label = rng.choice(_LABELS)
+                confidence = round(rng.uniform(0.5, 1.0), 2)
+            _count(0)
+
+            if roll < options["rate_limit_rate"]:
+                _count(1)
+                self._reply(
+                    429,
+                    {"message": "Rate limit exceeded"},
+                    {"Retry-After": str(options["retry_after"])},
+                )
+                return
+            time.sleep(max(0.0, delay))
+            if roll < options["rate_limit_rate"] + options["error_rate"]:
+                _count(2)
+                self._reply(500, {"message": "Internal server error"})
+                return
+
+            try:
+                request = json.loads(body or b"{}")
+            except ValueError:
+                self._reply(400, {"message": "Invalid JSON body"})
+                return
+            messages = request.get("messages", [])
+            fields = {"chain_of_thought": _COT, "label": label, "confidence": confidence}
+            if messages and '{"label"' in messages[0].get("content", ""):
+                # Label-first prompts get the short fields first, like a real model would
+                fields = {"label": label, "confidence": confidence, "chain_of_thought": _COT}
+            content = json.dumps(fields)
+            # ~4 characters per token, cut at max_tokens like the real API
+            tokens = [content[i:i + 4] for i in range(0, len(content), 4)]
+            finish = "stop"
+            if request.get("max_tokens") and len(tokens) > request["max_tokens"]:
+                tokens, finish = tokens[:request["max_tokens"]], "length"
+            prompt = sum(len(m.get("content", "")) for m in messages)
+            usage = {
+                "prompt_tokens": prompt // 4 + 1,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt // 4 + 1 + len(tokens),
+            }
+            base = {
+                "id": "bench",
+                "model": request.get("model", "bench"),
+                "created": int(time.time()),
+            }
+            if request.get("stream"):
+                self._stream(base, tokens, finish, usage)
+                return
+            time.sleep(options["token_latency"] * len(tokens))
+            self._reply(200, {
+                **base,
+                "object": "chat.completion",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": finish,
+                }],
+                "usage": usage,
+            })
+
+        def _stream(
+            self,
+            base: Dict[str, Any],
+            tokens: List[str],
+            finish: str,
+            usage: Dict[str, int],
+        ) -> None:
+            """Send *tokens* as server-sent events, one chunk per token."""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def _event(data: Any) -> None:
+                line = f"data: {data if isinstance(data, str) else json.dumps(data)}\n\n"
+                payload = line.encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(payload), payload))
+                self.wfile.flush()
+
+            def _chunk(delta: Dict[str, str], finish_reason: Optional[str]) -> Dict[str, Any]:
+                return {
+                    **base,
+                    "object": "chat.completion.chunk",
+                    "choices": [
+                        {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                    ],
+                }
+
+            try:
+                for token in tokens:
+                    time.sleep(options["token_latency"])
+                    _event(_chunk({"role": "assistant", "content": token}, None))
+                _event({**_chunk({"content": ""}, finish), "usage": usage})
+                _event("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # The client hung up, e.g. once it had the label
+                _count(4)
+                self.close_connection = True
+
+        def _reply(
+            self,
+            status: int,
+            payload: Dict[str, Any],
+            headers: Optional[Dict[str, str]] = None,
+        ) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", options["port"]), Handler)
+    server.daemon_threads = True
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+class MockChatServer:
+    """Local stand-in for the chat-completions API, run in a child process.
+
+    Each request sleeps ``latency ± jitter`` seconds.  A *rate_limit_rate*
+    share of requests is rejected at once with 429 and ``Retry-After:
+    retry_after``; an *error_rate* share fails with 500 after the delay.
+    Completions carry a random label and confidence and a ``usage`` block;
+    they take *token_latency* seconds per ~4-character token, honour
+    ``max_tokens`` and are sent as server-sent events when the request asks
+    to stream.  Use it as a context manager; ``url`` is the base URL to hand
+    to :class:`Judge`.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 0.1,
+        seed: int = 0,
+        port: int = 0,
+        token_latency: float = 0.0,
+    ) -> None:
+        if latency < 0 or jitter < 0 or retry_after < 0 or token_latency < 0:
+            raise ValueError("latency, jitter, retry_after and token_latency must be >= 0")
+        if not (0 <= error_rate <= 1 and 0 <= rate_limit_rate <= 1) or (
+            error_rate + rate_limit_rate > 1
+        ):
+            raise ValueError("error_rate and rate_limit_rate must be shares summing to <= 1")
+        self.options = {
+            "latency": latency,
+            "jitter": jitter,
+            "error_rate": error_rate,
+            "rate_limit_rate": rate_limit_rate,
+            "retry_after": retry_after,
+            "seed": seed,
+            "port": port,
+            "token_latency": token_latency,
+        }
+        self.url: Optional[str] = None
+        self._process: Optional[Any] = None
+        self._counters: Optional[Any] = None
+
+    def start(self) -> "MockChatServer":
+        # spawn: the parent may already run threads (progress bars, pools)
+        ctx = mp.get_context("spawn")
+        self._counters = ctx.Array("q", len(_COUNTERS))
+        ready = ctx.Queue()
+        self._process = ctx.Process(
+            target=_serve, args=(self.options, self._counters, ready), daemon=True
+        )
+        self._process.start()
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                port = ready.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if not self._process.is_alive() or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError("mock chat server failed to start") from None
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def counts(self) -> Dict[str, int]:
+        """Requests, 429s, 500s, TCP connections and streams the client cut off."""
+        if self._counters is None:
+            return dict.fromkeys(_COUNTERS, 0)
+        with self._counters.get_lock():
+            return dict(zip(_COUNTERS, (int(c) for c in self._counters)))
+
+    def __enter__(self) -> "MockChatServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+# -----------------------------------------------------------------------------
+# Harness
+# -----------------------------------------------------------------------------
+
+def synthetic_rows(n: int, seed: int = 0) -> List[Dict[str, str]]:
+    """*n* distinct rows with realistic, varied field lengths."""
+    rng = random.Random(seed)
+    words = ("λέξη", "answer", "fragment", "policy", "δεδομένα", "service", "account")
+    rows = []
+    for i in range(n):
+        def text(k: int) -> str:
+            return " ".join(rng.choice(words) for _ in range(k))
+
+        rows.append({
+            "question": f"Question {i}: {text(rng.randint(5, 20))}?",
+            "answer": f"Answer {i}: {text(rng.randint(20, 80))}.",
+            "fragments": "\n".join(text(rng.randint(30, 120)) for _ in range(3)),
+        })
+    return rows
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted *values*."""
+    if not values:
+        return 0.0
+    rank = max(1, min(len(values), round(q / 100 * len(values) + 0.5)))
+    return values[rank - 1]
+
+
+def _judge_timed(
+    judge: Judge, rows: Sequence[Dict[str, str]], concurrency: int
+) -> Tuple[float, List[float], int]:
+    """Judge *rows*; return (wall seconds, sorted call latencies, failures)."""
+    latencies: List[float] = []
+    failed: List[BaseException] = []
+
+    def _evaluate(row: Dict[str, str]) -> Dict[str, str]:
+        start = time.perf_counter()
+        try:
+            return judge.evaluate_row(row, safety_gate=False)
+        except Exception as exc:  # counted, the run goes on
+            failed.append(exc)
+            return {"chain_of_thought": "", "label": ""}
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    judge_rows(_evaluate, rows, concurrency=concurrency)
+    return time.perf_counter() - start, sorted(latencies), len(failed)
+
+
+def run_scenario(
+    server: MockChatServer,
+    rows: Sequence[Dict[str, str]],
+    concurrency: int,
+    model: str = "bench-model",
+    retry_policy: Optional[RetryPolicy] = None,
+    trace_memory: bool = True,
+    judge_options: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Judge *rows* through the running *server*; measure throughput and latency.
+
+    Tracing roughly halves throughput, so with *trace_memory* the rows are
+    judged a second time under :mod:`tracemalloc` just to record the peak
+    Python memory of the pipeline; timings always come from the untraced run.
+    *judge_options* are extra :class:`Judge` arguments, e.g. ``stream``.
+    """
+    judge = Judge(
+        model=model,
+        retry_policy=retry_policy,
+        base_url=server.url,
+        **(judge_options or {}),
+    )
+    before = server.counts()
+    seconds, latencies, failed = _judge_timed(judge, rows, concurrency)
+    after = server.counts()
+
+    peak = None
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            _judge_timed(judge, rows, concurrency)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "rows": len(rows),
+        "concurrency": concurrency,
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(len(rows) / seconds, 2) if seconds else 0.0,
+        "latency_ms": {
+            "mean": round(1000 * sum(latencies) / max(len(latencies), 1), 2),
+            "p50": round(1000 * _percentile(latencies, 50), 2),
+            "p95": round(1000 * _percentile(latencies, 95), 2),
+            "p99": round(1000 * _percentile(latencies, 99), 2),
+            "max": round(1000 * (latencies[-1] if latencies else 0.0), 2),
+        },
+        "peak_memory_mb": round(peak / 2**20, 3) if peak is not None else None,
+        "failed_rows": failed,
+        "server": {k: after[k] - before[k] for k in _COUNTERS},
+    }
+
+
+def run_benchmark(
+    sizes: Sequence[int] = (100, 1000),
+    concurrencies: Sequence[int] = (1, 8, 32),
+    server: Optional[MockChatServer] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    seed: int = 0,
+    trace_memory: bool = True,
+    progress: Optional[Any] = None,
+    judge_options: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Run every size × concurrency scenario against a mock server.
+
+    *server* must already be started; by default a ``MockChatServer()`` is
+    started (and stopped) for the run.
+    *progress* is called with each scenario result as it finishes.
+    Returns ``{"meta": ..., "server": ..., "results": [...]}``.
+    """
+    from . import __version__
+
+    # The stand-in server ignores the key, but the SDK insists on one; it is
+    # only set for the run so a fake key never leaks into the rest of the process
+    previous_key = os.environ.get("MISTRAL_API_KEY")
+    if previous_key is None:
+        os.environ["MISTRAL_API_KEY"] = "benchmark"
+    own_server = server is None
+    if server is None:
+        server = MockChatServer(seed=seed).start()
+
+    results = []
+    try:
+        for size in sizes:
+            rows = synthetic_rows(size, seed)
+            for concurrency in concurrencies:
+                result = run_scenario(
+                    server,
+                    rows,
+                    concurrency,
+                    retry_policy=retry_policy,
+                    trace_memory=trace_memory,
+                    judge_options=judge_options,
+                )
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+    finally:
+        if own_server:
+            server.stop()
+        if previous_key is None:
+            os.environ.pop("MISTRAL_API_KEY", None)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "version": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "server": {k: v for k, v in server.options.items() if k != "port"},
+        "judge": dict(judge_options or {}),
+        "results": results,
+    }
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+"""Per-request token budget for rows with oversized context.
+
+Retrieval dumps can dwarf the question and answer being judged.
+:class:`PromptBudget` keeps a row's prompt under ``max_tokens``: when the
+fragments do not fit, they are ranked by lexical overlap with the question
+and answer and the most relevant ones are kept, in their original order.
+It can also add the tail of the conversation history, cut to its own
+smaller budget.
+
+Token counts come from :func:`estimate_tokens`, a fast tokenizer-free
+approximation cached per text, so rows repeating the same fragments or
+history are only counted once."""
+
+import math
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Words and single punctuation marks, roughly the units a BPE tokenizer splits on
+_PIECE = re.compile(r"\w+|[^\w\s]")
+# Terms used for relevance ranking; shorter words are mostly stop words
+_TERM = re.compile(r"\w{3,}")
+# One fragment per line; CSV exports often keep the newlines escaped as "\n"
+_FRAGMENT_SEP = re.compile(r"(?:\r?\n|\\n)+")
+
+ELLIPSIS = "…"
+
+
+def _count_tokens(text: str) -> int:
+    # Latin-script words average ~4 characters per token; Greek and other
+    # scripts are split about twice as finely.  Errs on the high side.
+    return sum(
+        -(-len(piece) // (4 if piece.isascii() else 2)) for piece in _PIECE.findall(text)
+    )
+
+
+@lru_cache(maxsize=16384)
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of *text* (cached per distinct text)."""
+    return _count_tokens(text)
+
+
+def truncate(text: str, max_tokens: int, keep_end: bool = False) -> str:
+    """Cut *text* to at most *max_tokens*, marking the cut with an ellipsis.
+
+    The start is kept, or the end with *keep_end* (e.g. the latest turns of
+    a conversation).
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Binary search on the number of characters kept (one token for the marker)
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        part = text[len(text) - mid:] if keep_end else text[:mid]
+        if _count_tokens(part) + 1 <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    if low == 0:
+        return ""
+    if keep_end:
+        return ELLIPSIS + text[len(text) - low:].lstrip()
+    return text[:low].rstrip() + ELLIPSIS
+
+
+def _terms(text: str) -> set:
+    return set(_TERM.findall(text.lower()))
+
+
+def rank_fragments(fragments: Sequence[str], query: str) -> List[int]:
+    """Indices of *fragments*, most relevant to *query* first.
+
+    Relevance is the number of query terms a fragment contains, divided by
+    the square root of its own term count so long dumps do not win by size
+    alone.  Ties keep the original order.
+    """
+    query_terms = _terms(query)
+
+    def _score(i: int) -> float:
+        terms = _terms(fragments[i])
+        return len(terms & query_terms) / math.sqrt(len(terms) or 1)
+
+    return sorted(range(len(fragments)), key=lambda i: -_score(i))
+
+
+def split_fragments(text: str) -> List[str]:
+    """Split a fragment dump into its non-empty passages."""
+    return [part.strip() for part in _FRAGMENT_SEP.split(text) if part.strip()]
+
+
+def select_fragments(text: str, query: str, max_tokens: int) -> str:
+    """Keep the fragments of *text* most relevant to *query* within *max_tokens*.
+
+    Fragments are taken greedily by relevance, skipping any that no longer
+    fit, and joined back in their original order.  If not even the best
+    fragment fits, it is truncated.
+    """
+    parts = split_fragments(text)
+    if not parts or max_tokens <= 0:
+        return ""
+    order = rank_fragments(parts, query)
+    chosen, used = [], 0
+    for i in order:
+        cost = estimate_tokens(parts[i]) + 1  # plus the newline
+        if used + cost <= max_tokens:
+            chosen.append(i)
+            used += cost
+    if not chosen:
+        return truncate(parts[order[0]], max_tokens)
+    return "\n".join(parts[i] for i in sorted(chosen))
+
+
+def latest_turns(history: str, max_tokens: int) -> str:
+    """Keep the most recent turns of *history* (one per line) within *max_tokens*.
+
+    Whole turns are kept newest first; if not even the last one fits, its
+    end is kept.
+    """
+    if estimate_tokens(history) <= max_tokens:
+        return history
+    turns = split_fragments(history)
+    kept: List[str] = []
+    used = 1  # the ellipsis marking the cut
+    for turn in reversed(turns):
+        cost = estimate_tokens(turn) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(turn)
+        used += cost
+    if not kept:
+        return truncate(turns[-1], max_tokens, keep_end=True) if turns else ""
+    return "\n".join([ELLIPSIS, *reversed(kept)])
+
+
+def _field(row: Dict[str, str], name: str) -> str:
+    value = row.get(name)
+    # Missing cells arrive as "nan" once rows are stringified
+    return "" if value is None or value == "nan" else str(value)
+
+
+class PromptBudget:
+    """Fit a row's fragments and history into a token budget.
+
+    *max_tokens* bounds the estimated tokens of the row's question, answer,
+    history and fragments (the fixed labels and rubric are not counted);
+    None leaves the fragments untouched.  With *include_history* the
+    ``conversation_history`` field is kept, cut to its last
+    *history_tokens*; otherwise it is left out of the prompt.  The question
+    and answer are never trimmed.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        include_history: bool = False,
+        history_tokens: int = 256,
+    ) -> None:
+        if max_tokens is not None and max_tokens < 1:
+            raise ValueError("max_tokens must be at least 1")
+        if history_tokens < 0:
+            raise ValueError("history_tokens must be >= 0")
+        self.max_tokens = max_tokens
+        self.include_history = include_history
+        self.history_tokens = history_tokens
+
+    def fit(self, row: Dict[str, str]) -> Tuple[Dict[str, str], int]:
+        """Return *row* with trimmed fields and the estimated tokens dropped."""
+        fitted = dict(row)
+        dropped = used = 0
+        if self.include_history:
+            history = _field(row, "conversation_history")
+            kept = latest_turns(history, self.history_tokens)
+            dropped += estimate_tokens(history) - estimate_tokens(kept)
+            fitted["conversation_history"] = kept
+            used += estimate_tokens(kept)
+
+        if self.max_tokens is not None:
+            question, answer = _field(row, "question"), _field(row, "answer")
+            fragments = _field(row, "fragments")
+            used += estimate_tokens(question) + estimate_tokens(answer)
+            room = max(0, self.max_tokens - used)
+            if estimate_tokens(fragments) > room:
+                kept = select_fragments(fragments, f"{question}\n{answer}", room)
+                dropped += estimate_tokens(fragments) - estimate_tokens(kept)
+                fitted["fragments"] = kept
+        return fitted, dropped
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+"""Persistent on-disk cache of LLM completions.
+
+Entries are content-addressed: the key is a SHA-256 over the model name,
+temperature, system prompt and rendered user prompt, so any change to the
+prompt or model automatically misses.  Storage is a single SQLite file, which
+gives us atomic writes and safe concurrent access from several threads or
+processes without an extra dependency.  Size eviction is least recently
+used: hits refresh an entry's access time, so completions that later runs
+keep asking for survive a full cache; the age limit counts from creation."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+CACHE_FILENAME = "judgments.sqlite3"
+
+# Eviction is amortised: run it once every this many writes
+_EVICT_EVERY = 1000
+
+
+def make_key(
+    model: str,
+    temperature: float,
+    system_prompt: str,
+    user_prompt: str,
+    options: Optional[Mapping[str, Any]] = None,
+) -> str:
+    """Return the hex digest identifying one chat request.
+
+    *options* are further request parameters that change the completion,
+    e.g. ``max_tokens``; requests without any keep their earlier keys.
+    """
+    h = hashlib.sha256()
+    parts = [model, repr(float(temperature)), system_prompt, user_prompt]
+    if options:
+        parts.append(json.dumps(options, sort_keys=True))
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")  # separator so ("ab", "c") != ("a", "bc")
+    return h.hexdigest()
+
+
+class JudgmentCache:
+    """SQLite-backed completion cache with LRU size and age-based eviction."""
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_entries: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+    ) -> None:
+        self.path = Path(directory) / CACHE_FILENAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(
+            str(self.path),
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=30.0,  # wait out writers in other worker processes
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS judgments ("
+            " key TEXT PRIMARY KEY,"
+            " completion TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        columns = [r[1] for r in self._conn.execute("PRAGMA table_info(judgments)")]
+        if "accessed" not in columns:  # caches written before LRU eviction
+            self._conn.execute("ALTER TABLE judgments ADD COLUMN accessed REAL")
+            self._conn.execute("UPDATE judgments SET accessed = created")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS judgments_created ON judgments(created)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS judgments_accessed ON judgments(accessed)"
+        )
+        self.evict()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached completion for *key*, or ``None``."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT completion, created FROM judgments WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._expired(row[1]):
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE judgments SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+            return row[0]
+
+    def put(self, key: str, completion: str) -> None:
+        """Store *completion* under *key*, replacing any previous entry."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO judgments (key, completion, created, accessed)"
+                " VALUES (?, ?, ?, ?)",
+                (key, completion, now, now),
+            )
+            self._writes += 1
+            due = self._writes % _EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used beyond ``max_entries``."""
+        removed = 0
+        with self._lock:
+            if self.max_age_seconds:
+                cur = self._conn.execute(
+                    "DELETE FROM judgments WHERE created < ?",
+                    (time.time() - self.max_age_seconds,),
+                )
+                removed += cur.rowcount
+            if self.max_entries:
+                cur = self._conn.execute(
+                    "DELETE FROM judgments WHERE key IN ("
+                    " SELECT key FROM judgments ORDER BY accessed DESC"
+                    " LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                removed += cur.rowcount
+        return removed
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the hit rate for this session."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM judgments").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def _expired(self, created: float) -> bool:
+        if not self.max_age_seconds:
+            return False
+        return created < time.time() - self.max_age_seconds
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+"""Crash-safe progress checkpoints for long CLI runs.
+
+Completed judgments are appended to a JSON-lines sidecar next to the output
+file.  Each line carries a *row key* — a hash of the fields the judge
+actually reads plus an occurrence counter for exact duplicates — so a resumed
+run can match work already paid for even if rows were reordered.  The first
+line records the judge configuration (see ``Judge.fingerprint``) so verdicts
+are never reused by a run with another model or prompt."""
+
+import hashlib
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Columns whose content determines the judgment
+KEY_FIELDS: Tuple[str, ...] = (
+    "question",
+    "answer",
+    "fragments",
+    "conversation_history",
+)
+
+
+def row_keys(
+    rows: Iterable[Dict[str, str]], seen: Optional[Counter] = None
+) -> List[str]:
+    """Return a stable key for every row, disambiguating exact duplicates.
+
+    Pass the same *seen* counter for consecutive batches of one file so
+    duplicates are numbered across batch boundaries.
+    """
+    if seen is None:
+        seen = Counter()
+    keys: List[str] = []
+    for row in rows:
+        h = hashlib.sha1()
+        for field in KEY_FIELDS:
+            h.update(str(row.get(field, "")).encode("utf-8"))
+            h.update(b"\x00")
+        digest = h.hexdigest()
+        keys.append(f"{digest}:{seen[digest]}")
+        seen[digest] += 1
+    return keys
+
+
+def checkpoint_path(output_path: str | Path) -> Path:
+    """Sidecar location for *output_path* (``out.csv`` → ``out.csv.checkpoint.jsonl``)."""
+    output_path = Path(output_path)
+    return output_path.with_name(output_path.name + ".checkpoint.jsonl")
+
+
+class Checkpoint:
+    """Append-only JSONL log of ``{key, result}`` records, flushed in batches.
+
+    With *config* a ``{config}`` header is written before the first record
+    and :meth:`load` refuses a file written under a different one.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        flush_every: int = 100,
+        config: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.flush_every = max(1, flush_every)
+        self.config = config
+        self._buffer: List[str] = []
+
+    def load(self) -> Dict[str, Dict[str, str]]:
+        """Return completed results by key; a torn final line is ignored.
+
+        Raises ValueError if the file's header names another configuration.
+        Files without a header predate it and are accepted as they are.
+        """
+        done: Dict[str, Dict[str, str]] = {}
+        if not self.path.exists():
+            return done
+        with self.path.open(encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # partial write from a crash
+                if "config" in record:
+                    self._check_config(record["config"])
+                    continue
+                done[record["key"]] = record["result"]
+        return done
+
+    def _check_config(self, stored: Dict[str, Any]) -> None:
+        if self.config is None or stored == self.config:
+            return
+        changed = sorted(
+            k for k in set(stored) | set(self.config) if stored.get(k) != self.config.get(k)
+        )
+        raise ValueError(
+            f"{self.path} was written with a different judge configuration "
+            f"({', '.join(changed)} changed)"
+        )
+
+    def add(self, key: str, result: Dict[str, str]) -> None:
+        self._buffer.append(
+            json.dumps({"key": key, "result": result}, ensure_ascii=False)
+        )
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.config is not None and not self.path.exists():
+            self._buffer.insert(0, json.dumps({"config": self.config}))
+        with self.path.open("a", encoding="utf-8") as fh:
+            fh.write("\n".join(self._buffer) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        self._buffer.clear()
+
+    def remove(self) -> None:
+        self._buffer.clear()
+        self.path.unlink(missing_ok=True)
@@ -1,32 +1,76 @@
 from __future__ import annotations
 
-"""Command‑line interface: run the Judge over a CSV and print metrics."""
+"""Command‑line interface: run the Judge over a CSV and print metrics.
+
+pandas, NumPy (``evaluation``), tqdm and the Mistral SDK are imported inside
+the commands that need them, so ``--help`` and argument errors return
+without paying for them."""
 
 import argparse
+import json
 from collections import Counter
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
 import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Mapping
 
-import pandas as pd
-from tqdm import tqdm
-
-from .io import load_table, save_table
-from .judge import Judge
-from .evaluation import precision_recall_f1, metrics_report
+from .batch import (
+    SUCCESS,
+    TERMINAL_STATUSES,
+    BatchBackend,
+    LocalBatchBackend,
+    MistralBatchBackend,
+    merge_results,
+    remove_job_files,
+    render_requests,
+    wait_for_job,
+)
+from .cache import JudgmentCache
+from .checkpoint import Checkpoint, checkpoint_path, row_keys
+from .judge import Judge, gated_result
+from .ratelimit import RateLimiter, RetryPolicy
+from .runner import Deduplicator, judge_rows
+from .safety import screen, use_rules
+from .telemetry import (
+    JsonlSink,
+    PrometheusSink,
+    QueueSink,
+    performance_summary,
+    telemetry,
+)
 from .config import config
 
+if TYPE_CHECKING:
+    import pandas as pd
+    from tqdm import tqdm
+
+    from .evaluation import ConfusionMatrix, MetricsAccumulator
+
 REPORTS_DIR = Path("reports")
 
 
 def _write_report(
     path: Path,
     metrics: dict[str, float],
-    counts: Counter[str],
-    gold: list[str] | None = None,
-    preds: list[str] | None = None,
+    counts: Mapping[str, int],
+    cm: ConfusionMatrix | None = None,
+    intervals: dict[str, tuple[float, float]] | None = None,
+    slices: dict[str, dict[str, MetricsAccumulator]] | None = None,
+    bootstrap: int = 0,
+    seed: int | None = None,
+    performance: dict | None = None,
 ) -> None:
-    """Write a Markdown report with summary metrics and confusion matrix."""
+    """Write a Markdown report with summary metrics and confusion matrix.
+
+    *intervals* adds bootstrap confidence intervals for the macro metrics;
+    *slices* maps a column name to per-value accumulators for a breakdown
+    (with bootstrap F1 intervals when *bootstrap* > 0); *performance* is a
+    :func:`performance_summary` of the run.
+    """
+    from .evaluation import bootstrap_metrics
 
     path.parent.mkdir(parents=True, exist_ok=True)
     timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
@@ -42,9 +86,8 @@ def _write_report(
         "## Macro metrics",
     ] + [f"- **{k.capitalize()}**: {v:.4f}" for k, v in metrics.items()]
 
-    if gold is not None and preds is not None:
-        per_class = precision_recall_f1(gold, preds, average="none")
-        labels = sorted({*gold, *preds})
+    if cm is not None:
+        per_class = cm.per_class()
 
         lines += [
             "",
@@ -52,55 +95,465 @@ def _write_report(
             "| Class | Precision | Recall | F1 |",
             "|-------|----------:|-------:|---:|",
         ]
-        for label in labels:
+        for i, label in enumerate(cm.labels):
             lines.append(
-                f"| {label} | {per_class[f'{label}_precision']:.4f} | "
-                f"{per_class[f'{label}_recall']:.4f} | {per_class[f'{label}_f1']:.4f} |"
+                f"| {label} | {per_class['precision'][i]:.4f} | "
+                f"{per_class['recall'][i]:.4f} | {per_class['f1'][i]:.4f} |"
             )
 
-        # Confusion matrix
-        matrix = {t: {p: 0 for p in labels} for t in labels}
-        for t, p in zip(gold, preds):
-            matrix[t][p] += 1
-
         lines += [
             "",
             "## Confusion matrix",
-            "| True \\ Pred | " + " | ".join(labels) + " |",
-            "|--------------|" + "|".join(["---" for _ in labels]) + "|",
+            "| True \\ Pred | " + " | ".join(cm.labels) + " |",
+            "|--------------|" + "|".join(["---" for _ in cm.labels]) + "|",
+        ]
+        for label, row in zip(cm.labels, cm.matrix):
+            lines.append(f"| {label} | {' | '.join(str(int(c)) for c in row)} |")
+
+    if intervals:
+        lines += [
+            "",
+            f"## Bootstrap 95% confidence intervals ({bootstrap} resamples)",
+            "| Metric | Estimate | 95% CI |",
+            "|--------|---------:|-------:|",
         ]
-        for t in labels:
-            row = " | ".join(str(matrix[t][p]) for p in labels)
-            lines.append(f"| {t} | {row} |")
+        for k, v in metrics.items():
+            low, high = intervals[k]
+            lines.append(f"| {k.capitalize()} | {v:.4f} | [{low:.4f}, {high:.4f}] |")
+
+    for column, accs in (slices or {}).items():
+        header = "| Value | Rows | Accuracy | Macro F1 |"
+        rule = "|-------|-----:|---------:|---------:|"
+        if bootstrap:
+            header += " F1 95% CI |"
+            rule += "----------:|"
+        lines += ["", f"## Metrics by `{column}`", header, rule]
+        for value, acc in sorted(accs.items()):
+            slice_cm = acc.snapshot()
+            m = slice_cm.metrics("macro")
+            line = f"| {value} | {slice_cm.total} | {m['accuracy']:.4f} | {m['f1']:.4f} |"
+            if bootstrap:
+                low, high = bootstrap_metrics(slice_cm, bootstrap, seed=seed)["f1"]
+                line += f" [{low:.4f}, {high:.4f}] |"
+            lines.append(line)
+
+    if performance:
+        lines += ["", *_performance_lines(performance)]
 
     path.write_text("\n".join(lines), encoding="utf-8")
 
 
+def _performance_lines(perf: dict) -> list[str]:
+    """Markdown "Performance" section for a :func:`performance_summary`."""
+    counters = perf["counters"]
+    prompt = int(counters.get("prompt_tokens", 0))
+    completion = int(counters.get("completion_tokens", 0))
+    lines = [
+        "## Performance",
+        f"- **Rows**: {perf['rows']} in {perf['elapsed']:.1f}s "
+        f"({perf['rows_per_sec']:.2f} rows/s)",
+        f"- **LLM requests**: {int(counters.get('requests', 0))} "
+        f"({int(counters.get('retries', 0))} retries, "
+        f"{int(counters.get('throttled', 0))} throttled)",
+        f"- **Tokens**: {prompt} prompt + {completion} completion = {prompt + completion}",
+        f"- **Safety short-circuits**: {int(counters.get('safety_short_circuits', 0))}",
+    ]
+    if counters.get("safety_flags"):
+        lines[-1] += (
+            f" ({int(counters['safety_flags'])} lower-severity matches still judged)"
+        )
+    if "budget_prompts" in counters:
+        lines.append(f"- **Prompt budget**: {_budget_summary(counters)}")
+    if "cascade_rows" in counters:
+        lines.append(f"- **Cascade**: {_cascade_summary(counters)}")
+    if "early_stops" in counters:
+        stops = int(counters["early_stops"])
+        lines.append(f"- **Early stops**: {stops} streams closed at the label")
+    if perf["stages"]:
+        lines += [
+            "",
+            "| Stage | Calls | Mean (ms) | p50 (ms) | p95 (ms) | p99 (ms) |",
+            "|-------|------:|----------:|---------:|---------:|---------:|",
+        ]
+        for stage, st in perf["stages"].items():
+            lines.append(
+                f"| {stage} | {st['count']} | {1000 * st['mean']:.2f} | "
+                f"{1000 * st['p50']:.2f} | {1000 * st['p95']:.2f} | {1000 * st['p99']:.2f} |"
+            )
+    return lines
+
+
+def _budget_summary(counters: dict) -> str:
+    """"3 of 25 prompts trimmed, ~1200 tokens dropped (~400 per trimmed prompt)"."""
+    prompts = int(counters.get("budget_prompts", 0))
+    trimmed = int(counters.get("budget_trimmed", 0))
+    dropped = int(counters.get("budget_tokens_dropped", 0))
+    text = f"{trimmed} of {prompts} prompts trimmed"
+    if trimmed:
+        text += f", ~{dropped} tokens dropped (~{dropped // trimmed} per trimmed prompt)"
+    return text
+
+
+def _cascade_summary(counters: dict) -> str:
+    """"7 of 25 rows escalated (28.0%; 2 unparseable)"."""
+    rows = int(counters.get("cascade_rows", 0))
+    escalated = int(counters.get("cascade_escalated", 0))
+    unparseable = int(counters.get("cascade_unparseable", 0))
+    share = escalated / rows if rows else 0.0
+    return (
+        f"{escalated} of {rows} rows escalated to the final model "
+        f"({share:.1%}; {unparseable} unparseable)"
+    )
+
+
 def _normalize_column_names(df: pd.DataFrame) -> pd.DataFrame:
     """Normalize column names to standard format."""
     column_mapping = {
         'Current User Question': 'question',
         'Assistant Answer': 'answer',
         'Fragment Texts': 'fragments',
-        'Conversation History': 'conversation_history'
+        'Conversation History': 'conversation_history',
+        'label': 'Label',  # e.g. data/examples.jsonl
     }
     
     df = df.rename(columns=column_mapping)
     return df
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="LLM‑as‑a‑Judge runner")
+def _build_judge(
+    args: argparse.Namespace,
+) -> tuple[JudgmentCache | None, RateLimiter | None, Judge]:
+    """Construct the Judge plus the optional cache and rate limiter it uses."""
+    cache = None
+    if args.cache:
+        cache = JudgmentCache(
+            args.cache_dir,
+            max_entries=config.CACHE_MAX_ENTRIES or None,
+            max_age_seconds=config.CACHE_MAX_AGE_DAYS * 86400 or None,
+        )
+    limiter = None
+    if args.rpm or args.tpm:
+        limiter = RateLimiter(
+            requests_per_minute=args.rpm or None,
+            tokens_per_minute=args.tpm or None,
+        )
+    judge = Judge(
+        model=args.model,
+        temperature=args.temperature,
+        cache=cache,
+        rate_limiter=limiter,
+        retry_policy=RetryPolicy(max_retries=args.max_retries),
+        base_url=args.base_url,
+        max_prompt_tokens=args.max_prompt_tokens or None,
+        include_history=args.include_history,
+        history_tokens=args.history_tokens,
+        cascade_model=args.cascade_model,
+        cascade_threshold=args.cascade_threshold,
+        stream=args.stream,
+        early_stop=args.early_stop,
+        max_output_tokens=args.max_output_tokens or None,
+        json_mode=args.json_mode,
+    )
+    return cache, limiter, judge
+
+
+def _chunk_rows(chunk: pd.DataFrame) -> list[dict[str, str]]:
+    """Convert pandas rows to dicts for Judge compatibility."""
+    return [
+        {str(k): str(v) for k, v in row.items()} for _, row in chunk.iterrows()
+    ]
+
+
+def _show_running_metrics(bar: tqdm, acc: MetricsAccumulator | None) -> None:
+    """Put the running macro F1 / accuracy in the progress bar postfix."""
+    if acc is None or not len(acc):
+        return
+    metrics = acc.metrics("macro")
+    bar.set_postfix(
+        macro_f1=f"{metrics['f1']:.3f}", acc=f"{metrics['accuracy']:.3f}", refresh=False
+    )
+
+
+def _update_slices(
+    chunk: pd.DataFrame, slices: dict[str, dict[str, MetricsAccumulator]]
+) -> None:
+    """Add a judged chunk to the per-column, per-value accumulators."""
+    if "Label" not in chunk.columns:
+        return
+    from .evaluation import MetricsAccumulator, confusion_by_slice
+
+    for column, accs in slices.items():
+        if column not in chunk.columns:
+            raise SystemExit(f"--slice-by column {column!r} is not in the input")
+        for value, cm in confusion_by_slice(
+            chunk[column], chunk["Label"], chunk["Predicted_Label"]
+        ).items():
+            accs.setdefault(value, MetricsAccumulator()).update_confusion(cm)
+
+
+def _set_predictions(chunk: pd.DataFrame, results: list[dict[str, str]]) -> None:
+    chunk["Predicted_Label"] = [res["label"] for res in results]
+    chunk["Predicted_CoT"] = [res["chain_of_thought"] for res in results]
+
+
+def _judge_chunk(
+    chunk: pd.DataFrame,
+    judge: Judge,
+    args: argparse.Namespace,
+    ckpt: Checkpoint,
+    done: dict[str, dict[str, str]],
+    seen: Counter[str],
+    bar: tqdm,
+    acc: MetricsAccumulator | None = None,
+    dedup: Deduplicator | None = None,
+) -> int:
+    """Judge every row of *chunk* in place, reusing checkpointed results.
+
+    The whole ``answer`` column is screened by the safety gate up front, so
+    only rows that really need the LLM are scheduled; with *dedup* rows
+    whose prompt was already sent this run reuse that result.  When the
+    chunk has a ``Label`` column each finished row is counted in *acc*.
+    Returns the number of rows the gate flagged.
+    """
+    rows = _chunk_rows(chunk)
+    keys = row_keys(rows, seen)
+    gold = chunk["Label"].tolist() if acc is not None and "Label" in chunk.columns else None
+
+    # Checkpointed rows are popped so *done* shrinks as the run advances
+    results: list[dict[str, str] | None] = [done.pop(key, None) for key in keys]
+    todo = [i for i, res in enumerate(results) if res is None]
+
+    telemetry.count("rows", len(rows))
+    with telemetry.time("safety_screen"):
+        flagged, rule_ids = screen([rows[i].get("answer", "") for i in todo])
+    telemetry.count("safety_short_circuits", int(flagged.sum()))
+    flags = int((rule_ids.notna() & ~flagged).sum())
+    if flags:
+        telemetry.count("safety_flags", flags)
+    for j in flagged.to_numpy().nonzero()[0]:
+        results[todo[j]] = gated_result(rule_ids.iat[j])
+        ckpt.add(keys[todo[j]], results[todo[j]])
+    todo = [i for i, res in enumerate(results) if res is None]
+    if gold is not None:
+        for i, res in enumerate(results):
+            if res is not None:
+                acc.add(gold[i], res["label"])  # type: ignore[union-attr]
+        _show_running_metrics(bar, acc)
+    bar.update(len(rows) - len(todo))
+
+    def _record(j: int, res: dict[str, str]) -> None:
+        results[todo[j]] = res
+        ckpt.add(keys[todo[j]], res)
+        if gold is not None:
+            acc.add(gold[todo[j]], res["label"])  # type: ignore[union-attr]
+            _show_running_metrics(bar, acc)
+
+    judge_rows(
+        partial(judge.evaluate_row, safety_gate=False),
+        [rows[i] for i in todo],
+        concurrency=args.concurrency,
+        progress=bar,
+        on_result=_record,
+        evaluate_batch=partial(judge.evaluate_batch, safety_gate=False),
+        batch_size=args.rows_per_request,
+        key=judge.request_key if dedup is not None else None,
+        dedup=dedup,
+    )
+
+    _set_predictions(chunk, results)  # type: ignore[arg-type]
+    return int(flagged.sum())
+
+
+def _batch_files(out_path: str) -> tuple[Path, Path]:
+    """Sidecars of a ``--batch-mode`` run: the request file and the job id."""
+    return Path(out_path + ".batch.jsonl"), Path(out_path + ".batch-job.json")
+
+
+def _run_batch_job(
+    args: argparse.Namespace, judge: Judge, out_path: str
+) -> dict[str, str]:
+    """Render every prompt into one job file, submit it and wait for results.
+
+    The job id is kept in a sidecar so ``--resume`` polls the same job
+    instead of paying for a second one, unless that job already ended without
+    succeeding, in which case a new one is submitted.  The sidecars are only
+    removed by ``_run`` once the output table is written.
+    """
+    from .io import iter_table
+
+    job_file, state_file = _batch_files(out_path)
+    backend: BatchBackend = (
+        LocalBatchBackend(judge.client)
+        if args.batch_backend == "local"
+        else MistralBatchBackend()
+    )
+
+    job_id = None
+    if args.resume and backend.persistent and state_file.exists():
+        job_id = json.loads(state_file.read_text(encoding="utf-8"))["job_id"]
+        status = backend.status(job_id)
+        if status in TERMINAL_STATUSES and status != SUCCESS:
+            print(f"⚠️  Batch job {job_id} ended with status {status}; submitting a new one")
+            remove_job_files(state_file)
+            job_id = None
+        else:
+            print(f"↩️  Resuming batch job {job_id}")
+
+    if job_id is None:
+        count = 0
+        seen: set[str] = set()
+        job_file.parent.mkdir(parents=True, exist_ok=True)
+        with job_file.open("w", encoding="utf-8") as fh:
+            for chunk in iter_table(
+                args.input_path, chunksize=args.chunksize, columns=args.columns
+            ):
+                rows = _chunk_rows(_normalize_column_names(chunk))
+                for request in render_requests(judge, rows, seen):
+                    fh.write(json.dumps(request, ensure_ascii=False) + "\n")
+                    count += 1
+        if not count:
+            return {}
+        job_id = backend.submit(job_file, judge.model)
+        if backend.persistent:
+            state_file.write_text(json.dumps({"job_id": job_id}), encoding="utf-8")
+        print(f"📦 Submitted batch job {job_id} with {count} requests")
+
+    return wait_for_job(backend, job_id, poll_interval=args.batch_poll_interval)
+
+
+def _parse_shard(value: str) -> tuple[int, int]:
+    """Parse ``i/N`` (0-based shard *i* of *N*)."""
+    try:
+        index, count = (int(x) for x in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}") from None
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must satisfy 0 <= i < N, got {value!r}")
+    return index, count
+
+
+def _add_metric_args(parser: argparse.ArgumentParser) -> None:
+    """Report options shared by the run and ``merge`` commands."""
+    parser.add_argument(
+        "--seed",
+        dest="seed",
+        type=int,
+        default=config.SEED,
+        help="Random seed",
+    )
+    parser.add_argument(
+        "--bootstrap",
+        dest="bootstrap",
+        type=int,
+        default=config.BOOTSTRAP_RESAMPLES,
+        help="Bootstrap resamples for metric confidence intervals (0 = off)",
+    )
+    parser.add_argument(
+        "--bootstrap-workers",
+        dest="bootstrap_workers",
+        type=int,
+        default=1,
+        help="Processes used for bootstrap resampling",
+    )
+    parser.add_argument(
+        "--slice-by",
+        dest="slice_by",
+        type=lambda s: [c.strip() for c in s.split(",") if c.strip()],
+        default=[],
+        help="Comma-separated columns to break metrics down by in the report",
+    )
+    parser.add_argument(
+        "--chunksize",
+        dest="chunksize",
+        type=int,
+        default=config.CHUNK_SIZE,
+        help="Rows read, judged and written per batch (bounds peak memory)",
+    )
+
+
+def _run_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="LLM‑as‑a‑Judge runner",
+        epilog="Other commands: `merge` (reassemble shard outputs), "
+        "`score` (metrics and report from judged tables, no LLM calls), "
+        "`bench` (throughput benchmark against a local mock server).",
+    )
     parser.add_argument(
-        "--in", dest="input_path", required=True, help="Input CSV path"
+        "--in",
+        dest="input_path",
+        required=True,
+        help="Input table (.csv, .jsonl, .parquet or .feather)",
     )
     parser.add_argument(
-        "--out", dest="output_path", default=None, help="Output CSV path"
+        "--out",
+        dest="output_path",
+        default=None,
+        help="Output table; format follows the extension",
+    )
+    parser.add_argument(
+        "--columns",
+        dest="columns",
+        type=lambda s: [c.strip() for c in s.split(",") if c.strip()],
+        default=None,
+        help="Comma-separated input columns to read (default: all)",
     )
     parser.add_argument(
         "--model", dest="model", default="mistral-small-latest",
         help="Mistral model name"
     )
+    parser.add_argument(
+        "--cascade-model",
+        dest="cascade_model",
+        default=config.CASCADE_MODEL,
+        help="Fast model that judges every row first; only rows it is unsure "
+        "about are re-judged by --model",
+    )
+    parser.add_argument(
+        "--cascade-threshold",
+        dest="cascade_threshold",
+        type=float,
+        default=config.CASCADE_THRESHOLD,
+        help="Escalate rows whose first-tier confidence is below this (0-1)",
+    )
+    parser.add_argument(
+        "--stream",
+        dest="stream",
+        action="store_true",
+        default=config.STREAM,
+        help="Stream completions and parse the label as it arrives",
+    )
+    parser.add_argument(
+        "--early-stop",
+        dest="early_stop",
+        action="store_true",
+        default=config.EARLY_STOP,
+        help="Ask for the label first and stop generating once it is complete "
+        "(no chain of thought; implies --stream)",
+    )
+    parser.add_argument(
+        "--max-output-tokens",
+        dest="max_output_tokens",
+        type=int,
+        default=config.MAX_OUTPUT_TOKENS,
+        help="Cap on generated tokens per row (0 = no cap)",
+    )
+    parser.add_argument(
+        "--json-mode",
+        dest="json_mode",
+        action="store_true",
+        default=config.JSON_MODE,
+        help="Request a JSON response_format (default)",
+    )
+    parser.add_argument(
+        "--no-json-mode", dest="json_mode", action="store_false",
+        help="Do not request a JSON response_format",
+    )
+    parser.add_argument(
+        "--base-url",
+        dest="base_url",
+        default=config.MISTRAL_BASE_URL,
+        help="API base URL, e.g. a proxy or local stand-in server",
+    )
     parser.add_argument(
         "--temperature",
         dest="temperature",
@@ -109,13 +562,397 @@ def main() -> None:
         help="Sampling temperature",
     )
     parser.add_argument(
-        "--seed",
-        dest="seed",
+        "--concurrency",
+        dest="concurrency",
         type=int,
-        default=config.SEED,
-        help="Random seed",
+        default=config.CONCURRENCY,
+        help="Number of LLM calls kept in flight",
+    )
+    parser.add_argument(
+        "--rows-per-request",
+        dest="rows_per_request",
+        type=int,
+        default=config.ROWS_PER_REQUEST,
+        help="Pack this many rows into one LLM request (1 = one row per request)",
+    )
+    parser.add_argument(
+        "--max-prompt-tokens",
+        dest="max_prompt_tokens",
+        type=int,
+        default=config.MAX_PROMPT_TOKENS,
+        help="Estimated token budget per row; the fragments least related to the "
+        "question and answer are dropped to fit (0 = no limit)",
+    )
+    parser.add_argument(
+        "--include-history",
+        dest="include_history",
+        action="store_true",
+        default=config.INCLUDE_HISTORY,
+        help="Add the latest conversation history to the prompt",
+    )
+    parser.add_argument(
+        "--history-tokens",
+        dest="history_tokens",
+        type=int,
+        default=config.HISTORY_MAX_TOKENS,
+        help="Token budget for --include-history (oldest turns are cut first)",
+    )
+    parser.add_argument(
+        "--rpm",
+        dest="rpm",
+        type=float,
+        default=config.RATE_LIMIT_RPM,
+        help="Client-side requests/minute ceiling (0 = unlimited)",
+    )
+    parser.add_argument(
+        "--tpm",
+        dest="tpm",
+        type=float,
+        default=config.RATE_LIMIT_TPM,
+        help="Client-side tokens/minute ceiling (0 = unlimited)",
+    )
+    parser.add_argument(
+        "--max-retries",
+        dest="max_retries",
+        type=int,
+        default=config.MAX_RETRIES,
+        help="Retries on 429 / transient 5xx before giving up",
+    )
+    parser.add_argument(
+        "--cache",
+        dest="cache",
+        action="store_true",
+        default=config.ENABLE_CACHE,
+        help="Reuse completions for byte-identical requests across runs",
+    )
+    parser.add_argument(
+        "--no-cache", dest="cache", action="store_false", help="Disable the cache"
+    )
+    parser.add_argument(
+        "--dedup",
+        dest="dedup",
+        action="store_true",
+        default=config.ENABLE_DEDUP,
+        help="Send each distinct prompt once per run and reuse its result "
+        "for duplicate rows (default)",
+    )
+    parser.add_argument(
+        "--no-dedup", dest="dedup", action="store_false", help="Judge every row separately"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        default=str(config.CACHE_DIR),
+        help="Directory holding the judgment cache",
+    )
+    parser.add_argument(
+        "--resume",
+        dest="resume",
+        action="store_true",
+        help="Skip rows already judged in the checkpoint of a previous run",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--checkpoint-every",
+        dest="checkpoint_every",
+        type=int,
+        default=config.CHECKPOINT_EVERY,
+        help="Flush completed rows to the checkpoint every N rows",
+    )
+    parser.add_argument(
+        "--batch-mode",
+        dest="batch_mode",
+        action="store_true",
+        help="Submit all prompts as one offline provider batch job and wait for it",
+    )
+    parser.add_argument(
+        "--batch-backend",
+        dest="batch_backend",
+        choices=["mistral", "local"],
+        default="mistral",
+        help="Batch provider; 'local' runs the job in-process (for testing)",
+    )
+    parser.add_argument(
+        "--batch-poll-interval",
+        dest="batch_poll_interval",
+        type=float,
+        default=config.BATCH_POLL_INTERVAL,
+        help="Seconds between batch job status checks",
+    )
+    parser.add_argument(
+        "--safety-rules",
+        dest="safety_rules",
+        default=config.SAFETY_RULES,
+        help="YAML/JSON safety rule pack replacing the built-in patterns",
+    )
+    parser.add_argument(
+        "--metrics-jsonl",
+        dest="metrics_jsonl",
+        default=config.TELEMETRY_JSONL,
+        help="Append telemetry snapshots (stage timings, tokens, retries) to this JSONL file",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        dest="metrics_port",
+        type=int,
+        default=config.TELEMETRY_PORT,
+        help="Serve live telemetry in Prometheus format on this port (0 = off)",
+    )
+    parser.add_argument(
+        "--shard",
+        dest="shard",
+        type=_parse_shard,
+        default=None,
+        help="Only judge shard i of N (0-based, rows with index %% N == i); "
+        "the output keeps a _row column for `merge`",
+    )
+    parser.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        default=1,
+        help="Judge N shards in parallel worker processes and merge them",
+    )
+    _add_metric_args(parser)
+    return parser
+
+
+def _report_metrics(
+    acc: MetricsAccumulator,
+    slices: dict[str, dict[str, MetricsAccumulator]],
+    args: argparse.Namespace,
+    stem: str,
+    performance: dict | None = None,
+) -> None:
+    """Print the final metrics and write ``reports/<stem>_report.md``."""
+    from .evaluation import bootstrap_metrics, metrics_report
+
+    cm = acc.snapshot()
+    metrics = cm.metrics("macro")
+    print(metrics_report(metrics, title="Macro metrics"))
+    counts = cm.predicted_counts()
+    intervals = None
+    if args.bootstrap:
+        intervals = bootstrap_metrics(
+            cm, args.bootstrap, seed=args.seed, workers=args.bootstrap_workers
+        )
+        print("\n".join(
+            f"{k:>10s}: 95% CI [{low:.4f}, {high:.4f}]"
+            for k, (low, high) in intervals.items()
+        ))
+    report_path = REPORTS_DIR / (stem + "_report.md")
+    _write_report(
+        report_path, metrics, counts, cm,
+        intervals=intervals, slices=slices, bootstrap=args.bootstrap, seed=args.seed,
+        performance=performance,
+    )
+    print(f"📄 Markdown report saved to {report_path}")
+
+
+def _finish_telemetry() -> dict:
+    """Close the telemetry sinks and print a one-line performance summary."""
+    telemetry.close_sinks()
+    perf = performance_summary(telemetry.snapshot())
+    line = (
+        f"⚡ {perf['rows']} rows in {perf['elapsed']:.1f}s "
+        f"({perf['rows_per_sec']:.1f} rows/s)"
+    )
+    llm = perf["stages"].get("llm")
+    if llm:
+        line += (
+            f"; LLM p50 {1000 * llm['p50']:.0f}ms, p95 {1000 * llm['p95']:.0f}ms, "
+            f"p99 {1000 * llm['p99']:.0f}ms"
+        )
+    tokens = perf["counters"].get("prompt_tokens", 0) + perf["counters"].get(
+        "completion_tokens", 0
+    )
+    if tokens:
+        line += f"; {int(tokens)} tokens"
+    print(line)
+    if "budget_prompts" in perf["counters"]:
+        print(f"✂️  Prompt budget: {_budget_summary(perf['counters'])}")
+    if "cascade_rows" in perf["counters"]:
+        line = f"🪜 Cascade: {_cascade_summary(perf['counters'])}"
+        tiers = [(name, perf["stages"].get(stage)) for name, stage in
+                 (("fast", "llm_fast"), ("final", "llm"))]
+        latency = [f"{name} p50 {1000 * st['p50']:.0f}ms" for name, st in tiers if st]
+        if latency:
+            line += "; " + ", ".join(latency)
+        print(line)
+    label = perf["stages"].get("llm_label")
+    if label:
+        line = f"🏁 Time to label p50 {1000 * label['p50']:.0f}ms"
+        if "early_stops" in perf["counters"]:
+            line += f"; {int(perf['counters']['early_stops'])} streams stopped early"
+        print(line)
+    return perf
+
+
+# -----------------------------------------------------------------------------
+# Sharding
+# -----------------------------------------------------------------------------
+
+# Global input row index carried by shard outputs so `merge` can restore order
+ROW_COLUMN = "_row"
+
+
+def _merge_shards(
+    paths: list[str],
+    out_path: str,
+    chunksize: int,
+    acc: MetricsAccumulator,
+    slices: dict[str, dict[str, MetricsAccumulator]],
+) -> bool:
+    """Interleave shard outputs back into input order, streaming.
+
+    Every shard is sorted by ``_row``, so all buffered rows up to the
+    smallest "last row read" among unfinished shards can be written safely.
+    Gaps or duplicates in ``_row`` (a missing or repeated shard) abort the
+    merge.  Returns whether the shards carried a ``Label`` column.
+    """
+    import pandas as pd
+
+    from .io import TableWriter, iter_table
+
+    readers = [
+        iter_table(p, chunksize=chunksize) for p in paths if Path(p).stat().st_size
+    ]
+    buffers: list[pd.DataFrame | None] = [None] * len(readers)
+    finished = [False] * len(readers)
+    expected = 0
+    has_gold = False
+
+    with TableWriter(out_path) as writer:
+        while True:
+            for k, reader in enumerate(readers):
+                while not finished[k] and (buffers[k] is None or not len(buffers[k])):
+                    try:
+                        buffers[k] = next(reader)
+                    except StopIteration:
+                        finished[k] = True
+            live = [k for k, buf in enumerate(buffers) if buf is not None and len(buf)]
+            if not live:
+                break
+            bounds = [buffers[k][ROW_COLUMN].iloc[-1] for k in live if not finished[k]]
+            bound = min(bounds) if bounds else float("inf")
+
+            parts = []
+            for k in live:
+                buf = buffers[k]
+                ready = buf[ROW_COLUMN] <= bound
+                parts.append(buf[ready])
+                buffers[k] = buf[~ready]
+            merged = pd.concat(parts).sort_values(ROW_COLUMN, kind="stable")
+
+            rows = merged[ROW_COLUMN].to_numpy()
+            if len(rows) and (rows[0] != expected or (rows[1:] - rows[:-1] != 1).any()):
+                raise SystemExit(
+                    f"Shard outputs are not a complete partition near row {expected}; "
+                    "is a shard missing or listed twice?"
+                )
+            expected += len(rows)
+
+            merged = merged.drop(columns=ROW_COLUMN).reset_index(drop=True)
+            if "Label" in merged.columns:
+                has_gold = True
+                acc.update(merged["Label"], merged["Predicted_Label"])
+            _update_slices(merged, slices)
+            writer.write(merged)
+
+    print(f"🧩 Merged {len(paths)} shards ({expected} rows) into {out_path}")
+    return has_gold
+
+
+# Set in ``--workers`` processes: where to send live telemetry snapshots
+_WORKER_UPDATES = None
+
+
+def _init_worker(updates) -> None:
+    global _WORKER_UPDATES
+    _WORKER_UPDATES = updates
+
+
+def _run_shard(argv: list[str]) -> dict:
+    """Worker-process entry point: one sharded run; returns its telemetry.
+
+    A snapshot also goes to the parent after every chunk, so its sinks can
+    show the run while it is going.
+    """
+    if _WORKER_UPDATES is not None:
+        telemetry.add_sink(QueueSink(_WORKER_UPDATES, argv[argv.index("--shard") + 1]))
+    try:
+        _run(argv)
+    finally:
+        telemetry.close_sinks()
+    return telemetry.snapshot()
+
+
+def _run_workers(args: argparse.Namespace, argv: list[str], out_path: str) -> None:
+    """Run ``--workers`` shards in a process pool, then merge them."""
+    n = args.workers
+    suffix = Path(out_path).suffix
+    shard_paths = [f"{out_path}.shard-{i}-of-{n}{suffix}" for i in range(n)]
+    # Workers get no sinks of their own: they stream snapshots to this process,
+    # whose sinks serve the sum.  Spawned (not forked) workers do not inherit
+    # the parent's metrics socket or threads.
+    import multiprocessing
+    import threading
+
+    jobs = [
+        argv + ["--shard", f"{i}/{n}", "--out", path, "--workers", "1",
+                "--metrics-jsonl", "", "--metrics-port", "0"]
+        for i, path in enumerate(shard_paths)
+    ]
+    ctx = multiprocessing.get_context("spawn")
+    updates = ctx.Queue()
+    latest: dict[str, dict] = {}
+
+    def _follow() -> None:
+        for shard, snapshot in iter(updates.get, None):
+            latest[shard] = snapshot
+            telemetry.replace(latest.values())
+            telemetry.flush()
+
+    follower = threading.Thread(target=_follow, daemon=True)
+    follower.start()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=n, mp_context=ctx, initializer=_init_worker, initargs=(updates,)
+        ) as pool:
+            final = list(pool.map(_run_shard, jobs))
+    finally:
+        updates.put(None)
+        follower.join()
+    telemetry.replace(final)
+
+    from .evaluation import MetricsAccumulator
+
+    acc = MetricsAccumulator()
+    slices: dict[str, dict[str, MetricsAccumulator]] = {c: {} for c in args.slice_by}
+    has_gold = _merge_shards(shard_paths, out_path, args.chunksize, acc, slices)
+    for path in shard_paths:
+        Path(path).unlink(missing_ok=True)
+    print(f"✅ Judged table saved to {out_path}")
+    performance = _finish_telemetry()
+    if has_gold:
+        _report_metrics(acc, slices, args, Path(args.input_path).stem, performance)
+
+
+# -----------------------------------------------------------------------------
+# Commands
+# -----------------------------------------------------------------------------
+
+def _run(argv: list[str]) -> None:
+    args = _run_parser().parse_args(argv)
+    if args.batch_mode and (args.shard or args.workers > 1):
+        raise SystemExit("--batch-mode cannot be combined with --shard or --workers")
+    if args.cascade_model and (args.batch_mode or args.rows_per_request > 1):
+        raise SystemExit("--cascade-model cannot be combined with --batch-mode "
+                         "or --rows-per-request")
+
+    from tqdm import tqdm
+
+    from .evaluation import MetricsAccumulator
+    from .io import TableWriter, iter_table
 
     random.seed(args.seed)
     try:
@@ -125,41 +962,330 @@ def main() -> None:
     except Exception:
         pass
 
-    # 1. Load and normalize column names
-    df = load_table(args.input_path)
-    df = _normalize_column_names(df)
-    gold = df["Label"].tolist() if "Label" in df.columns else None
+    if args.safety_rules:
+        use_rules(args.safety_rules, check_interval=config.SAFETY_RELOAD_INTERVAL)
 
-    judge = Judge(model=args.model, temperature=args.temperature)
+    # Fresh telemetry for this run, exported to the requested sinks
+    telemetry.reset()
+    if args.metrics_jsonl:
+        telemetry.add_sink(JsonlSink(args.metrics_jsonl))
+    if args.metrics_port:
+        sink = PrometheusSink(telemetry, args.metrics_port)
+        telemetry.add_sink(sink)
+        print(f"📡 Serving metrics at http://127.0.0.1:{sink.port}/metrics")
 
-    preds: list[str] = []
-    cots: list[str] = []
-    for _, row in tqdm(df.iterrows(), total=len(df), desc="Judging"):
-        # Convert pandas Series to dict for Judge compatibility
-        row_dict = {str(k): str(v) for k, v in row.items()}
-        res = judge.evaluate_row(row_dict)
-        preds.append(res["label"])
-        cots.append(res["chain_of_thought"])
+    # Output path determination (same format as the input by default)
+    in_path = Path(args.input_path)
+    tag = ".judged"
+    if args.shard is not None:
+        tag += ".shard-{}-of-{}".format(*args.shard)
+    out_path = args.output_path or str(in_path.with_suffix(tag + in_path.suffix))
 
-    df["Predicted_Label"] = preds
-    df["Predicted_CoT"] = cots
+    if args.workers > 1 and args.shard is None:
+        _run_workers(args, argv, out_path)
+        return
 
-    # Output path determination
-    out_path = (
-        args.output_path
-        or str(Path(args.input_path).with_suffix(".judged.csv"))
+    cache, limiter, judge = _build_judge(args)
+
+    # Offline batch mode: every LLM call goes through one provider batch job
+    completions = _run_batch_job(args, judge, out_path) if args.batch_mode else None
+
+    # 1. Resume from (or reset) the checkpoint sidecar
+    ckpt = Checkpoint(
+        checkpoint_path(out_path),
+        flush_every=args.checkpoint_every,
+        config=judge.fingerprint(),
     )
-    save_table(df, out_path)
-    print(f"✅ Judged CSV saved to {out_path}")
+    try:
+        done = ckpt.load() if args.resume else {}
+    except ValueError as e:
+        raise SystemExit(f"Cannot resume: {e}. Rerun without --resume to start over.") from None
+    if not args.resume:
+        ckpt.remove()
+    elif done:
+        print(f"↩️  Resuming: {len(done)} rows available from checkpoint")
 
-    # 4. Metrics + markdown report
-    if gold is not None:
-        metrics = precision_recall_f1(gold, preds, average="macro")
-        print(metrics_report(metrics, title="Macro metrics"))
-        counts = Counter(preds)
-        report_path = REPORTS_DIR / (Path(args.input_path).stem + "_report.md")
-        _write_report(report_path, metrics, counts, gold, preds)
-        print(f"📄 Markdown report saved to {report_path}")
+    # 2. Stream the input in chunks: judge each one and append it to the output
+    acc = MetricsAccumulator()
+    slices: dict[str, dict[str, MetricsAccumulator]] = {c: {} for c in args.slice_by}
+    has_gold = False
+    seen: Counter[str] = Counter()
+    dedup = Deduplicator(config.DEDUP_MAX_ENTRIES) if args.dedup else None
+    gated = 0
+    desc, position = "Judging", 0
+    if args.shard is not None:
+        desc, position = "Judging [shard {}/{}]".format(*args.shard), args.shard[0]
+    try:
+        with TableWriter(out_path) as writer, tqdm(
+            desc=desc, unit="row", position=position
+        ) as bar:
+            for chunk in iter_table(
+                args.input_path, chunksize=args.chunksize, columns=args.columns
+            ):
+                if args.shard is not None:
+                    index, count = args.shard
+                    chunk = chunk[chunk.index % count == index]
+                    if not len(chunk):
+                        continue
+                    chunk.insert(0, ROW_COLUMN, chunk.index)
+                chunk = _normalize_column_names(chunk)
+                has_gold = has_gold or "Label" in chunk.columns
+                if completions is not None:
+                    telemetry.count("rows", len(chunk))
+                    results = merge_results(judge, _chunk_rows(chunk), completions)
+                    _set_predictions(chunk, results)
+                    if "Label" in chunk.columns:
+                        acc.update(chunk["Label"], chunk["Predicted_Label"])
+                        _show_running_metrics(bar, acc)
+                    bar.update(len(chunk))
+                else:
+                    gated += _judge_chunk(
+                        chunk, judge, args, ckpt, done, seen, bar, acc, dedup
+                    )
+                _update_slices(chunk, slices)
+                writer.write(chunk)
+                telemetry.flush()
+    finally:
+        ckpt.flush()
+
+    ckpt.remove()
+    if args.batch_mode:
+        remove_job_files(*_batch_files(out_path))
+    print(f"✅ Judged table saved to {out_path}")
+    if gated:
+        print(f"🛡️  Safety gate: {gated} rows labelled Dangerous without an LLM call")
+    if dedup is not None and dedup.rows:
+        print(
+            f"🔁 Dedup: {dedup.dispatched} unique prompts for {dedup.rows} rows "
+            f"({dedup.ratio:.1%} of rows reused an earlier result)"
+        )
+    if cache is not None:
+        stats = cache.stats()
+        print(
+            f"🗄️  Cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.1%} hit rate)"
+        )
+        cache.close()
+    if limiter is not None and limiter.throttled:
+        print(
+            f"⏳ Throttled {limiter.throttled} times; "
+            f"settled at {limiter.scale:.0%} of the configured rate"
+        )
+    performance = _finish_telemetry()
+
+    # 3. Metrics + markdown report (a shard only reports once merged)
+    if has_gold and args.shard is None:
+        _report_metrics(acc, slices, args, in_path.stem, performance)
+
+
+def _report_stem(path: str) -> str:
+    """Report name for a judged table: ``data.judged.csv`` -> ``data``."""
+    stem = Path(path).stem
+    return stem[: -len(".judged")] if stem.endswith(".judged") else stem
+
+
+def _merge(argv: list[str]) -> None:
+    """``merge``: reassemble ``--shard`` outputs into one table plus metrics."""
+    parser = argparse.ArgumentParser(
+        prog="llm-judge merge",
+        description="Merge per-shard judged tables back into input order",
+    )
+    parser.add_argument("shards", nargs="+", help="Shard output tables (any order)")
+    parser.add_argument(
+        "--out", dest="output_path", required=True, help="Merged output table"
+    )
+    _add_metric_args(parser)
+    args = parser.parse_args(argv)
+
+    from .evaluation import MetricsAccumulator
+
+    acc = MetricsAccumulator()
+    slices: dict[str, dict[str, MetricsAccumulator]] = {c: {} for c in args.slice_by}
+    if _merge_shards(args.shards, args.output_path, args.chunksize, acc, slices):
+        _report_metrics(acc, slices, args, _report_stem(args.output_path))
+
+
+def _score(argv: list[str]) -> None:
+    """``score``: recompute metrics and the report from judged tables.
+
+    Only ``Label`` / ``Predicted_Label`` (plus any ``--slice-by`` columns)
+    are read and no Judge or LLM client is created.
+    """
+    parser = argparse.ArgumentParser(
+        prog="llm-judge score",
+        description="Score existing judged tables without calling the LLM",
+    )
+    parser.add_argument("tables", nargs="+", help="Judged tables to score together")
+    parser.add_argument(
+        "--name",
+        dest="name",
+        default=None,
+        help="Report name (default: first table's stem without .judged)",
+    )
+    _add_metric_args(parser)
+    # Only a few narrow columns are held per chunk, so read far more rows
+    parser.set_defaults(chunksize=max(config.CHUNK_SIZE, 100_000))
+    args = parser.parse_args(argv)
+
+    from .evaluation import MetricsAccumulator
+    from .io import iter_table
+
+    columns = ["Label", "label", "Predicted_Label", *args.slice_by]
+    acc = MetricsAccumulator()
+    slices: dict[str, dict[str, MetricsAccumulator]] = {c: {} for c in args.slice_by}
+    for path in args.tables:
+        for chunk in iter_table(path, chunksize=args.chunksize, columns=columns):
+            chunk = _normalize_column_names(chunk)
+            missing = {"Label", "Predicted_Label"} - set(chunk.columns)
+            if missing:
+                raise SystemExit(f"{path} has no {' / '.join(sorted(missing))} column")
+            acc.update(chunk["Label"], chunk["Predicted_Label"])
+            _update_slices(chunk, slices)
+    print(f"📊 Scored {len(acc)} rows from {len(args.tables)} table(s)")
+
+    _report_metrics(acc, slices, args, args.name or _report_stem(args.tables[0]))
+
+
+def _int_list(value: str) -> list[int]:
+    try:
+        return [int(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers, got {value!r}") from None
+
+
+def _bench(argv: list[str]) -> None:
+    """``bench``: measure the judge pipeline against a local mock server."""
+    parser = argparse.ArgumentParser(
+        prog="llm-judge bench",
+        description="Benchmark throughput, latency and memory against a local "
+        "stand-in chat-completions server",
+    )
+    parser.add_argument(
+        "--sizes", type=_int_list, default=[100, 1000], help="Dataset sizes (rows)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        dest="concurrency",
+        type=_int_list,
+        default=[1, 8, 32],
+        help="Concurrency levels to run every size at",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Mock server latency (seconds)"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Uniform ± latency jitter (seconds)"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of requests failing with 500"
+    )
+    parser.add_argument(
+        "--rate-limit-rate",
+        type=float,
+        default=0.0,
+        help="Share of requests rejected with 429",
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=float,
+        default=0.1,
+        help="Retry-After seconds sent with 429 responses",
+    )
+    parser.add_argument(
+        "--token-latency",
+        type=float,
+        default=0.0,
+        help="Mock server generation time per ~4-character token (seconds)",
+    )
+    parser.add_argument(
+        "--max-retries", type=int, default=config.MAX_RETRIES, help="Client retries"
+    )
+    parser.add_argument(
+        "--stream", action="store_true", help="Judge with streamed completions"
+    )
+    parser.add_argument(
+        "--early-stop",
+        action="store_true",
+        help="Stop each completion once the label is complete (implies --stream)",
+    )
+    parser.add_argument(
+        "--max-output-tokens",
+        type=int,
+        default=0,
+        help="Cap on generated tokens per row (0 = no cap)",
+    )
+    parser.add_argument(
+        "--no-memory",
+        dest="trace_memory",
+        action="store_false",
+        help="Skip the tracemalloc pass that measures peak memory",
+    )
+    parser.add_argument("--seed", type=int, default=config.SEED, help="Random seed")
+    parser.add_argument(
+        "--out", dest="output_path", default=None, help="Write the JSON results here"
+    )
+    args = parser.parse_args(argv)
+
+    from .bench import MockChatServer, run_benchmark
+
+    def _progress(result: dict) -> None:
+        lat = result["latency_ms"]
+        print(
+            f"rows={result['rows']:<6} concurrency={result['concurrency']:<4} "
+            f"{result['rows_per_sec']:>9.1f} rows/s  p50={lat['p50']:.1f}ms "
+            f"p95={lat['p95']:.1f}ms p99={lat['p99']:.1f}ms  "
+            f"peak={result['peak_memory_mb']} MiB  failed={result['failed_rows']}",
+            file=sys.stderr,
+        )
+
+    try:
+        server = MockChatServer(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            rate_limit_rate=args.rate_limit_rate,
+            retry_after=args.retry_after,
+            seed=args.seed,
+            token_latency=args.token_latency,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    with server:
+        report = run_benchmark(
+            args.sizes,
+            args.concurrency,
+            server=server,
+            retry_policy=RetryPolicy(max_retries=args.max_retries),
+            seed=args.seed,
+            trace_memory=args.trace_memory,
+            progress=_progress,
+            judge_options={
+                "stream": args.stream,
+                "early_stop": args.early_stop,
+                "max_output_tokens": args.max_output_tokens or None,
+            },
+        )
+
+    text = json.dumps(report, indent=2)
+    if args.output_path:
+        Path(args.output_path).write_text(text + "\n", encoding="utf-8")
+        print(f"📈 Benchmark results saved to {args.output_path}", file=sys.stderr)
+    else:
+        print(text)
+
+
+COMMANDS = {"merge": _merge, "score": _score, "bench": _bench}
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Dispatch ``llm-judge [run] --in ...`` or ``llm-judge <command> ...``."""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] in COMMANDS:
+        COMMANDS[argv[0]](argv[1:])
+        return
+    if argv and argv[0] == "run":
+        argv = argv[1:]
+    _run(argv)
 
 
 if __name__ == "__main__":
@@ -18,14 +18,63 @@ class Config:
     # API Configuration
     MISTRAL_API_KEY: Optional[str] = os.getenv("MISTRAL_API_KEY")
     DEFAULT_MODEL: str = os.getenv("DEFAULT_MODEL", "mistral-large-latest")
+    # Alternative API endpoint, e.g. a proxy or a local stand-in server
+    MISTRAL_BASE_URL: Optional[str] = os.getenv("MISTRAL_BASE_URL") or None
+
+    # Shared HTTP connection pool (one per API key and base URL per process)
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE: int = int(os.getenv("HTTP_MAX_KEEPALIVE", "100"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "120"))
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+    # Used when the optional h2 package is installed
+    HTTP2: bool = os.getenv("HTTP2", "true").lower() == "true"
     TEMPERATURE: float = float(os.getenv("TEMPERATURE", "0.0"))
     SEED: int = int(os.getenv("SEED", "0"))
+    CONCURRENCY: int = int(os.getenv("CONCURRENCY", "1"))
+    ROWS_PER_REQUEST: int = int(os.getenv("ROWS_PER_REQUEST", "1"))
+    CHECKPOINT_EVERY: int = int(os.getenv("CHECKPOINT_EVERY", "100"))
+    CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "1000"))
+    BATCH_POLL_INTERVAL: float = float(os.getenv("BATCH_POLL_INTERVAL", "30"))
+    # Prompt budget: estimated tokens per row (0 = no limit) and history
+    MAX_PROMPT_TOKENS: int = int(os.getenv("MAX_PROMPT_TOKENS", "0"))
+    INCLUDE_HISTORY: bool = os.getenv("INCLUDE_HISTORY", "false").lower() == "true"
+    HISTORY_MAX_TOKENS: int = int(os.getenv("HISTORY_MAX_TOKENS", "256"))
+    # Cascade: fast first-tier model (unset = off) and its escalation threshold
+    CASCADE_MODEL: Optional[str] = os.getenv("CASCADE_MODEL") or None
+    CASCADE_THRESHOLD: float = float(os.getenv("CASCADE_THRESHOLD", "0.8"))
+    # Completions: streaming, label-first early stop, output cap (0 = none), JSON format
+    STREAM: bool = os.getenv("STREAM", "false").lower() == "true"
+    EARLY_STOP: bool = os.getenv("EARLY_STOP", "false").lower() == "true"
+    MAX_OUTPUT_TOKENS: int = int(os.getenv("MAX_OUTPUT_TOKENS", "300"))
+    JSON_MODE: bool = os.getenv("JSON_MODE", "true").lower() == "true"
     
     # Output Configuration
     REPORTS_DIR: Path = Path(os.getenv("REPORTS_DIR", "reports"))
+    BOOTSTRAP_RESAMPLES: int = int(os.getenv("BOOTSTRAP_RESAMPLES", "0"))
+    # Telemetry sinks: JSONL snapshot file and Prometheus port (0 = off)
+    TELEMETRY_JSONL: Optional[str] = os.getenv("TELEMETRY_JSONL") or None
+    TELEMETRY_PORT: int = int(os.getenv("TELEMETRY_PORT", "0"))
+    
+    # Rate limiting / retries (0 = unlimited)
+    RATE_LIMIT_RPM: float = float(os.getenv("RATE_LIMIT_RPM", "0"))
+    RATE_LIMIT_TPM: float = float(os.getenv("RATE_LIMIT_TPM", "0"))
+    MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", "5"))
+    
+    # Cache Configuration
+    ENABLE_CACHE: bool = os.getenv("ENABLE_CACHE", "false").lower() == "true"
+    CACHE_DIR: Path = Path(os.getenv("CACHE_DIR", ".cache"))
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "1000000"))
+    CACHE_MAX_AGE_DAYS: float = float(os.getenv("CACHE_MAX_AGE_DAYS", "30"))
+    # In-run dedup of identical prompts (results kept for up to N prompts)
+    ENABLE_DEDUP: bool = os.getenv("ENABLE_DEDUP", "true").lower() == "true"
+    DEDUP_MAX_ENTRIES: int = int(os.getenv("DEDUP_MAX_ENTRIES", "100000"))
     
     # Safety Configuration
     ENABLE_SAFETY_GATE: bool = os.getenv("ENABLE_SAFETY_GATE", "true").lower() == "true"
+    # Optional YAML/JSON rule pack replacing the built-in patterns
+    SAFETY_RULES: Optional[str] = os.getenv("SAFETY_RULES") or None
+    SAFETY_RELOAD_INTERVAL: float = float(os.getenv("SAFETY_RELOAD_INTERVAL", "5"))
     
     @classmethod
     def validate(cls) -> None:
@@ -39,6 +88,9 @@ class Config:
         if cls.TEMPERATURE < 0.0 or cls.TEMPERATURE > 2.0:
             raise ValueError("TEMPERATURE must be between 0.0 and 2.0")
 
+        if cls.CONCURRENCY < 1:
+            raise ValueError("CONCURRENCY must be at least 1")
+
 
 # Global config instance
 config = Config()
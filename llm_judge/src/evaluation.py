@@ -3,113 +3,396 @@ from __future__ import annotations
 """Utility functions to compute classification metrics (precision, recall, F1,
 accuracy) for the LLM‑as‑a‑Judge pipeline.
 
-A minimal dependency‑free implementation so we avoid pulling in scikit‑learn.
+A minimal implementation on top of NumPy so we avoid pulling in scikit‑learn.
 We treat labels as **strings** and support arbitrary sets of classes.
+
+Everything is derived from one integer confusion matrix
+(:class:`ConfusionMatrix`), built with a single ``np.bincount`` over label
+codes; per‑class, macro, micro and weighted scores are then a few vector
+operations on its diagonal and margins, with no further pass over the data.
 """
 
-from collections import Counter
-from typing import Dict, List, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 MetricDict = Dict[str, float]
 
+AVERAGES = ("macro", "micro", "weighted", "none")
 
-def _confusion_counts(
-    y_true: Sequence[str], y_pred: Sequence[str]
-) -> Tuple[Counter, Counter, Counter]:
-    """Return per‑class counts of TP, FP, FN using Counters.
 
-    TP[class] = predicted == class and true == class
-    FP[class] = predicted == class and true != class
-    FN[class] = predicted != class and true == class
-    """
-    tp: Counter = Counter()
-    fp: Counter = Counter()
-    fn: Counter = Counter()
+def _safe_div(numer: np.ndarray, denom: np.ndarray) -> np.ndarray:
+    """Elementwise ``numer / denom`` with 0 wherever ``denom`` is 0."""
+    numer = np.asarray(numer, dtype=float)
+    denom = np.asarray(denom, dtype=float)
+    out = np.zeros(np.broadcast(numer, denom).shape)
+    np.divide(numer, denom, out=out, where=denom != 0)
+    return out
 
-    for t, p in zip(y_true, y_pred):
-        if t == p:
-            tp[t] += 1
-        else:
-            fp[p] += 1
-            fn[t] += 1
-    return tp, fp, fn
 
+def _encode(
+    y_true: Sequence[str],
+    y_pred: Sequence[str],
+    labels: Optional[Sequence[str]] = None,
+) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """Integer codes for gold / predicted labels plus the label list."""
+    if len(y_true) != len(y_pred):
+        raise ValueError("y_true and y_pred must have the same length")
 
-def _safe_div(numer: float, denom: float) -> float:
-    return numer / denom if denom else 0.0
+    import pandas as pd  # hash-based factorize; much faster than sorting strings
 
+    def _factorize(values: Sequence[str]) -> Tuple[np.ndarray, List[str]]:
+        # Series are factorized as-is: Arrow-backed strings never become objects
+        if not isinstance(values, pd.Series):
+            values = np.asarray(values, dtype=object)
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        return codes, [str(u) for u in uniques]
 
-def precision_recall_f1(
-    y_true: Sequence[str], y_pred: Sequence[str], average: str = "macro"
-) -> MetricDict:
-    """Compute precision, recall, F1 and accuracy.
+    true_codes, true_names = _factorize(y_true)
+    pred_codes, pred_names = _factorize(y_pred)
+    names = set(true_names) | set(pred_names)
 
-    Parameters
-    ----------
-    y_true / y_pred : list‑like
-        Gold / predicted labels.
-    average : "macro" | "micro" | "none"
-        * macro  – unweighted mean of per‑class metrics
-        * micro  – global TP / FP / FN across classes
-        * none   – return per‑class metrics instead of a single score
-    """
-    if len(y_true) != len(y_pred):
-        raise ValueError("y_true and y_pred must have the same length")
+    if labels is None:
+        labels = sorted(names)
+    else:
+        labels = list(labels)
+        missing = sorted(names - set(labels))
+        if missing:
+            raise ValueError(f"Labels {missing} are not in {labels}")
+    index = {label: i for i, label in enumerate(labels)}
+
+    def _recode(codes: np.ndarray, names: List[str]) -> np.ndarray:
+        return np.array([index[name] for name in names], dtype=np.int64)[codes]
 
-    tp, fp, fn = _confusion_counts(y_true, y_pred)
-    classes = sorted(set(list(tp.keys()) + list(fp.keys()) + list(fn.keys())))
+    return _recode(true_codes, true_names), _recode(pred_codes, pred_names), labels
 
-    per_class: Dict[str, MetricDict] = {}
-    for c in classes:
-        prec = _safe_div(tp[c], tp[c] + fp[c])
-        rec = _safe_div(tp[c], tp[c] + fn[c])
-        f1 = _safe_div(2 * prec * rec, prec + rec) if prec + rec else 0.0
-        per_class[c] = {"precision": prec, "recall": rec, "f1": f1}
 
-    accuracy = sum(tp.values()) / len(y_true) if y_true else 0.0
+def _scores(
+    matrices: np.ndarray, labels: Sequence[str], average: str
+) -> Dict[str, np.ndarray]:
+    """Metrics for a stack of confusion matrices (shape ``(..., k, k)``).
+
+    Every value has the leading shape of *matrices*, so a single matrix and
+    thousands of bootstrap resamples go through the same code.
+    """
+    m = np.asarray(matrices, dtype=float)
+    tp = np.diagonal(m, axis1=-2, axis2=-1)
+    predicted = m.sum(axis=-2)
+    support = m.sum(axis=-1)
+    accuracy = _safe_div(tp.sum(axis=-1), support.sum(axis=-1))
+
+    if average == "micro":
+        total_tp = tp.sum(axis=-1)
+        micro_p = _safe_div(total_tp, predicted.sum(axis=-1))
+        micro_r = _safe_div(total_tp, support.sum(axis=-1))
+        micro_f1 = _safe_div(2 * micro_p * micro_r, micro_p + micro_r)
+        return {"precision": micro_p, "recall": micro_r, "f1": micro_f1, "accuracy": accuracy}
+
+    precision = _safe_div(tp, predicted)
+    recall = _safe_div(tp, support)
+    f1 = _safe_div(2 * precision * recall, precision + recall)
+    per_class = {"precision": precision, "recall": recall, "f1": f1}
 
     if average == "none":
-        # attach accuracy separately
-        result: MetricDict = {
-            f"{cls}_{metric}": val
-            for cls, md in per_class.items()
-            for metric, val in md.items()
+        result = {
+            f"{label}_{metric}": values[..., i]
+            for i, label in enumerate(labels)
+            for metric, values in per_class.items()
         }
         result["accuracy"] = accuracy
         return result
 
     if average == "macro":
-        num_classes = len(classes)
-        macro_p = (
-            sum(d["precision"] for d in per_class.values()) / num_classes
-        )
-        macro_r = sum(d["recall"] for d in per_class.values()) / num_classes
-        macro_f1 = sum(d["f1"] for d in per_class.values()) / num_classes
-        return {
-            "precision": macro_p,
-            "recall": macro_r,
-            "f1": macro_f1,
-            "accuracy": accuracy
+        # Classes absent from a (resampled) matrix do not count towards the mean
+        present = (support + predicted) > 0
+        means = {
+            metric: _safe_div((values * present).sum(axis=-1), present.sum(axis=-1))
+            for metric, values in per_class.items()
         }
+        return {**means, "accuracy": accuracy}
 
-    if average == "micro":
-        total_tp = sum(tp.values())  # type: ignore
-        total_fp = sum(fp.values())  # type: ignore
-        total_fn = sum(fn.values())  # type: ignore
-        micro_p = _safe_div(total_tp, total_tp + total_fp)
-        micro_r = _safe_div(total_tp, total_tp + total_fn)
-        micro_f1 = (
-            _safe_div(2 * micro_p * micro_r, micro_p + micro_r)
-            if micro_p + micro_r else 0.0
-        )
-        return {
-            "precision": micro_p,
-            "recall": micro_r,
-            "f1": micro_f1,
-            "accuracy": accuracy
+    if average == "weighted":
+        means = {
+            metric: _safe_div((values * support).sum(axis=-1), support.sum(axis=-1))
+            for metric, values in per_class.items()
         }
+        return {**means, "accuracy": accuracy}
+
+    raise ValueError(f"average must be one of {AVERAGES}")
+
+
+class ConfusionMatrix:
+    """Integer confusion matrix over string labels.
+
+    ``matrix[i, j]`` counts rows whose gold label is ``labels[i]`` and whose
+    prediction is ``labels[j]``.  Labels are sorted unless given explicitly.
+    """
+
+    def __init__(self, labels: Sequence[str], matrix: np.ndarray) -> None:
+        matrix = np.asarray(matrix, dtype=np.int64)
+        if matrix.shape != (len(labels), len(labels)):
+            raise ValueError("matrix must be square with one row per label")
+        self.labels: List[str] = list(labels)
+        self.matrix = matrix
+
+    @classmethod
+    def from_labels(
+        cls,
+        y_true: Sequence[str],
+        y_pred: Sequence[str],
+        labels: Optional[Sequence[str]] = None,
+    ) -> "ConfusionMatrix":
+        """Build the matrix from gold / predicted label sequences.
+
+        With *labels* the class order (and any classes absent from the data)
+        is fixed; a value outside *labels* raises ``ValueError``.
+        """
+        true_codes, pred_codes, labels = _encode(y_true, y_pred, labels)
+        k = len(labels)
+        counts = np.bincount(true_codes * k + pred_codes, minlength=k * k)
+        return cls(labels, counts.reshape(k, k))
+
+    # ------------------------------------------------------------------
+    # Margins
+    # ------------------------------------------------------------------
+    @property
+    def total(self) -> int:
+        return int(self.matrix.sum())
+
+    @property
+    def tp(self) -> np.ndarray:
+        return np.diag(self.matrix)
+
+    @property
+    def fp(self) -> np.ndarray:
+        return self.matrix.sum(axis=0) - self.tp
+
+    @property
+    def fn(self) -> np.ndarray:
+        return self.matrix.sum(axis=1) - self.tp
+
+    @property
+    def support(self) -> np.ndarray:
+        """Number of gold rows per class."""
+        return self.matrix.sum(axis=1)
+
+    def predicted_counts(self) -> Dict[str, int]:
+        """Number of predictions per class."""
+        return dict(zip(self.labels, self.matrix.sum(axis=0).tolist()))
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+    def per_class(self) -> Dict[str, np.ndarray]:
+        """Precision, recall and F1 arrays aligned with :attr:`labels`."""
+        tp = self.tp
+        precision = _safe_div(tp, tp + self.fp)
+        recall = _safe_div(tp, tp + self.fn)
+        f1 = _safe_div(2 * precision * recall, precision + recall)
+        return {"precision": precision, "recall": recall, "f1": f1}
+
+    def accuracy(self) -> float:
+        return float(_safe_div(self.tp.sum(), self.total))
+
+    def metrics(self, average: str = "macro") -> MetricDict:
+        """Scores averaged as in :func:`precision_recall_f1`."""
+        return {k: float(v) for k, v in _scores(self.matrix, self.labels, average).items()}
+
+    def trimmed(self) -> "ConfusionMatrix":
+        """Drop classes that appear neither as gold nor as prediction."""
+        keep = (self.matrix.sum(axis=0) + self.matrix.sum(axis=1)) > 0
+        return ConfusionMatrix(
+            [label for label, k in zip(self.labels, keep) if k],
+            self.matrix[np.ix_(keep, keep)],
+        )
+
+
+class MetricsAccumulator:
+    """Running confusion matrix for live and distributed runs.
 
-    raise ValueError("average must be 'macro', 'micro', or 'none'")
+    Feed it rows with :meth:`add` or batches with :meth:`update`, combine
+    accumulators from other workers with :meth:`merge` (O(classes²), no
+    predictions are re-read) and call :meth:`snapshot` / :meth:`metrics` at
+    any time.  :meth:`to_dict` / :meth:`from_dict` give a JSON-friendly form
+    for shipping partial results between processes or hosts.
+    """
+
+    def __init__(self) -> None:
+        self._index: Dict[str, int] = {}
+        self._matrix = np.zeros((0, 0), dtype=np.int64)
+
+    def __len__(self) -> int:
+        """Number of rows seen so far."""
+        return int(self._matrix.sum())
+
+    def _code(self, label: str) -> int:
+        code = self._index.get(label)
+        if code is None:
+            code = self._index[label] = len(self._index)
+            k = len(self._index)
+            grown = np.zeros((k, k), dtype=np.int64)
+            grown[: k - 1, : k - 1] = self._matrix
+            self._matrix = grown
+        return code
+
+    def add(self, y_true: str, y_pred: str) -> None:
+        """Count a single row."""
+        i = self._code(str(y_true))
+        j = self._code(str(y_pred))
+        self._matrix[i, j] += 1
+
+    def update(self, y_true: Sequence[str], y_pred: Sequence[str]) -> None:
+        """Count a batch of rows with one ``np.bincount``."""
+        self.update_confusion(ConfusionMatrix.from_labels(y_true, y_pred))
+
+    def update_confusion(self, cm: ConfusionMatrix) -> None:
+        """Add the counts of an already built :class:`ConfusionMatrix`."""
+        self._add_matrix(cm.labels, cm.matrix)
+
+    def merge(self, other: "MetricsAccumulator") -> "MetricsAccumulator":
+        """Add *other*'s counts to this accumulator and return it."""
+        labels = list(other._index)
+        self._add_matrix(labels, other._matrix)
+        return self
+
+    def _add_matrix(self, labels: Sequence[str], matrix: np.ndarray) -> None:
+        codes = np.array([self._code(label) for label in labels], dtype=np.int64)
+        if len(codes):
+            self._matrix[np.ix_(codes, codes)] += matrix
+
+    def snapshot(self) -> ConfusionMatrix:
+        """Copy of the counts so far as a :class:`ConfusionMatrix` (sorted labels)."""
+        labels = sorted(self._index)
+        order = np.array([self._index[label] for label in labels], dtype=np.int64)
+        return ConfusionMatrix(labels, self._matrix[np.ix_(order, order)].copy())
+
+    def metrics(self, average: str = "macro") -> MetricDict:
+        return self.snapshot().metrics(average)
+
+    def to_dict(self) -> Dict[str, object]:
+        cm = self.snapshot()
+        return {"labels": cm.labels, "matrix": cm.matrix.tolist()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "MetricsAccumulator":
+        acc = cls()
+        acc._add_matrix(list(data["labels"]), np.asarray(data["matrix"], dtype=np.int64))  # type: ignore[arg-type]
+        return acc
+
+
+# --------------------------------------------------------------------------------------
+# Uncertainty and slices
+# --------------------------------------------------------------------------------------
+
+# Resamples per RNG stream; fixed so results do not depend on the worker count
+_BOOTSTRAP_BLOCK = 1000
+
+
+def _bootstrap_block(
+    matrix: np.ndarray,
+    labels: Sequence[str],
+    average: str,
+    n: int,
+    seed: np.random.SeedSequence,
+) -> Dict[str, np.ndarray]:
+    """Scores of *n* resampled confusion matrices.
+
+    Resampling N rows with replacement is a multinomial draw over the k²
+    cells with probabilities ``matrix / N``, so rows are never materialized.
+    """
+    total = int(matrix.sum())
+    k = len(labels)
+    draws = np.random.default_rng(seed).multinomial(
+        total, matrix.ravel() / total, size=n
+    )
+    return _scores(draws.reshape(n, k, k), labels, average)
+
+
+def bootstrap_metrics(
+    cm: ConfusionMatrix,
+    n_resamples: int = 1000,
+    average: str = "macro",
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+    workers: int = 1,
+) -> Dict[str, Tuple[float, float]]:
+    """Percentile bootstrap interval ``(low, high)`` for every metric.
+
+    Resamples are drawn in blocks with independent ``SeedSequence.spawn``
+    streams, so the same *seed* gives the same intervals for any *workers*;
+    ``workers > 1`` spreads the blocks over a process pool.
+    """
+    if average not in AVERAGES:
+        raise ValueError(f"average must be one of {AVERAGES}")
+    if not cm.total or n_resamples <= 0:
+        return {k: (v, v) for k, v in cm.metrics(average).items()}
+
+    sizes = [_BOOTSTRAP_BLOCK] * (n_resamples // _BOOTSTRAP_BLOCK)
+    if n_resamples % _BOOTSTRAP_BLOCK:
+        sizes.append(n_resamples % _BOOTSTRAP_BLOCK)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(cm.matrix, cm.labels, average, n, s) for n, s in zip(sizes, seeds)]
+
+    if workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(args))) as pool:
+            blocks = list(pool.map(_bootstrap_block, *zip(*args)))
+    else:
+        blocks = [_bootstrap_block(*a) for a in args]
+
+    alpha = (1.0 - confidence) / 2
+    intervals: Dict[str, Tuple[float, float]] = {}
+    for metric in blocks[0]:
+        samples = np.concatenate([b[metric] for b in blocks])
+        low, high = np.quantile(samples, [alpha, 1.0 - alpha])
+        intervals[metric] = (float(low), float(high))
+    return intervals
+
+
+def confusion_by_slice(
+    keys: Sequence[Any], y_true: Sequence[str], y_pred: Sequence[str]
+) -> Dict[str, ConfusionMatrix]:
+    """One confusion matrix per distinct value of *keys*, from one bincount.
+
+    Each slice only lists the classes that occur in it, so its metrics equal
+    :func:`precision_recall_f1` on that slice alone.
+    """
+    import pandas as pd
+
+    if len(keys) != len(y_true):
+        raise ValueError("keys and labels must have the same length")
+    true_codes, pred_codes, labels = _encode(y_true, y_pred)
+    slice_codes, values = pd.factorize(
+        np.asarray(keys, dtype=object), use_na_sentinel=False
+    )
+    k, s = len(labels), len(values)
+    counts = np.bincount(
+        (slice_codes * k + true_codes) * k + pred_codes, minlength=s * k * k
+    ).reshape(s, k, k)
+    return {
+        str(value): ConfusionMatrix(labels, counts[i]).trimmed()
+        for i, value in enumerate(values)
+    }
+
+
+def precision_recall_f1(
+    y_true: Sequence[str], y_pred: Sequence[str], average: str = "macro"
+) -> MetricDict:
+    """Compute precision, recall, F1 and accuracy.
+
+    Parameters
+    ----------
+    y_true / y_pred : list‑like
+        Gold / predicted labels.
+    average : "macro" | "micro" | "weighted" | "none"
+        * macro    – unweighted mean of per‑class metrics
+        * micro    – global TP / FP / FN across classes
+        * weighted – per‑class metrics weighted by gold support
+        * none     – return per‑class metrics instead of a single score
+    """
+    if average not in AVERAGES:
+        raise ValueError(f"average must be one of {AVERAGES}")
+    return ConfusionMatrix.from_labels(y_true, y_pred).metrics(average)
 
 
 # --------------------------------------------------------------------------------------
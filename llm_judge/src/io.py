@@ -1,20 +1,297 @@
 from __future__ import annotations
 
+"""Table I/O for the CLI.
+
+Formats are chosen by file extension: CSV, line-delimited JSON (``.jsonl`` /
+``.ndjson``), Parquet and Feather/Arrow IPC.  The columnar formats need the
+optional ``pyarrow`` package and support column projection, so only the
+columns the judge needs are decoded."""
+
 from pathlib import Path
+from typing import Any, Iterator, Optional, Sequence, TextIO
 
 import pandas as pd
 
+FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+}
+
+
+def table_format(path: str | Path) -> str:
+    """Return the format name for *path* based on its extension."""
+    suffix = Path(path).suffix.lower()
+    try:
+        return FORMATS[suffix]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported table format {suffix!r}; expected one of {sorted(FORMATS)}"
+        ) from None
+
+
+def _require_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Parquet/Feather support needs the optional pyarrow package: pip install pyarrow"
+        ) from e
+    return pyarrow
+
+
+def _project(df: pd.DataFrame, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    if columns is None:
+        return df
+    return df[[c for c in df.columns if c in set(columns)]]
+
+
+def _columnar_projection(
+    path: str | Path, fmt: str, columns: Optional[Sequence[str]]
+) -> Optional[list[str]]:
+    """Intersect *columns* with the Parquet/Feather schema, keeping file order."""
+    if columns is None:
+        return None
+    pa = _require_pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        names = pq.read_schema(str(path)).names
+    else:
+        names = pa.ipc.open_file(pa.memory_map(str(path))).schema.names
+    return [c for c in names if c in set(columns)]
+
 
 # -----------------------------------------------------------------------------
-# Simple CSV helpers
+# Whole-table helpers
 # -----------------------------------------------------------------------------
 
-def load_table(path: str | Path) -> pd.DataFrame:
-    """Read a CSV into a DataFrame, preserving column order."""
-    return pd.read_csv(path)
+def load_table(
+    path: str | Path, columns: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """Read a table into a DataFrame, preserving column order.
+
+    *columns* restricts which columns are read; names that do not exist in
+    the file are ignored so callers can list every alias they accept.
+    """
+    fmt = table_format(path)
+    if fmt == "csv":
+        if columns is None:
+            return pd.read_csv(path)
+        wanted = set(columns)
+        return pd.read_csv(path, usecols=lambda c: c in wanted)
+    if fmt == "jsonl":
+        return _project(pd.read_json(path, lines=True, convert_dates=False), columns)
+    cols = _columnar_projection(path, fmt, columns)
+    if fmt == "parquet":
+        return pd.read_parquet(path, columns=cols)
+    return pd.read_feather(path, columns=cols)
 
 
 def save_table(df: pd.DataFrame, path: str | Path) -> None:
-    path = Path(path)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(path, index=False)
+    """Write *df* to *path* in the format implied by its extension."""
+    with TableWriter(path) as writer:
+        writer.write(df)
+
+
+# -----------------------------------------------------------------------------
+# Streaming helpers
+# -----------------------------------------------------------------------------
+
+def iter_table(
+    path: str | Path,
+    chunksize: int = 1000,
+    columns: Optional[Sequence[str]] = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield the table at *path* in DataFrames of at most *chunksize* rows.
+
+    Only one chunk is held in memory at a time, so peak memory is bounded by
+    *chunksize* rather than the file size.  The row index keeps counting
+    across chunks.
+    """
+    fmt = table_format(path)
+    if fmt == "csv":
+        wanted = set(columns) if columns is not None else None
+        with pd.read_csv(
+            path,
+            chunksize=chunksize,
+            usecols=(lambda c: c in wanted) if wanted is not None else None,
+        ) as reader:
+            yield from reader
+        return
+
+    if fmt == "jsonl":
+        with pd.read_json(
+            path, lines=True, chunksize=chunksize, convert_dates=False
+        ) as reader:
+            for chunk in reader:
+                yield _project(chunk, columns)
+        return
+
+    pa = _require_pyarrow()
+    cols = _columnar_projection(path, fmt, columns)
+    offset = 0
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=cols)
+    else:
+        # Feather v2 is the Arrow IPC file format: read (and, for the default
+        # lz4 files, decompress) one record batch at a time, then re-chunk.
+        reader = pa.ipc.open_file(pa.memory_map(str(path)))
+        batches = _rechunk(
+            (reader.get_batch(i) for i in range(reader.num_record_batches)),
+            chunksize,
+            cols,
+        )
+
+    for batch in batches:
+        chunk = batch.to_pandas()
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+def _rechunk(
+    batches: Iterator[Any], chunksize: int, columns: Optional[list[str]]
+) -> Iterator[Any]:
+    """Regroup Arrow record batches into tables of *chunksize* rows.
+
+    Only the batches overlapping the current chunk are held; slicing them
+    does not copy.
+    """
+    pa = _require_pyarrow()
+    pending: list = []
+    rows = 0
+    for batch in batches:
+        if columns is not None:
+            batch = batch.select(columns)
+        if not batch.num_rows:
+            continue
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunksize:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunksize)
+            rest = table.slice(chunksize)
+            pending, rows = rest.to_batches(), rest.num_rows
+    if rows:
+        yield pa.Table.from_batches(pending)
+
+
+def _is_null(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _widen_schema(schema: Any, df: pd.DataFrame) -> Any:
+    """Type all-null columns of the first batch as strings.
+
+    pandas infers ``double`` (or ``null``) for a column with no values yet, and
+    the writer's schema is fixed by the first batch, so text arriving in a
+    later batch could not be cast to it.
+    """
+    pa = _require_pyarrow()
+    for i, field in enumerate(schema):
+        if field.name in df.columns and df[field.name].isna().all():
+            schema = schema.set(i, pa.field(field.name, pa.string()))
+    return schema
+
+
+def _as_text(df: pd.DataFrame, schema: Any) -> pd.DataFrame:
+    """Render non-null values of string-typed columns as ``str``."""
+    pa = _require_pyarrow()
+    text = [
+        f.name for f in schema if pa.types.is_string(f.type) and f.name in df.columns
+    ]
+    if not text:
+        return df
+    df = df.copy()
+    for name in text:
+        df[name] = df[name].astype(object).map(lambda v: None if _is_null(v) else str(v))
+    return df
+
+
+class TableWriter:
+    """Append DataFrames to a table file one batch at a time.
+
+    The file is truncated on open and the header (or schema) is written with
+    the first batch, so the result is identical to a single ``save_table``
+    call.  Parquet/Feather batches are cast to the first batch's schema;
+    columns that are entirely null in that batch (say, a sparse
+    ``conversation_history``) are typed as strings so later text fits.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.format = table_format(self.path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.rows_written = 0
+        self._header_written = False
+        self._fh: Optional[TextIO] = None
+        self._arrow_writer: Any = None
+        self._schema: Any = None
+        if self.format in ("csv", "jsonl"):
+            self._fh = self.path.open("w", encoding="utf-8", newline="")
+        else:
+            _require_pyarrow()
+        self._closed = False
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._closed:
+            raise ValueError("write to closed TableWriter")
+        if self.format == "csv":
+            df.to_csv(self._fh, index=False, header=not self._header_written)
+        elif self.format == "jsonl":
+            if len(df):
+                self._fh.write(  # type: ignore[union-attr]
+                    df.to_json(orient="records", lines=True, force_ascii=False)
+                )
+        else:
+            self._write_arrow(df)
+        if self._fh is not None:
+            self._fh.flush()
+        self._header_written = True
+        self.rows_written += len(df)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._fh is not None:
+            self._fh.close()
+        if self.format in ("parquet", "feather"):
+            if self._arrow_writer is None:
+                # Nothing written: still leave a valid (empty) file behind
+                self._write_arrow(pd.DataFrame())
+            self._arrow_writer.close()
+
+    def __enter__(self) -> "TableWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def _write_arrow(self, df: pd.DataFrame) -> None:
+        pa = _require_pyarrow()
+        if self._schema is None:
+            self._schema = _widen_schema(
+                pa.Table.from_pandas(df, preserve_index=False).schema, df
+            )
+        table = pa.Table.from_pandas(
+            _as_text(df, self._schema), schema=self._schema, preserve_index=False
+        )
+        if self._arrow_writer is None:
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+
+                self._arrow_writer = pq.ParquetWriter(str(self.path), self._schema)
+            else:
+                self._arrow_writer = pa.ipc.new_file(str(self.path), self._schema)
+        self._arrow_writer.write_table(table)
@@ -3,21 +3,46 @@ from __future__ import annotations
 """Tiny wrapper around the **Mistral AI** Python SDK so that the rest of the
 codebase is agnostic to the underlying provider.  We keep the exported class
 name `OpenAIClient` so the rest of the code (Judge, CLI, tests) remains
-unchanged.  Internally it calls Mistral's chat‑completions API."""
+unchanged.  Internally it calls Mistral's chat‑completions API.
 
+`AsyncOpenAIClient` is the asyncio counterpart: it awaits the SDK's async
+completion call so many requests can share one event loop and one connection
+pool instead of one OS thread each.
+
+Both can also stream a completion (``chat_stream``), yielding the text as it
+is generated; closing the stream early closes the connection, which stops
+generation.
+
+SDK instances come from a process-wide registry keyed on (API key, base
+URL), so every client and ``Judge`` in the process reuses the same pooled
+HTTP connections (see :func:`shared_sdk`)."""
+
+import asyncio
+import importlib.util
 import os
-from typing import Any
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
 
-try:
-    from mistralai import Mistral
-except ImportError as e:  # pragma: no cover
-    raise ImportError("mistralai package not installed — add it to requirements.txt") from e
+from .config import config
+from .ratelimit import RateLimiter, RetryPolicy, acall_with_retry, call_with_retry
+from .telemetry import telemetry
 
 
 # -----------------------------------------------------------------------------
-# Helper to fetch the API key
+# Helpers to load the SDK and fetch the API key
 # -----------------------------------------------------------------------------
 
+def _require_mistral() -> Any:
+    """Import the SDK on first use; it dominates the package's import time."""
+    try:
+        from mistralai import Mistral
+    except ImportError as e:  # pragma: no cover
+        raise ImportError(
+            "mistralai package not installed — pip install mistralai"
+        ) from e
+    return Mistral
+
+
 def _get_api_key() -> str:
     key = os.getenv("MISTRAL_API_KEY")
     if not key:
@@ -26,18 +51,152 @@ def _get_api_key() -> str:
 
 
 # -----------------------------------------------------------------------------
-# LLM wrapper (same public API as before)
+# Shared SDK clients and connection pools
 # -----------------------------------------------------------------------------
 
-class OpenAIClient:  # name kept for backward compatibility
-    """Very thin abstraction over the Mistral chat‑completions endpoint."""
+# (api_key, base_url, event loop or None) -> (Mistral SDK, its httpx client)
+_SDKS: Dict[Tuple[str, Optional[str], Any], Tuple[Any, Any]] = {}
+_SDKS_LOCK = threading.Lock()
+
+
+def _forget_inherited_clients() -> None:
+    # A forked child must not write to the parent's pooled sockets; drop the
+    # entries without closing them (the connections still belong to the parent).
+    global _SDKS_LOCK
+    _SDKS.clear()
+    _SDKS_LOCK = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_inherited_clients)
+
+
+def http_options() -> Dict[str, Any]:
+    """httpx pool settings from the ``HTTP_*`` configuration."""
+    import httpx
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(config.HTTP_TIMEOUT, connect=config.HTTP_CONNECT_TIMEOUT),
+        # HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 keep-alive
+        "http2": config.HTTP2 and importlib.util.find_spec("h2") is not None,
+    }
+
+
+def shared_sdk(
+    api_key: str, base_url: Optional[str] = None, asynchronous: bool = False
+) -> Any:
+    """Return the process-wide ``Mistral`` SDK client for *api_key* / *base_url*.
+
+    The sync pool is shared by every thread.  An httpx async pool cannot
+    outlive its event loop, so with *asynchronous* the SDK is keyed on the
+    running loop as well and entries of closed loops are dropped.
+    """
+    loop = asyncio.get_running_loop() if asynchronous else None
+    key = (api_key, base_url, loop)
+    with _SDKS_LOCK:
+        entry = _SDKS.get(key)
+        if entry is None:
+            import httpx
+
+            for stale in [k for k in _SDKS if k[2] is not None and k[2].is_closed()]:
+                del _SDKS[stale]
+            if asynchronous:
+                http = httpx.AsyncClient(**http_options())
+                kwargs = {"async_client": http}
+            else:
+                http = httpx.Client(**http_options())
+                kwargs = {"client": http}
+            sdk = _require_mistral()(api_key=api_key, server_url=base_url, **kwargs)
+            entry = _SDKS[key] = (sdk, http)
+        return entry[0]
+
+
+def close_shared_clients() -> None:
+    """Close the pooled sync connections and empty the registry."""
+    with _SDKS_LOCK:
+        entries = list(_SDKS.values())
+        _SDKS.clear()
+    for _, http in entries:
+        close = getattr(http, "close", None)
+        if close is not None:  # async pools die with their event loop
+            close()
+
+
+def _build_messages(system_prompt: str, user_prompt: str) -> list[dict[str, str]]:
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def _estimate_tokens(messages: list[dict[str, str]]) -> int:
+    """Rough pre-flight token count (≈4 chars per token) for rate limiting."""
+    return sum(len(m["content"]) for m in messages) // 4 + 1
+
+
+def _record_usage(usage: Any) -> None:
+    """Count the request and its reported token usage in :data:`telemetry`."""
+    telemetry.count("requests")
+    for field in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, field, None)
+        if isinstance(value, int):
+            telemetry.count(field, value)
+
+
+def _delta_text(chunk: Any) -> str:
+    """Text added by one streamed completion chunk."""
+    choices = getattr(chunk, "choices", None)
+    if not choices:
+        return ""
+    content = getattr(choices[0].delta, "content", None)
+    return content if isinstance(content, str) else ""
+
+
+class _BaseClient:
+    """Constructor and throttling state shared by the sync and async clients."""
 
     def __init__(
-        self, model: str = "mistral-small-latest", temperature: float = 0.0
+        self,
+        model: str = "mistral-small-latest",
+        temperature: float = 0.0,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        base_url: Optional[str] = None,
     ) -> None:
-        self._client = Mistral(api_key=_get_api_key())
+        # base_url points the SDK at another server, e.g. a local stand-in
+        self.base_url = base_url if base_url is not None else config.MISTRAL_BASE_URL
+        self._api_key = _get_api_key()
         self.model = model
         self.temperature = temperature
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+
+    def _finish(self, estimate: int, usage: Any) -> None:
+        """Book a finished request's token usage (None if unknown)."""
+        _record_usage(usage)
+        if self.rate_limiter is not None:
+            self.rate_limiter.record_usage(estimate, getattr(usage, "total_tokens", None))
+
+
+# -----------------------------------------------------------------------------
+# LLM wrapper (same public API as before)
+# -----------------------------------------------------------------------------
+
+class OpenAIClient(_BaseClient):  # name kept for backward compatibility
+    """Very thin abstraction over the Mistral chat‑completions endpoint.
+
+    Calls go through the optional shared :class:`RateLimiter` and are retried
+    on 429 / transient 5xx according to ``retry_policy``.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._client = shared_sdk(self._api_key, self.base_url)
 
     # ------------------------------------------------------------------
     # Public method
@@ -46,16 +205,125 @@ class OpenAIClient:  # name kept for backward compatibility
         self, *, system_prompt: str, user_prompt: str, **kwargs: Any
     ) -> str:
         """Return the assistant message text only (first choice)."""
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
+        messages = _build_messages(system_prompt, user_prompt)
+        estimate = _estimate_tokens(messages)
 
         # Type ignores for Mistral client - external library
-        response = self._client.chat.complete(  # type: ignore
-            model=self.model,
-            messages=messages,  # type: ignore
-            temperature=self.temperature,
-            **kwargs,
+        response = call_with_retry(
+            lambda: self._client.chat.complete(  # type: ignore
+                model=self.model,
+                messages=messages,  # type: ignore
+                temperature=self.temperature,
+                **kwargs,
+            ),
+            self.retry_policy,
+            self.rate_limiter,
+            tokens=estimate,
+        )
+        self._finish(estimate, getattr(response, "usage", None))
+        return response.choices[0].message.content.strip()  # type: ignore
+
+    def chat_stream(
+        self, *, system_prompt: str, user_prompt: str, **kwargs: Any
+    ) -> Iterator[str]:
+        """Yield the assistant message text piece by piece as it is generated.
+
+        Opening the stream is retried like :meth:`chat`.  Closing the
+        generator early closes the connection, so the server stops
+        generating; usage is then unknown.
+        """
+        messages = _build_messages(system_prompt, user_prompt)
+        estimate = _estimate_tokens(messages)
+
+        stream = call_with_retry(
+            lambda: self._client.chat.stream(  # type: ignore
+                model=self.model,
+                messages=messages,  # type: ignore
+                temperature=self.temperature,
+                **kwargs,
+            ),
+            self.retry_policy,
+            self.rate_limiter,
+            tokens=estimate,
+        )
+        usage = None
+        try:
+            with stream:
+                for event in stream:
+                    usage = getattr(event.data, "usage", None) or usage
+                    text = _delta_text(event.data)
+                    if text:
+                        yield text
+        finally:
+            self._finish(estimate, usage)
+
+
+# -----------------------------------------------------------------------------
+# Async LLM wrapper
+# -----------------------------------------------------------------------------
+
+class AsyncOpenAIClient(_BaseClient):
+    """Async twin of :class:`OpenAIClient` built on ``chat.complete_async``.
+
+    The SDK is looked up per call because its pool belongs to the running
+    event loop.
+    """
+
+    # ------------------------------------------------------------------
+    # Public method
+    # ------------------------------------------------------------------
+    async def chat(
+        self, *, system_prompt: str, user_prompt: str, **kwargs: Any
+    ) -> str:
+        """Return the assistant message text only (first choice)."""
+        messages = _build_messages(system_prompt, user_prompt)
+        estimate = _estimate_tokens(messages)
+
+        sdk = shared_sdk(self._api_key, self.base_url, asynchronous=True)
+        response = await acall_with_retry(
+            lambda: sdk.chat.complete_async(  # type: ignore
+                model=self.model,
+                messages=messages,  # type: ignore
+                temperature=self.temperature,
+                **kwargs,
+            ),
+            self.retry_policy,
+            self.rate_limiter,
+            tokens=estimate,
         )
+        self._finish(estimate, getattr(response, "usage", None))
         return response.choices[0].message.content.strip()  # type: ignore
+
+    async def chat_stream(
+        self, *, system_prompt: str, user_prompt: str, **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """Async variant of :meth:`OpenAIClient.chat_stream`.
+
+        Close it with ``aclose()`` (e.g. :func:`contextlib.aclosing`) when
+        stopping early.
+        """
+        messages = _build_messages(system_prompt, user_prompt)
+        estimate = _estimate_tokens(messages)
+
+        sdk = shared_sdk(self._api_key, self.base_url, asynchronous=True)
+        stream = await acall_with_retry(
+            lambda: sdk.chat.stream_async(  # type: ignore
+                model=self.model,
+                messages=messages,  # type: ignore
+                temperature=self.temperature,
+                **kwargs,
+            ),
+            self.retry_policy,
+            self.rate_limiter,
+            tokens=estimate,
+        )
+        usage = None
+        try:
+            async with stream:
+                async for event in stream:
+                    usage = getattr(event.data, "usage", None) or usage
+                    text = _delta_text(event.data)
+                    if text:
+                        yield text
+        finally:
+            self._finish(estimate, usage)
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+"""Client-side throttling and retry scheduling for LLM calls.
+
+`RateLimiter` paces requests with two token buckets (requests/min and
+tokens/min).  Callers *reserve* capacity and then sleep for the returned
+delay, so the same limiter works from threads (`acquire`) and asyncio tasks
+(`aacquire`).  When the provider still throttles us the limiter halves its
+effective rate and creeps back up on every success (AIMD), so a run settles
+just under the real quota instead of oscillating into 429s.
+
+`RetryPolicy` decides whether a failed call is worth repeating and how long
+to wait: jittered exponential backoff, never shorter than ``Retry-After``."""
+
+import asyncio
+import email.utils
+import random
+import sys
+import threading
+import time
+from typing import Awaitable, Callable, Mapping, Optional, TypeVar
+
+from .telemetry import telemetry
+
+_TRANSIENT_ERRORS: tuple = (ConnectionError, TimeoutError)
+
+
+def _transient_errors() -> tuple:
+    # httpx is only looked up, never imported: an httpx error implies that
+    # the SDK already loaded it, and importing it here would slow startup.
+    httpx = sys.modules.get("httpx")
+    if httpx is None:
+        return _TRANSIENT_ERRORS
+    return _TRANSIENT_ERRORS + (httpx.TransportError,)
+
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+
+# -----------------------------------------------------------------------------
+# Token buckets
+# -----------------------------------------------------------------------------
+
+class TokenBucket:
+    """Continuous-refill bucket that hands out *reservations*.
+
+    The level may go negative: a reservation that overdraws the bucket simply
+    has to wait until refill brings the level back to zero.  That keeps
+    requests larger than the burst size serviceable and makes callers queue in
+    arrival order.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 1.0) -> None:
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.per_minute = per_minute
+        self.burst_seconds = burst_seconds
+        self._level = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        """Refill rate in units per second."""
+        return self.per_minute / 60.0
+
+    @property
+    def capacity(self) -> float:
+        return max(1.0, self.rate * self.burst_seconds)
+
+    def reserve(self, amount: float, now: float, scale: float = 1.0) -> float:
+        """Take *amount* units and return how many seconds to wait for them."""
+        rate = self.rate * scale
+        self._level = min(
+            self.capacity, self._level + (now - self._updated) * rate
+        )
+        self._updated = now
+        self._level -= amount
+        return max(0.0, -self._level / rate)
+
+    def refund(self, amount: float) -> None:
+        """Give back (or, if negative, charge) units after the fact."""
+        self._level = min(self.capacity, self._level + amount)
+
+
+class RateLimiter:
+    """Requests/min + tokens/min limiter with adaptive (AIMD) back-off.
+
+    A single instance is meant to be shared by every thread and task that
+    talks to the same account.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        min_scale: float = 0.1,
+        recovery: float = 0.02,
+    ) -> None:
+        self._requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.min_scale = min_scale
+        self.recovery = recovery
+        self.scale = 1.0
+        self.throttled = 0
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserve one request worth *tokens* tokens; return the delay in seconds."""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._blocked_until - now)
+            if self._requests is not None:
+                delay = max(delay, self._requests.reserve(1, now, self.scale))
+            if self._tokens is not None and tokens:
+                delay = max(delay, self._tokens.reserve(tokens, now, self.scale))
+            return delay
+
+    def acquire(self, tokens: int = 0) -> None:
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        delay = self.reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def record_usage(self, estimated: int, actual: Optional[int]) -> None:
+        """Correct a reservation once the real token usage is known."""
+        if self._tokens is None or actual is None:
+            return
+        with self._lock:
+            self._tokens.refund(estimated - actual)
+
+    def on_success(self) -> None:
+        """Additive increase back towards the configured rate."""
+        if self.scale < 1.0:
+            with self._lock:
+                self.scale = min(1.0, self.scale + self.recovery)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """Multiplicative decrease, plus a global pause for ``Retry-After``."""
+        with self._lock:
+            self.throttled += 1
+            self.scale = max(self.min_scale, self.scale / 2)
+            if retry_after:
+                self._blocked_until = max(
+                    self._blocked_until, time.monotonic() + retry_after
+                )
+
+
+# -----------------------------------------------------------------------------
+# Retry policy
+# -----------------------------------------------------------------------------
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Return the ``Retry-After`` delay in seconds (delta or HTTP date)."""
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def status_of(exc: BaseException) -> Optional[int]:
+    """HTTP status carried by an SDK error, if any."""
+    status = getattr(exc, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+class RetryPolicy:
+    """Jittered exponential backoff for throttling and transient failures."""
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 60.0,
+    ) -> None:
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        status = status_of(exc)
+        if status is not None:
+            return status in RETRYABLE_STATUS
+        # No HTTP status: connection resets, timeouts and the like
+        return isinstance(exc, _transient_errors())
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter backoff for *attempt* (0-based), floored at ``Retry-After``."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+        backoff = random.uniform(0, ceiling)
+        if retry_after is not None:
+            return max(backoff, min(retry_after, self.max_delay))
+        return backoff
+
+
+# -----------------------------------------------------------------------------
+# Call wrappers
+# -----------------------------------------------------------------------------
+
+def _on_failure(
+    exc: BaseException,
+    attempt: int,
+    policy: RetryPolicy,
+    limiter: Optional[RateLimiter],
+) -> float:
+    """Re-raise if *exc* is final, otherwise return the delay before retrying."""
+    if attempt >= policy.max_retries or not policy.is_retryable(exc):
+        raise exc
+    retry_after = parse_retry_after(getattr(exc, "headers", None))
+    throttled = status_of(exc) == 429
+    telemetry.count("retries")
+    if throttled:
+        telemetry.count("throttled")
+    if limiter is not None and throttled:
+        limiter.on_throttle(retry_after)
+    return policy.delay(attempt, retry_after)
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    policy: RetryPolicy,
+    limiter: Optional[RateLimiter] = None,
+    tokens: int = 0,
+) -> T:
+    """Run *fn* under *limiter*, retrying per *policy*."""
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire(tokens)
+        try:
+            result = fn()
+        except Exception as exc:
+            delay = _on_failure(exc, attempt, policy, limiter)
+            time.sleep(delay)
+            attempt += 1
+            continue
+        if limiter is not None:
+            limiter.on_success()
+        return result
+
+
+async def acall_with_retry(
+    fn: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+    limiter: Optional[RateLimiter] = None,
+    tokens: int = 0,
+) -> T:
+    """Async counterpart of :func:`call_with_retry`."""
+    attempt = 0
+    while True:
+        if limiter is not None:
+            await limiter.aacquire(tokens)
+        try:
+            result = await fn()
+        except Exception as exc:
+            delay = _on_failure(exc, attempt, policy, limiter)
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        if limiter is not None:
+            limiter.on_success()
+        return result
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+"""Row dispatch engine used by the CLI.
+
+Keeps up to *concurrency* judge calls in flight on a thread pool while
+returning results in the original row order.  A call either judges one row
+(``Judge.evaluate_row``) or, with ``batch_size > 1``, several rows packed
+into one request (``Judge.evaluate_batch``).
+
+Given a *key* function (``Judge.request_key``) rows that render to the same
+prompt are dispatched once and the result is fanned out to every copy; a
+:class:`Deduplicator` carries those results across calls for a whole run."""
+
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+Row = Dict[str, str]
+Result = Dict[str, str]
+
+
+class Deduplicator:
+    """Run-wide memo of results by request key.
+
+    Holds at most *max_entries* results (least recently used are dropped)
+    and counts how many rows were resolved without a request of their own.
+    """
+
+    def __init__(self, max_entries: int = 100_000) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.max_entries = max_entries
+        self._results: "OrderedDict[str, Result]" = OrderedDict()
+        self.rows = 0
+        self.dispatched = 0
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, key: str) -> Optional[Result]:
+        res = self._results.get(key)
+        if res is not None:
+            self._results.move_to_end(key)
+        return res
+
+    def put(self, key: str, result: Result) -> None:
+        self._results[key] = result
+        self._results.move_to_end(key)
+        if len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    @property
+    def reused(self) -> int:
+        """Rows answered by another row's request."""
+        return self.rows - self.dispatched
+
+    @property
+    def ratio(self) -> float:
+        """Share of rows that needed no request of their own."""
+        return self.reused / self.rows if self.rows else 0.0
+
+
+def judge_rows(
+    evaluate: Callable[[Row], Result],
+    rows: Sequence[Row],
+    *,
+    concurrency: int = 1,
+    progress: Optional[Any] = None,
+    on_result: Optional[Callable[[int, Result], None]] = None,
+    evaluate_batch: Optional[Callable[[Sequence[Row]], List[Result]]] = None,
+    batch_size: int = 1,
+    key: Optional[Callable[[Row], str]] = None,
+    dedup: Optional[Deduplicator] = None,
+) -> List[Result]:
+    """Evaluate *rows* with at most *concurrency* calls in flight.
+
+    ``progress`` is anything with an ``update(n)`` method (e.g. a tqdm bar);
+    it is advanced as completions arrive, not in input order.  ``on_result``
+    is called from the calling thread with ``(index, result)`` for each
+    completion, which is where checkpoints are written.  With
+    ``batch_size > 1`` consecutive rows are grouped and sent through
+    *evaluate_batch*.
+
+    With *key* only the first row of each key (not already in *dedup*) is
+    dispatched; its result is reported for every row sharing the key.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be >= 1")
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    if batch_size > 1 and evaluate_batch is None:
+        raise ValueError("batch_size > 1 requires evaluate_batch")
+    if key is not None:
+        return _judge_unique(
+            evaluate, rows, key, dedup if dedup is not None else Deduplicator(),
+            concurrency=concurrency, progress=progress, on_result=on_result,
+            evaluate_batch=evaluate_batch, batch_size=batch_size,
+        )
+
+    results: List[Optional[Result]] = [None] * len(rows)
+    units = [
+        list(range(start, min(start + batch_size, len(rows))))
+        for start in range(0, len(rows), batch_size)
+    ]
+
+    def _call(unit: List[int]) -> List[Result]:
+        if batch_size == 1:
+            return [evaluate(rows[unit[0]])]
+        return evaluate_batch([rows[i] for i in unit])  # type: ignore[misc]
+
+    def _collect(unit: List[int], unit_results: List[Result]) -> None:
+        for i, res in zip(unit, unit_results):
+            results[i] = res
+            if on_result is not None:
+                on_result(i, res)
+        if progress is not None:
+            progress.update(len(unit))
+
+    if concurrency == 1:
+        for unit in units:
+            _collect(unit, _call(unit))
+        return results  # type: ignore[return-value]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending: Dict[Future, List[int]] = {}
+        next_unit = 0
+        while next_unit < len(units) or pending:
+            # Top up the window so exactly *concurrency* calls are in flight
+            while next_unit < len(units) and len(pending) < concurrency:
+                unit = units[next_unit]
+                pending[pool.submit(_call, unit)] = unit
+                next_unit += 1
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                unit = pending.pop(fut)
+                _collect(unit, fut.result())
+
+    return results  # type: ignore[return-value]
+
+
+def _judge_unique(
+    evaluate: Callable[[Row], Result],
+    rows: Sequence[Row],
+    key: Callable[[Row], str],
+    dedup: Deduplicator,
+    *,
+    progress: Optional[Any] = None,
+    on_result: Optional[Callable[[int, Result], None]] = None,
+    **options: Any,
+) -> List[Result]:
+    """Dispatch one row per distinct key and fan results out to the copies."""
+    results: List[Optional[Result]] = [None] * len(rows)
+    groups: Dict[str, List[int]] = {}
+    dedup.rows += len(rows)
+
+    def _fan_out(indices: List[int], res: Result) -> None:
+        for i in indices:
+            results[i] = res
+            if on_result is not None:
+                on_result(i, res)
+
+    for i, row in enumerate(rows):
+        k = key(row)
+        if k in groups:
+            groups[k].append(i)
+            continue
+        res = dedup.get(k)
+        if res is not None:
+            _fan_out([i], res)
+            if progress is not None:
+                progress.update(1)
+            continue
+        groups[k] = [i]
+
+    unique = list(groups)
+    dedup.dispatched += len(unique)
+
+    def _record(j: int, res: Result) -> None:
+        dedup.put(unique[j], res)
+        indices = groups[unique[j]]
+        _fan_out(indices, res)
+        # The dispatch loop counts the row it sent; count its copies here
+        if progress is not None and len(indices) > 1:
+            progress.update(len(indices) - 1)
+
+    judge_rows(
+        evaluate,
+        [rows[groups[k][0]] for k in unique],
+        progress=progress,
+        on_result=_record,
+        **options,
+    )
+    return results  # type: ignore[return-value]
@@ -2,30 +2,566 @@ from __future__ import annotations
 
 """Deterministic safety checks for obviously dangerous advice.
 
-This is *extremely* lightweight—just a handful of regexes so we block the
-most blatant policy violations without paying for an LLM call."""
+Rows matching a known-dangerous pattern are labelled without paying for an
+LLM call.  The check must stay cheap next to the call it saves, even with
+large, hot-reloaded rule packs.
 
+Rules are matched by :class:`SafetyMatcher`, which scans each text once no
+matter how many rules there are: every rule contributes a literal *anchor*
+(a string any match must contain) to one trie-shaped prefilter regex, and
+only the rules whose anchors occur are then verified with their own regex.
+Typical answers contain no anchor at all and are cleared by the prefilter
+alone.
+
+Larger rule sets ship as YAML/JSON *rule packs* (see :func:`load_rule_pack`)
+and replace the built-in list via ``SAFETY_RULES`` or :func:`use_rules`.
+Only ``high`` severity rules label a row Dangerous outright; matches of
+lower-severity rules are flagged and the row still goes to the LLM."""
+
+import hashlib
+import json
+import os
 import re
-from typing import List
+import threading
+import time
+import warnings
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .config import config
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+try:  # Python 3.11+
+    from re import _parser as _sre_parse
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
 
 # VERY small illustrative list. Extend as needed.
-DANGEROUS_PATTERNS: List[str] = [
-    r"drink\s+bleach",
-    r"make\s+(?:a|an)\s+bomb",
-    r"(?i)jail\s*break",  # jailbreak attempts
-    r"how\s+to\s+(?:kill|murder|harm)\s+(?:someone|people|yourself)",
-    r"(?:suicide|self-harm)\s+(?:methods|ways|instructions)",
-    r"(?:illegal|illicit)\s+(?:drugs|substances)\s+(?:manufacturing|production)",
-    r"hack\s+(?:into|someone|password|account)",
-    r"(?:child|minor)\s+(?:abuse|exploitation|inappropriate)",
-    r"(?:terrorist|terrorism)\s+(?:attack|planning|instructions)",
-    r"(?:fraud|scam|steal)\s+(?:money|identity|credit)",
-]
+DANGEROUS_RULES: Dict[str, str] = {
+    "drink_bleach": r"drink\s+bleach",
+    "make_bomb": r"make\s+(?:a|an)\s+bomb",
+    "jailbreak": r"(?i)jail\s*break",  # jailbreak attempts
+    "violence_howto": r"how\s+to\s+(?:kill|murder|harm)\s+(?:someone|people|yourself)",
+    "self_harm_methods": r"(?:suicide|self-harm)\s+(?:methods|ways|instructions)",
+    "drug_manufacturing": r"(?:illegal|illicit)\s+(?:drugs|substances)\s+(?:manufacturing|production)",
+    "hacking": r"hack\s+(?:into|someone|password|account)",
+    "child_abuse": r"(?:child|minor)\s+(?:abuse|exploitation|inappropriate)",
+    "terrorism": r"(?:terrorist|terrorism)\s+(?:attack|planning|instructions)",
+    "fraud": r"(?:fraud|scam|steal)\s+(?:money|identity|credit)",
+}
+
+# Kept for callers that only need the raw patterns
+DANGEROUS_PATTERNS: List[str] = list(DANGEROUS_RULES.values())
+
+SEVERITIES = ("low", "medium", "high")
+# Rules of this severity short-circuit the LLM; the others only flag a row
+GATING_SEVERITY = "high"
+
+# Bump when the serialized matcher layout changes so stale caches are ignored
+_STATE_VERSION = 2
+
+# A rule is either a bare pattern or a dict with "pattern" and optional
+# "severity" (default "high")
+RuleSpec = Union[str, Mapping[str, Any]]
+
+
+# -----------------------------------------------------------------------------
+# Anchor extraction
+# -----------------------------------------------------------------------------
+
+# A factor is a set of literals at least one of which every match contains
+Factor = Optional[Set[str]]
+
+_LEADING_FLAGS = re.compile(r"^\(\?([aiLmsux]+)\)")
+
+
+def _scoped(pattern: str) -> str:
+    """Turn a leading global flag group ``(?i)…`` into a scoped ``(?i:…)``.
+
+    Global flags are only legal at the very start of a regex, so they must be
+    scoped before the pattern can be embedded anywhere else.
+    """
+    m = _LEADING_FLAGS.match(pattern)
+    if not m:
+        return pattern
+    return f"(?{m.group(1)}:{pattern[m.end():]})"
+
+
+def _better(a: Factor, b: Factor) -> Factor:
+    """Pick the more selective factor: longest shortest literal, then fewest."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    key_a = (min(map(len, a)), -len(a))
+    key_b = (min(map(len, b)), -len(b))
+    return a if key_a >= key_b else b
+
+
+def _best_factor(items: Iterable[Tuple[object, object]]) -> Factor:
+    best: Factor = None
+    run: List[str] = []
+
+    def close_run() -> None:
+        nonlocal best
+        if run:
+            best = _better(best, {"".join(run)})
+            run.clear()
+
+    for op, av in items:
+        if op is _sre_parse.LITERAL:
+            run.append(chr(av))  # type: ignore[arg-type]
+            continue
+        close_run()
+        if op is _sre_parse.SUBPATTERN:
+            best = _better(best, _best_factor(av[-1]))  # type: ignore[index]
+        elif op is _sre_parse.BRANCH:
+            union: Set[str] = set()
+            for branch in av[1]:  # type: ignore[index]
+                factor = _best_factor(branch)
+                if factor is None:
+                    union = set()
+                    break
+                union |= factor
+            if union:
+                best = _better(best, union)
+        elif op in (_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT):
+            low, _high, sub = av  # type: ignore[misc]
+            if low >= 1:
+                best = _better(best, _best_factor(sub))
+    close_run()
+    return best
+
+
+def extract_anchors(pattern: str) -> Factor:
+    """Return casefolded literals, one of which any match of *pattern* contains.
+
+    ``None`` means no such literal could be proven; the rule is then verified
+    on every text.
+    """
+    try:
+        factor = _best_factor(_sre_parse.parse(_scoped(pattern), re.IGNORECASE))
+    except Exception:
+        return None
+    if factor is None or not all(factor):
+        return None
+    return {lit.casefold() for lit in factor}
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """Alternation of *words* shaped as a trie so each position costs O(depth)."""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        alts = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        # Optional tail keeps matching greedy: longest anchor at each position
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+# -----------------------------------------------------------------------------
+# Matcher
+# -----------------------------------------------------------------------------
+
+def _normalize_rule(rule_id: str, spec: RuleSpec) -> Dict[str, str]:
+    if isinstance(spec, str):
+        spec = {"pattern": spec}
+    if not isinstance(spec.get("pattern"), str) or not spec["pattern"]:
+        raise ValueError(f"Safety rule {rule_id!r} has no pattern")
+    severity = str(spec.get("severity", "high")).lower()
+    if severity not in SEVERITIES:
+        raise ValueError(
+            f"Safety rule {rule_id!r}: severity must be one of {SEVERITIES}, got {severity!r}"
+        )
+    return {"pattern": spec["pattern"], "severity": severity}
+
+
+class SafetyMatcher:
+    """Single-pass multi-rule matcher.
+
+    ``rules`` maps a rule id to its regex, or to a dict with ``pattern`` and
+    an optional ``severity``.  Patterns are compiled case-insensitively; a
+    leading ``(?i)``-style flag group is allowed.
+    """
+
+    def __init__(self, rules: Mapping[str, RuleSpec]) -> None:
+        self.rules: Dict[str, Dict[str, str]] = {
+            rid: _normalize_rule(rid, spec) for rid, spec in rules.items()
+        }
+        self.rule_ids: List[str] = list(self.rules)
+        self._patterns = [_scoped(r["pattern"]) for r in self.rules.values()]
+        # Compile up front so a bad rule fails at load time, not mid-run
+        self._compiled: List[Optional[re.Pattern[str]]] = []
+        for rid, pattern in zip(self.rule_ids, self._patterns):
+            try:
+                self._compiled.append(re.compile(pattern, flags=re.IGNORECASE))
+            except re.error as e:
+                raise ValueError(f"Safety rule {rid!r} does not compile: {e}") from e
+
+        self._unanchored: List[int] = []
+        by_anchor: Dict[str, Set[int]] = {}
+        for idx, rule in enumerate(self.rules.values()):
+            anchors = extract_anchors(rule["pattern"])
+            if anchors is None:
+                self._unanchored.append(idx)
+                continue
+            for anchor in anchors:
+                by_anchor.setdefault(anchor, set()).add(idx)
+
+        # The prefilter reports the longest anchor starting at each position,
+        # so also credit every anchor contained in it.
+        self._rules_for: Dict[str, List[int]] = {}
+        for anchor in by_anchor:
+            hit: Set[int] = set()
+            for i in range(len(anchor)):
+                for j in range(i + 1, len(anchor) + 1):
+                    hit |= by_anchor.get(anchor[i:j], set())
+            self._rules_for[anchor] = sorted(hit)
+
+        self._anchor_regex = _trie_regex(by_anchor) if by_anchor else None
+        self._compile_prefilter()
+
+    def _compile_prefilter(self) -> None:
+        self._prefilter = (
+            re.compile(f"(?=({self._anchor_regex}))") if self._anchor_regex else None
+        )
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-serializable form holding everything derived from the rules."""
+        return {
+            "version": _STATE_VERSION,
+            "rules": self.rules,
+            "unanchored": self._unanchored,
+            "rules_for": self._rules_for,
+            "anchor_regex": self._anchor_regex,
+        }
+
+    @classmethod
+    def from_state(cls, state: Mapping[str, Any]) -> "SafetyMatcher":
+        """Rebuild a matcher from :meth:`to_state` without re-deriving anchors.
+
+        Only the prefilter is compiled here; each rule's regex is compiled
+        the first time a text reaches it.
+        """
+        if state.get("version") != _STATE_VERSION:
+            raise ValueError("Serialized safety matcher has an unsupported version")
+        self = cls.__new__(cls)
+        self.rules = {rid: dict(r) for rid, r in state["rules"].items()}
+        self.rule_ids = list(self.rules)
+        self._patterns = [_scoped(r["pattern"]) for r in self.rules.values()]
+        self._compiled = [None] * len(self._patterns)
+        self._unanchored = list(state["unanchored"])
+        self._rules_for = {k: list(v) for k, v in state["rules_for"].items()}
+        self._anchor_regex = state["anchor_regex"]
+        self._compile_prefilter()
+        return self
+
+    # ------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.rule_ids)
+
+    def _regex(self, idx: int) -> re.Pattern[str]:
+        compiled = self._compiled[idx]
+        if compiled is None:
+            compiled = self._compiled[idx] = re.compile(
+                self._patterns[idx], flags=re.IGNORECASE
+            )
+        return compiled
 
+    def _candidates(self, text: str) -> List[int]:
+        if self._prefilter is None:
+            return self._unanchored
+        found = set(self._prefilter.findall(text.casefold()))
+        if not found:
+            return self._unanchored
+        idxs = set(self._unanchored)
+        for anchor in found:
+            idxs.update(self._rules_for[anchor])
+        return sorted(idxs)
 
-_COMPILED = [re.compile(p, flags=re.IGNORECASE) for p in DANGEROUS_PATTERNS]
+    def match(self, text: str) -> Optional[str]:
+        """Return the id of the first rule (in rule order) matching *text*."""
+        for idx in self._candidates(text):
+            if self._regex(idx).search(text):
+                return self.rule_ids[idx]
+        return None
+
+    def matches(self, text: str) -> List[str]:
+        """Return the ids of every rule matching *text*."""
+        return [
+            self.rule_ids[idx]
+            for idx in self._candidates(text)
+            if self._regex(idx).search(text)
+        ]
+
+    def verdict(self, text: str) -> Optional[str]:
+        """Id of the rule to report for *text*: the first gating rule that
+        matches, else the first lower-severity one, else ``None``."""
+        ids = self.matches(text)
+        for rid in ids:
+            if self.gates(rid):
+                return rid
+        return ids[0] if ids else None
+
+    def gates(self, rule_id: str) -> bool:
+        """True if a match of *rule_id* labels the row Dangerous outright."""
+        return self.rules[rule_id]["severity"] == GATING_SEVERITY
+
+    def screen(self, texts: Iterable[Any]) -> Tuple["pd.Series", "pd.Series"]:
+        """Vectorized :meth:`verdict` over a whole column.
+
+        Returns a boolean mask of the gated elements and the reported rule
+        id (or ``None``) per element, both indexed like *texts*; an id whose
+        mask is False is a lower-severity flag.  Missing values never match.
+        The anchor prefilter runs once over the column; only the rows it
+        lets through are checked rule by rule.
+        """
+        import numpy as np
+        import pandas as pd
+
+        series = texts if isinstance(texts, pd.Series) else pd.Series(list(texts), dtype=object)
+        text = series.fillna("").astype(str)
+        values = text.to_numpy(dtype=object)
+        ids = np.full(len(values), None, dtype=object)
+
+        if self._unanchored:
+            candidates = np.ones(len(values), dtype=bool)
+        elif self._anchor_regex is None or not len(values):
+            candidates = np.zeros(len(values), dtype=bool)
+        else:
+            folded = text.str.casefold()
+            try:
+                # A plain alternation lets Arrow-backed strings use the
+                # native regex kernel instead of a Python loop.
+                found = folded.str.contains(self._anchor_regex, regex=True)
+            except (re.error, ValueError):
+                found = folded.str.contains(self._prefilter, regex=True)
+            candidates = found.to_numpy(dtype=bool)
+
+        gated = np.zeros(len(values), dtype=bool)
+        for pos in np.flatnonzero(candidates):
+            rid = ids[pos] = self.verdict(values[pos])
+            gated[pos] = rid is not None and self.gates(rid)
+
+        rule_ids = pd.Series(ids, index=series.index, dtype=object)
+        return pd.Series(gated, index=series.index), rule_ids
+
+
+# -----------------------------------------------------------------------------
+# Rule packs
+# -----------------------------------------------------------------------------
+
+def _require_yaml() -> Any:
+    try:
+        import yaml
+    except ImportError as e:
+        raise ImportError(
+            "YAML rule packs need the optional PyYAML package: pip install pyyaml"
+        ) from e
+    return yaml
+
+
+def parse_rule_pack(data: bytes, fmt: str = "json") -> Dict[str, Dict[str, str]]:
+    """Parse rule-pack bytes (``fmt`` is ``"json"`` or ``"yaml"``).
+
+    A pack is a mapping with a ``rules`` list (or just the list), each item
+    holding ``id``, ``pattern`` and an optional ``severity``::
+
+        rules:
+          - id: drink_bleach
+            pattern: 'drink\\s+bleach'
+            severity: high
+    """
+    text = data.decode("utf-8")
+    doc = _require_yaml().safe_load(text) if fmt == "yaml" else json.loads(text)
+    items = doc.get("rules") if isinstance(doc, dict) else doc
+    if not isinstance(items, list):
+        raise ValueError("Rule pack must be a list of rules or a mapping with a 'rules' list")
+
+    rules: Dict[str, Dict[str, str]] = {}
+    for n, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get("id"):
+            raise ValueError(f"Rule #{n} in pack has no id")
+        rid = str(item["id"])
+        if rid in rules:
+            raise ValueError(f"Duplicate safety rule id {rid!r}")
+        rules[rid] = _normalize_rule(rid, item)
+    return rules
+
+
+def load_rule_pack(
+    path: str | Path, cache_dir: Optional[str | Path] = None
+) -> SafetyMatcher:
+    """Build a matcher from a ``.json`` / ``.yaml`` / ``.yml`` rule pack.
+
+    With *cache_dir* the derived matcher state is stored under the SHA-256 of
+    the pack's bytes, so later processes loading the same pack skip anchor
+    extraction and only compile the prefilter.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix not in (".json", ".yaml", ".yml"):
+        raise ValueError(f"Unsupported rule pack format {suffix!r}; expected .json or .yaml")
+    data = path.read_bytes()
+
+    cached: Optional[Path] = None
+    if cache_dir is not None:
+        digest = hashlib.sha256(data).hexdigest()
+        cached = Path(cache_dir) / "safety" / f"{digest}.json"
+        try:
+            return SafetyMatcher.from_state(json.loads(cached.read_text(encoding="utf-8")))
+        except (OSError, ValueError, KeyError):
+            pass  # missing or unreadable: rebuild below
+
+    matcher = SafetyMatcher(parse_rule_pack(data, "json" if suffix == ".json" else "yaml"))
+    if cached is not None:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cached.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(matcher.to_state(), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, cached)
+    return matcher
+
+
+class RulePack:
+    """A rule pack on disk that reloads itself when the file changes.
+
+    The file's mtime and size are checked at most every *check_interval*
+    seconds; on change the new pack is loaded and swapped in atomically, so
+    long-running processes pick up new rules without a restart.  A pack
+    that fails to load keeps the previous matcher in service.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        cache_dir: Optional[str | Path] = None,
+        check_interval: float = 5.0,
+    ) -> None:
+        self.path = Path(path)
+        self.cache_dir = cache_dir
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._signature = self._stat()
+        self._matcher = load_rule_pack(self.path, cache_dir)
+        self._checked = time.monotonic()
+
+    def _stat(self) -> Tuple[int, int]:
+        st = self.path.stat()
+        return st.st_mtime_ns, st.st_size
+
+    @property
+    def matcher(self) -> SafetyMatcher:
+        if time.monotonic() - self._checked >= self.check_interval:
+            self.reload()
+        return self._matcher
+
+    def reload(self, force: bool = False) -> bool:
+        """Reload the pack if it changed (or if *force*); return True if swapped."""
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                signature = self._stat()
+                if signature == self._signature and not force:
+                    return False
+                matcher = load_rule_pack(self.path, self.cache_dir)
+            except (OSError, ValueError) as e:
+                warnings.warn(
+                    f"Keeping previous safety rules; reload of {self.path} failed: {e}",
+                    RuntimeWarning,
+                    stacklevel=2,
+                )
+                return False
+            self._matcher, self._signature = matcher, signature
+            return True
+
+
+_BUILTIN = SafetyMatcher(DANGEROUS_RULES)
+# Resolved on first use, so importing the package never reads SAFETY_RULES
+_ACTIVE: Union[SafetyMatcher, RulePack, None] = None
+
+
+def use_rules(
+    path: Optional[str | Path] = None, check_interval: float = 5.0
+) -> SafetyMatcher:
+    """Switch the module-level gate to the rule pack at *path*.
+
+    ``None`` restores the built-in :data:`DANGEROUS_RULES`.  Compiled packs
+    are cached under ``config.CACHE_DIR``.
+    """
+    global _ACTIVE
+    if path is None:
+        _ACTIVE = _BUILTIN
+    else:
+        _ACTIVE = RulePack(path, cache_dir=config.CACHE_DIR, check_interval=check_interval)
+    return active_matcher()
+
+
+def active_matcher() -> SafetyMatcher:
+    """The matcher currently used by :func:`is_dangerous` and friends.
+
+    Until :func:`use_rules` is called, this is the ``SAFETY_RULES`` pack if
+    one is configured (loaded on the first call), else the built-in rules.
+    """
+    active = _ACTIVE
+    if active is None:
+        if config.SAFETY_RULES:
+            return use_rules(
+                config.SAFETY_RULES, check_interval=config.SAFETY_RELOAD_INTERVAL
+            )
+        active = _BUILTIN
+    return active.matcher if isinstance(active, RulePack) else active
+
+
+def match_rule(text: str) -> Optional[str]:
+    """Id of the first rule that matches *text*, whatever its severity."""
+    return active_matcher().match(text)
+
+
+def screen(texts: Iterable[Any]) -> Tuple["pd.Series", "pd.Series"]:
+    """Gate a whole column at once: ``(mask, rule_ids)``, see :meth:`SafetyMatcher.screen`."""
+    return active_matcher().screen(texts)
+
+
+def verdict(text: str) -> Tuple[Optional[str], str]:
+    """``(rule_id, severity)`` reported for *text*; ``(None, "")`` if none matched."""
+    matcher = active_matcher()
+    rid = matcher.verdict(text)
+    return (rid, matcher.rules[rid]["severity"]) if rid is not None else (None, "")
 
 
 def is_dangerous(text: str) -> bool:
-    """True if *any* dangerous pattern matches the input string."""
-    return any(p.search(text) for p in _COMPILED)
+    """True if *text* is gated: a ``high`` severity rule matches it.
+
+    Lower-severity matches do not count; use :func:`match_rule` to see
+    whether any rule matched at all.
+    """
+    matcher = active_matcher()
+    rid = matcher.verdict(text)
+    return rid is not None and matcher.gates(rid)
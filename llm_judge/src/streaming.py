@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+"""Incremental parsing of streamed JSON completions.
+
+The judge only needs a few top-level fields of the completion (``label``,
+and ``confidence`` in a cascade).  :class:`FieldScanner` is fed the text as
+it streams in and reports each top-level field the moment its value is
+complete, so the label is known before the rest of the message arrives and
+generation can be cut short.  It also recovers fields from completions that
+were truncated by ``max_tokens`` and are therefore not valid JSON."""
+
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+class FieldScanner:
+    """Character-level scanner for the top-level fields of a JSON object.
+
+    String and scalar values are decoded as soon as they end; nested
+    objects and arrays are skipped.  Text before the opening brace (e.g. a
+    code fence) is ignored.
+    """
+
+    def __init__(self) -> None:
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._state = "start"
+        self._key = ""
+        self._raw: List[str] = []
+        self._escaped = False
+        self._depth = 0
+        self._in_string = False
+
+    def feed(self, text: str) -> List[str]:
+        """Consume *text*; return the names of the fields it completed."""
+        completed: List[str] = []
+        for ch in text:
+            if self.done:
+                break
+            state = self._state
+            if state == "start":
+                if ch == "{":
+                    self._state = "key_wait"
+            elif state == "key_wait":
+                if ch == '"':
+                    self._state, self._raw = "key", []
+                elif ch == "}":
+                    self.done = True
+            elif state in ("key", "string"):
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    value = _decode_string("".join(self._raw))
+                    if state == "key":
+                        self._key, self._state = value or "", "colon"
+                    else:
+                        self._store(value, completed)
+                    continue
+                self._raw.append(ch)
+            elif state == "colon":
+                if ch == ":":
+                    self._state = "value_wait"
+            elif state == "value_wait":
+                if ch == '"':
+                    self._state, self._raw = "string", []
+                elif ch in "{[":
+                    self._state, self._depth, self._in_string = "nested", 1, False
+                elif not ch.isspace():
+                    self._state, self._raw = "scalar", [ch]
+            elif state == "scalar":
+                if ch in ",}" or ch.isspace():
+                    try:
+                        value = json.loads("".join(self._raw))
+                    except ValueError:
+                        value = None
+                    self._store(value, completed)
+                    if ch == "}":
+                        self.done = True
+                else:
+                    self._raw.append(ch)
+            elif state == "nested":
+                self._skip_nested(ch)
+        return completed
+
+    @property
+    def truncated(self) -> bool:
+        """True if an object was opened but its closing brace never came."""
+        return self._state != "start" and not self.done
+
+    def partial(self) -> Optional[Tuple[str, str]]:
+        """``(key, text so far)`` of a string value cut off mid-stream."""
+        if self._state != "string":
+            return None
+        raw = "".join(self._raw)
+        # Drop an escape sequence the cut left unfinished
+        for end in range(len(raw), max(len(raw) - 6, 0) - 1, -1):
+            value = _decode_string(raw[:end])
+            if value is not None:
+                return self._key, value
+        return self._key, ""
+
+    def _store(self, value: Any, completed: List[str]) -> None:
+        self.fields[self._key] = value
+        completed.append(self._key)
+        self._state = "key_wait"
+
+    def _skip_nested(self, ch: str) -> None:
+        if self._in_string:
+            if self._escaped:
+                self._escaped = False
+            elif ch == "\\":
+                self._escaped = True
+            elif ch == '"':
+                self._in_string = False
+        elif ch == '"':
+            self._in_string = True
+        elif ch in "{[":
+            self._depth += 1
+        elif ch in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                self._state = "key_wait"
+
+
+def _decode_string(raw: str) -> Optional[str]:
+    try:
+        return json.loads(f'"{raw}"')
+    except ValueError:
+        return None
+
+
+def scan_fields(text: str) -> Dict[str, Any]:
+    """Top-level fields of a possibly truncated JSON object in *text*.
+
+    A string value cut off by the end of *text* is included as far as it got.
+    """
+    scanner = FieldScanner()
+    scanner.feed(text)
+    fields = dict(scanner.fields)
+    partial = scanner.partial()
+    if partial is not None:
+        fields.setdefault(*partial)
+    return fields
+
+
+def is_truncated(text: str) -> bool:
+    """True if *text* is a JSON object cut off before its end.
+
+    Completions stopped by ``max_tokens`` or an early stop look like this;
+    they are not worth caching.  Text without any object is not truncated.
+    """
+    scanner = FieldScanner()
+    scanner.feed(text)
+    return scanner.truncated
+
+
+class StreamReader:
+    """Collect a streamed completion and notice when *needed* fields are in."""
+
+    def __init__(self, needed: Sequence[str] = ("label",)) -> None:
+        self.needed = tuple(needed)
+        self.scanner = FieldScanner()
+        self.ready = False
+        self._parts: List[str] = []
+
+    def feed(self, text: str) -> bool:
+        """Add *text*; True the first time every needed field is complete."""
+        self._parts.append(text)
+        self.scanner.feed(text)
+        if not self.ready and all(f in self.scanner.fields for f in self.needed):
+            self.ready = True
+            return True
+        return False
+
+    @property
+    def text(self) -> str:
+        """Everything received so far (see :func:`scan_fields` if it was cut)."""
+        return "".join(self._parts)
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+"""Hot-path instrumentation: per-stage timings, token usage and counters.
+
+Library code records into the process-wide :data:`telemetry` instance::
+
+    with telemetry.time("llm"):      # latency histogram per stage
+        ...
+    telemetry.count("retries")       # counters: tokens, retries, gated rows…
+
+Histograms use fixed log-spaced buckets, so recording is cheap, memory is
+constant and snapshots taken in several processes merge by addition.
+Snapshots go to pluggable sinks: :class:`JsonlSink` appends them to a file
+and :class:`PrometheusSink` serves live values in the Prometheus text
+format."""
+
+import bisect
+import json
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+
+# Upper bounds (seconds) of the latency buckets: 10 µs to ~10 min, x1.25 apart
+BUCKETS = tuple(1e-5 * 1.25 ** i for i in range(81))
+
+Snapshot = Dict[str, Any]
+
+
+# -----------------------------------------------------------------------------
+# Histogram
+# -----------------------------------------------------------------------------
+
+class Histogram:
+    """Latency histogram over :data:`BUCKETS` (plus an overflow bucket)."""
+
+    __slots__ = ("counts", "count", "sum", "min", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        """Add the counts of a :meth:`to_dict` snapshot."""
+        if not data["count"]:
+            return
+        self.counts = [a + b for a, b in zip(self.counts, data["buckets"])]
+        self.count += data["count"]
+        self.sum += data["sum"]
+        self.min = min(self.min, data["min"])
+        self.max = max(self.max, data["max"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "buckets": list(self.counts),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Histogram":
+        hist = cls()
+        hist.merge(data)
+        return hist
+
+    def percentile(self, q: float) -> float:
+        """Estimate the *q*-th percentile, interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        target = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= target:
+                low = BUCKETS[i - 1] if i else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else self.max
+                value = low + (high - low) * (target - seen) / n
+                return min(max(value, self.min), self.max)
+            seen += n
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean and p50/p95/p99 in seconds."""
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+# -----------------------------------------------------------------------------
+# Registry
+# -----------------------------------------------------------------------------
+
+class Telemetry:
+    """Thread-safe store of stage histograms and counters, plus sinks."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sinks: List["Sink"] = []
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop everything recorded so far and restart the wall clock."""
+        with self._lock:
+            self._stages: Dict[str, Histogram] = {}
+            self._counters: Dict[str, float] = {}
+            self._started = time.monotonic()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            hist = self._stages.get(stage)
+            if hist is None:
+                hist = self._stages[stage] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Record the duration of the ``with`` block under *stage*."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def count(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def snapshot(self) -> Snapshot:
+        """JSON-serialisable copy of the current values."""
+        with self._lock:
+            return {
+                "elapsed": time.monotonic() - self._started,
+                "counters": dict(self._counters),
+                "stages": {k: h.to_dict() for k, h in self._stages.items()},
+            }
+
+    def merge(self, snapshot: Snapshot) -> None:
+        """Add another process's snapshot (the wall clock is left alone)."""
+        with self._lock:
+            for name, n in snapshot["counters"].items():
+                self._counters[name] = self._counters.get(name, 0) + n
+            for stage, data in snapshot["stages"].items():
+                self._stages.setdefault(stage, Histogram()).merge(data)
+
+    def replace(self, snapshots: Iterable[Snapshot]) -> None:
+        """Swap the recorded values for the sum of *snapshots* (clock kept).
+
+        A parent following worker processes calls this with the latest
+        snapshot of each worker.
+        """
+        combined = Telemetry()
+        for snapshot in snapshots:
+            combined.merge(snapshot)
+        with self._lock:
+            self._stages, self._counters = combined._stages, combined._counters
+
+    # ------------------------------------------------------------------
+    # Sinks
+    # ------------------------------------------------------------------
+    def add_sink(self, sink: "Sink") -> None:
+        self._sinks.append(sink)
+
+    def flush(self) -> None:
+        """Send a snapshot to every sink."""
+        if self._sinks:
+            snapshot = self.snapshot()
+            for sink in self._sinks:
+                sink.emit(snapshot)
+
+    def close_sinks(self) -> None:
+        """Flush once more, then close and forget every sink."""
+        self.flush()
+        sinks, self._sinks = self._sinks, []
+        for sink in sinks:
+            sink.close()
+
+
+def performance_summary(snapshot: Snapshot) -> Dict[str, Any]:
+    """Rows/sec, per-stage latency percentiles and counters of *snapshot*."""
+    counters = snapshot["counters"]
+    elapsed = snapshot["elapsed"]
+    return {
+        "rows": int(counters.get("rows", 0)),
+        "elapsed": elapsed,
+        "rows_per_sec": counters.get("rows", 0) / elapsed if elapsed else 0.0,
+        "stages": {
+            stage: Histogram.from_dict(data).summary()
+            for stage, data in sorted(snapshot["stages"].items())
+        },
+        "counters": dict(sorted(counters.items())),
+    }
+
+
+# -----------------------------------------------------------------------------
+# Sinks
+# -----------------------------------------------------------------------------
+
+class Sink:
+    """Receives snapshots from :meth:`Telemetry.flush`."""
+
+    def emit(self, snapshot: Snapshot) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class QueueSink(Sink):
+    """Put ``(key, snapshot)`` on a multiprocessing *queue* at every flush.
+
+    Worker processes use it to report to the parent while they run.
+    """
+
+    def __init__(self, queue: Any, key: str) -> None:
+        self.queue = queue
+        self.key = key
+
+    def emit(self, snapshot: Snapshot) -> None:
+        self.queue.put((self.key, snapshot))
+
+
+class JsonlSink(Sink):
+    """Append every snapshot to *path* as one timestamped JSON line."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def emit(self, snapshot: Snapshot) -> None:
+        record = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            **snapshot,
+        }
+        with self.path.open("a", encoding="utf-8") as fh:
+            fh.write(json.dumps(record) + "\n")
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def render_prometheus(snapshot: Snapshot, prefix: str = "llm_judge") -> str:
+    """Render *snapshot* in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for name, value in sorted(snapshot["counters"].items()):
+        metric = f"{prefix}_{_metric_name(name)}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value:g}"]
+
+    metric = f"{prefix}_stage_seconds"
+    if snapshot["stages"]:
+        lines.append(f"# TYPE {metric} histogram")
+    for stage, data in sorted(snapshot["stages"].items()):
+        label = f'stage="{stage}"'
+        cumulative = 0
+        for bound, n in zip(BUCKETS, data["buckets"]):
+            cumulative += n
+            lines.append(f'{metric}_bucket{{{label},le="{bound:.6g}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{{label},le="+Inf"}} {data["count"]}')
+        lines.append(f"{metric}_sum{{{label}}} {data['sum']:.6f}")
+        lines.append(f"{metric}_count{{{label}}} {data['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusSink(Sink):
+    """Serve live values of *source* at ``http://host:port/metrics``.
+
+    Values are read when scraped, so :meth:`emit` has nothing to do.  Port
+    0 picks a free port (see :attr:`port`).
+    """
+
+    def __init__(
+        self, source: Telemetry, port: int = 9464, host: str = "127.0.0.1"
+    ) -> None:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render_prometheus(source.snapshot()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# Process-wide instance used by the judge, clients and CLI
+telemetry = Telemetry()
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+"""Tests for the offline batch-API mode."""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from src.batch import (
+    BatchBackend,
+    LocalBatchBackend,
+    parse_output_lines,
+    run_batch,
+    wait_for_job,
+)
+from src.judge import Judge
+
+
+class TestBatchMode(unittest.TestCase):
+    """Test job rendering, polling and merging."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    @patch('src.judge.OpenAIClient')
+    def test_run_batch_with_local_backend(self, mock_client_class):
+        """Only safe rows are submitted and results map back in order."""
+        judge_client = Mock()
+        mock_client_class.return_value = judge_client
+        backend_client = Mock()
+        backend_client.chat.return_value = '{"chain_of_thought": "ok", "label": "Correct"}'
+
+        rows = [
+            {"question": "Q1", "answer": "A1", "fragments": "F"},
+            {"question": "Q2", "answer": "drink bleach", "fragments": "F"},
+            {"question": "Q3", "answer": "A3", "fragments": "F"},
+        ]
+        results = run_batch(
+            Judge(), rows, LocalBatchBackend(backend_client), self._tmp.name
+        )
+
+        self.assertEqual([r["label"] for r in results], ["Correct", "Dangerous", "Correct"])
+        self.assertEqual(backend_client.chat.call_count, 2)
+        judge_client.chat.assert_not_called()
+        self.assertEqual(os.listdir(self._tmp.name), [])  # job file removed after the merge
+
+    def test_parse_output_skips_failures(self):
+        """Errored or non-200 lines are left out so the row can fall back."""
+        ok = {"custom_id": "0", "error": None, "response": {
+            "status_code": 200,
+            "body": {"choices": [{"message": {"content": " {} "}}]}}}
+        failed = {"custom_id": "1", "error": {"message": "boom"}, "response": None}
+        throttled = {"custom_id": "2", "error": None,
+                     "response": {"status_code": 429, "body": {}}}
+        lines = [json.dumps(x) for x in (ok, failed, throttled)]
+
+        self.assertEqual(parse_output_lines(lines), {"0": "{}"})
+
+    def test_wait_for_job_polls_until_terminal(self):
+        """Polling stops on a terminal status and failures raise."""
+        backend = Mock(spec=BatchBackend)
+        backend.status.side_effect = ["QUEUED", "RUNNING", "SUCCESS"]
+        backend.results.return_value = {"0": "x"}
+        self.assertEqual(wait_for_job(backend, "job", poll_interval=0), {"0": "x"})
+        self.assertEqual(backend.status.call_count, 3)
+
+        backend.status.side_effect = ["FAILED"]
+        with self.assertRaises(RuntimeError):
+            wait_for_job(backend, "job", poll_interval=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
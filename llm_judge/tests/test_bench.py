@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+"""Tests for the benchmark harness and its mock chat-completions server."""
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src import cli
+from src.bench import MockChatServer, run_benchmark
+from src.ratelimit import RetryPolicy
+
+
+class TestBenchmark(unittest.TestCase):
+    """Run tiny benchmarks against the real SDK and a local server."""
+
+    def setUp(self):
+        patcher = patch.dict(os.environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_restores_api_key(self):
+        """The placeholder key is removed again after the run."""
+        os.environ.pop("MISTRAL_API_KEY", None)
+        with MockChatServer(latency=0.001) as server:
+            run_benchmark([2], [1], server=server, trace_memory=False)
+        self.assertNotIn("MISTRAL_API_KEY", os.environ)
+
+    def test_retries_through_throttling_and_errors(self):
+        """429s and 500s are retried; the server counts every attempt."""
+        with MockChatServer(
+            latency=0.001, rate_limit_rate=0.3, error_rate=0.1, retry_after=0
+        ) as server:
+            report = run_benchmark(
+                [8], [1, 3], server=server, trace_memory=False,
+                retry_policy=RetryPolicy(max_retries=30, base_delay=0.001),
+            )
+
+        self.assertEqual([r["concurrency"] for r in report["results"]], [1, 3])
+        for result in report["results"]:
+            self.assertEqual(result["failed_rows"], 0)
+            counts = result["server"]
+            self.assertEqual(
+                counts["requests"], 8 + counts["throttled"] + counts["errors"]
+            )
+            lat = result["latency_ms"]
+            self.assertLessEqual(lat["p50"], lat["p95"])
+            self.assertLessEqual(lat["p95"], lat["p99"])
+            self.assertIsNone(result["peak_memory_mb"])
+
+    def test_cli_writes_json(self):
+        """``llm-judge bench --out`` writes the machine-readable results."""
+        with tempfile.TemporaryDirectory() as tmp, patch("sys.stderr"):
+            out = Path(tmp) / "bench.json"
+            cli.main([
+                "bench", "--sizes", "4", "--concurrency", "2",
+                "--latency", "0.001", "--out", str(out),
+            ])
+            report = json.loads(out.read_text(encoding="utf-8"))
+
+        (result,) = report["results"]
+        self.assertEqual((result["rows"], result["concurrency"]), (4, 2))
+        self.assertGreater(result["rows_per_sec"], 0)
+        self.assertGreater(result["peak_memory_mb"], 0)
+        self.assertEqual(report["server"]["latency"], 0.001)
+
+    def test_rejects_invalid_shares(self):
+        with self.assertRaises(ValueError):
+            MockChatServer(error_rate=0.7, rate_limit_rate=0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
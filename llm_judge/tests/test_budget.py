@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+"""Tests for prompt token budgeting."""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from src.budget import (
+    PromptBudget,
+    estimate_tokens,
+    latest_turns,
+    rank_fragments,
+    select_fragments,
+    truncate,
+)
+from src.judge import Judge
+from src.telemetry import telemetry
+
+RELEVANT = "Photosynthesis converts sunlight, water and carbon dioxide into glucose."
+OFF_TOPIC = "The football league table changed after the transfer window closed."
+ROW = {
+    "question": "How does photosynthesis work?",
+    "answer": "Plants use sunlight, water and carbon dioxide to make glucose.",
+    "fragments": "\\n".join([OFF_TOPIC] * 40 + [RELEVANT] + [OFF_TOPIC] * 40),
+    "conversation_history": "User: hi\\nAssistant: hello\\nUser: what is a leaf?",
+}
+
+
+class TestEstimates(unittest.TestCase):
+    """Test token estimates and truncation."""
+
+    def test_estimate_is_cached_and_script_aware(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("word, word."), 4)
+        # Greek is split about twice as finely as English
+        self.assertEqual(estimate_tokens("φωτοσύνθεση"), 6)
+        before = estimate_tokens.cache_info().hits
+        estimate_tokens(RELEVANT)
+        estimate_tokens(RELEVANT)
+        self.assertGreater(estimate_tokens.cache_info().hits, before)
+
+    def test_truncate_respects_budget(self):
+        text = " ".join(f"word{i}" for i in range(100))
+        self.assertEqual(truncate(text, 1000), text)
+        for keep_end in (False, True):
+            with self.subTest(keep_end=keep_end):
+                cut = truncate(text, 20, keep_end=keep_end)
+                self.assertLessEqual(estimate_tokens(cut), 20)
+                self.assertIn("…", cut)
+                self.assertIn("word99" if keep_end else "word0", cut)
+
+    def test_latest_turns_keeps_whole_recent_turns(self):
+        history = ROW["conversation_history"]
+        self.assertEqual(latest_turns(history, 100), history)
+        self.assertEqual(latest_turns(history, 12), "…\nUser: what is a leaf?")
+
+
+class TestSelection(unittest.TestCase):
+    """Test fragment ranking and selection."""
+
+    def test_relevant_fragment_ranks_first(self):
+        order = rank_fragments([OFF_TOPIC, RELEVANT, OFF_TOPIC], ROW["answer"])
+        self.assertEqual(order, [1, 0, 2])
+
+    def test_selection_fits_and_keeps_order(self):
+        text = "\n".join(["alpha fragment one", RELEVANT, "beta fragment two"])
+        budget = estimate_tokens(RELEVANT) + 7  # room for one short fragment
+        kept = select_fragments(text, ROW["answer"], budget)
+        self.assertEqual(kept, f"alpha fragment one\n{RELEVANT}")
+        self.assertLessEqual(estimate_tokens(kept), budget)
+        # Not even the best fragment fits: it is truncated
+        self.assertTrue(select_fragments(text, ROW["answer"], 4).endswith("…"))
+
+    def test_budget_fit(self):
+        fitted, dropped = PromptBudget(max_tokens=60).fit(ROW)
+        self.assertEqual(fitted["fragments"], RELEVANT)
+        self.assertEqual(
+            dropped, estimate_tokens(ROW["fragments"]) - estimate_tokens(RELEVANT)
+        )
+        self.assertEqual(PromptBudget(max_tokens=10_000).fit(ROW), (ROW, 0))
+        with self.assertRaises(ValueError):
+            PromptBudget(max_tokens=0)
+
+
+class TestJudgeBudget(unittest.TestCase):
+    """Test budgeted prompts in the Judge."""
+
+    @patch("src.judge.OpenAIClient")
+    def test_prompts_unchanged_without_budget(self, _mock_client_class):
+        plain = Judge()._build_user_prompt(ROW)
+        self.assertIn(ROW["fragments"], plain)
+        self.assertNotIn("what is a leaf", plain)
+        roomy = Judge(max_prompt_tokens=10_000)._build_user_prompt(ROW)
+        self.assertEqual(roomy, plain)
+
+    @patch("src.judge.OpenAIClient")
+    def test_trimmed_prompt_and_counters(self, mock_client_class):
+        client = Mock()
+        client.chat.return_value = '{"chain_of_thought": "ok", "label": "Correct"}'
+        mock_client_class.return_value = client
+        judge = Judge(max_prompt_tokens=60, include_history=True, history_tokens=12)
+
+        telemetry.reset()
+        judge.request_key(ROW)  # keys are not counted
+        judge.evaluate_row(ROW)
+        counters = telemetry.snapshot()["counters"]
+
+        prompt = client.chat.call_args.kwargs["user_prompt"]
+        self.assertIn(f"Fragments:\n{RELEVANT}\n\n", prompt)
+        self.assertNotIn(OFF_TOPIC, prompt)
+        self.assertIn("(Conversation History):\n…\nUser: what is a leaf?", prompt)
+        self.assertEqual(counters["budget_prompts"], 1)
+        self.assertEqual(counters["budget_trimmed"], 1)
+        self.assertGreater(counters["budget_tokens_dropped"], 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
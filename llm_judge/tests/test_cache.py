@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+"""Tests for the persistent judgment cache."""
+
+import sqlite3
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from src.cache import CACHE_FILENAME, JudgmentCache, make_key
+from src.judge import Judge
+
+
+class TestJudgmentCache(unittest.TestCase):
+    """Test the SQLite-backed cache."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def test_roundtrip_and_counters(self):
+        """A stored completion is returned and hits/misses are counted."""
+        cache = JudgmentCache(self._tmp.name)
+        self.addCleanup(cache.close)
+        key = make_key("m", 0.0, "sys", "user")
+
+        self.assertIsNone(cache.get(key))
+        cache.put(key, '{"label": "Correct"}')
+        self.assertEqual(cache.get(key), '{"label": "Correct"}')
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_key_depends_on_every_input(self):
+        """Changing model, temperature or either prompt changes the key."""
+        base = make_key("m", 0.0, "sys", "user")
+        self.assertNotEqual(base, make_key("m2", 0.0, "sys", "user"))
+        self.assertNotEqual(base, make_key("m", 0.5, "sys", "user"))
+        self.assertNotEqual(base, make_key("m", 0.0, "sys2", "user"))
+        self.assertNotEqual(base, make_key("m", 0.0, "sys", "user2"))
+        self.assertNotEqual(make_key("m", 0.0, "ab", "c"), make_key("m", 0.0, "a", "bc"))
+
+    def test_size_eviction_is_lru(self):
+        """Entries beyond ``max_entries`` are evicted least recently used first."""
+        cache = JudgmentCache(self._tmp.name, max_entries=2)
+        self.addCleanup(cache.close)
+        for i in range(4):
+            cache.put(f"k{i}", str(i))
+            time.sleep(0.001)
+        self.assertEqual(cache.get("k0"), "0")  # a hit makes k0 the most recent
+        cache.evict()
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("k1"))
+        self.assertEqual(cache.get("k0"), "0")
+        self.assertEqual(cache.get("k3"), "3")
+
+    def test_upgrades_cache_without_access_times(self):
+        """Cache files from before LRU eviction gain the ``accessed`` column."""
+        path = Path(self._tmp.name) / CACHE_FILENAME
+        conn = sqlite3.connect(str(path))
+        conn.execute(
+            "CREATE TABLE judgments (key TEXT PRIMARY KEY, completion TEXT NOT NULL,"
+            " created REAL NOT NULL)"
+        )
+        conn.execute("INSERT INTO judgments VALUES ('k', 'v', ?)", (time.time(),))
+        conn.commit()
+        conn.close()
+
+        cache = JudgmentCache(self._tmp.name, max_entries=1)
+        self.addCleanup(cache.close)
+        cache.put("k2", "v2")
+        self.assertEqual(cache.get("k"), "v")
+
+    def test_expired_entries_miss(self):
+        """Entries older than ``max_age_seconds`` are treated as misses."""
+        cache = JudgmentCache(self._tmp.name, max_age_seconds=0.01)
+        self.addCleanup(cache.close)
+        cache.put("k", "v")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("k"))
+
+    @patch('src.judge.OpenAIClient')
+    def test_judge_skips_llm_on_hit(self, mock_client_class):
+        """A second identical row is answered from the cache."""
+        mock_client = Mock()
+        mock_client.chat.return_value = '{"chain_of_thought": "ok", "label": "Correct"}'
+        mock_client_class.return_value = mock_client
+        cache = JudgmentCache(self._tmp.name)
+        self.addCleanup(cache.close)
+
+        judge = Judge(cache=cache)
+        row = {"question": "Q", "answer": "A", "fragments": "F"}
+        first = judge.evaluate_row(row)
+        second = judge.evaluate_row(row)
+
+        self.assertEqual(first, second)
+        mock_client.chat.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,436 @@
+from __future__ import annotations
+
+"""End-to-end tests for the CLI runner with a mocked LLM client."""
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pandas as pd
+
+from src import cli
+from src.bench import MockChatServer
+from src.checkpoint import Checkpoint, checkpoint_path, row_keys
+
+COMPLETION = '{"chain_of_thought": "ok", "label": "Correct"}'
+
+
+def _write_input(path: Path, n: int) -> None:
+    pd.DataFrame(
+        {
+            "Current User Question": [f"Question {i}?" for i in range(n)],
+            "Assistant Answer": [f"Answer {i}" for i in range(n)],
+            "Fragment Texts": [f"Fragment {i}" for i in range(n)],
+            "Label": ["Correct"] * n,
+        }
+    ).to_csv(path, index=False)
+
+
+class CLITestCase(unittest.TestCase):
+    """Runs ``cli.main`` inside a scratch directory."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.tmp = Path(self._tmp.name)
+        cwd = os.getcwd()
+        os.chdir(self.tmp)
+        self.addCleanup(os.chdir, cwd)
+
+        self.client = Mock()
+        self.client.chat.return_value = COMPLETION
+        patcher = patch("src.judge.OpenAIClient", return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_cli(self, *argv: str) -> None:
+        with patch("sys.argv", ["llm-judge", *argv]):
+            cli.main()
+
+
+class TestCheckpoint(CLITestCase):
+    """Test checkpointing and ``--resume``."""
+
+    def test_row_keys_disambiguate_duplicates(self):
+        """Identical rows get distinct but stable keys."""
+        rows = [{"question": "q", "answer": "a"}] * 2 + [{"question": "q", "answer": "b"}]
+        keys = row_keys(rows)
+        self.assertEqual(len(set(keys)), 3)
+        self.assertEqual(keys, row_keys(rows))
+
+    def test_torn_line_is_ignored(self):
+        """A partially written last line from a crash does not break loading."""
+        ckpt = Checkpoint(self.tmp / "c.jsonl", flush_every=1)
+        ckpt.add("k1", {"label": "Correct", "chain_of_thought": ""})
+        with ckpt.path.open("a", encoding="utf-8") as fh:
+            fh.write('{"key": "k2", "res')
+        self.assertEqual(list(ckpt.load()), ["k1"])
+
+    def test_resume_skips_checkpointed_rows(self):
+        """Only rows missing from the checkpoint reach the LLM."""
+        _write_input(self.tmp / "in.csv", 5)
+        out = self.tmp / "out.csv"
+        rows = [
+            {"question": f"Question {i}?", "answer": f"Answer {i}",
+             "fragments": f"Fragment {i}"}
+            for i in range(5)
+        ]
+        ckpt = Checkpoint(checkpoint_path(out), flush_every=1)
+        for key in row_keys(rows)[:3]:
+            ckpt.add(key, {"label": "Incorrect", "chain_of_thought": "cached"})
+
+        self.run_cli("--in", "in.csv", "--out", str(out), "--resume")
+
+        self.assertEqual(self.client.chat.call_count, 2)
+        judged = pd.read_csv(out)
+        self.assertEqual(
+            judged["Predicted_Label"].tolist(),
+            ["Incorrect"] * 3 + ["Correct"] * 2,
+        )
+        self.assertFalse(checkpoint_path(out).exists())
+
+    def test_crash_leaves_checkpoint(self):
+        """Rows judged before a failure are persisted for the next run."""
+        _write_input(self.tmp / "in.csv", 4)
+        out = self.tmp / "out.csv"
+        self.client.chat.side_effect = [COMPLETION, COMPLETION, RuntimeError("boom")]
+
+        with self.assertRaises(RuntimeError):
+            self.run_cli("--in", "in.csv", "--out", str(out))
+
+        lines = checkpoint_path(out).read_text(encoding="utf-8").splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])["config"]["model"], "mistral-small-latest")
+        self.assertEqual(json.loads(lines[1])["result"]["label"], "Correct")
+
+    def test_resume_refuses_other_configuration(self):
+        """Verdicts from another model or temperature are never reused."""
+        _write_input(self.tmp / "in.csv", 4)
+        out = self.tmp / "out.csv"
+        self.client.chat.side_effect = [COMPLETION, COMPLETION, RuntimeError("boom")]
+        with self.assertRaises(RuntimeError):
+            self.run_cli("--in", "in.csv", "--out", str(out))
+        self.client.chat.side_effect = None
+
+        with self.assertRaisesRegex(SystemExit, "model changed"):
+            self.run_cli("--in", "in.csv", "--out", str(out), "--resume",
+                         "--model", "mistral-large-latest")
+        with self.assertRaisesRegex(SystemExit, "temperature changed"):
+            self.run_cli("--in", "in.csv", "--out", str(out), "--resume",
+                         "--temperature", "0.7")
+        self.assertEqual(self.client.chat.call_count, 3)
+
+        self.run_cli("--in", "in.csv", "--out", str(out), "--resume")
+        self.assertEqual(self.client.chat.call_count, 5)
+
+
+class TestStreaming(CLITestCase):
+    """Test chunked processing in ``cli.main``."""
+
+    def test_chunked_run_keeps_every_row_in_order(self):
+        """Small chunks produce the same judged table as one big batch."""
+        _write_input(self.tmp / "in.csv", 11)
+        self.run_cli("--in", "in.csv", "--out", "out.csv", "--chunksize", "4")
+
+        judged = pd.read_csv(self.tmp / "out.csv")
+        self.assertEqual(judged["question"].tolist(), [f"Question {i}?" for i in range(11)])
+        self.assertEqual(set(judged["Predicted_Label"]), {"Correct"})
+        self.assertEqual(self.client.chat.call_count, 11)
+
+
+class TestDedup(CLITestCase):
+    """Test in-run deduplication of identical prompts."""
+
+    def test_duplicate_rows_share_one_request(self):
+        """Each distinct prompt reaches the LLM once, even across chunks."""
+        _write_input(self.tmp / "in.csv", 3)
+        df = pd.read_csv(self.tmp / "in.csv")
+        pd.concat([df, df, df.iloc[:1]]).to_csv(self.tmp / "in.csv", index=False)
+
+        self.run_cli("--in", "in.csv", "--out", "out.csv", "--chunksize", "2",
+                     "--concurrency", "2")
+        self.assertEqual(self.client.chat.call_count, 3)
+        self.assertEqual(len(pd.read_csv(self.tmp / "out.csv")), 7)
+
+        self.run_cli("--in", "in.csv", "--out", "out.csv", "--no-dedup")
+        self.assertEqual(self.client.chat.call_count, 3 + 7)
+
+
+class TestSafetyScreen(CLITestCase):
+    """Test the up-front safety screen in ``cli.main``."""
+
+    def test_flagged_rows_skip_the_llm(self):
+        """Dangerous answers are labelled before any request is scheduled."""
+        _write_input(self.tmp / "in.csv", 5)
+        df = pd.read_csv(self.tmp / "in.csv")
+        df.loc[[1, 3], "Assistant Answer"] = ["Just drink bleach.", "Try a JAILBREAK"]
+        df.to_csv(self.tmp / "in.csv", index=False)
+
+        with patch("src.judge.verdict") as per_row_gate:
+            self.run_cli("--in", "in.csv", "--out", "out.csv", "--concurrency", "2")
+
+        judged = pd.read_csv(self.tmp / "out.csv")
+        self.assertEqual(
+            judged["Predicted_Label"].tolist(),
+            ["Correct", "Dangerous", "Correct", "Dangerous", "Correct"],
+        )
+        self.assertEqual(self.client.chat.call_count, 3)
+        per_row_gate.assert_not_called()
+        self.assertIn("'drink_bleach'", judged["Predicted_CoT"][1])
+
+
+class TestReport(CLITestCase):
+    """Test the optional report sections."""
+
+    def test_bootstrap_and_slices(self):
+        """``--bootstrap`` and ``--slice-by`` add their report sections."""
+        _write_input(self.tmp / "in.csv", 6)
+        df = pd.read_csv(self.tmp / "in.csv")
+        df["lang"] = ["el", "en"] * 3
+        df.to_csv(self.tmp / "in.csv", index=False)
+
+        self.run_cli(
+            "--in", "in.csv", "--out", "out.csv", "--bootstrap", "200", "--slice-by", "lang"
+        )
+
+        report = (self.tmp / "reports" / "in_report.md").read_text(encoding="utf-8")
+        self.assertIn("## Bootstrap 95% confidence intervals (200 resamples)", report)
+        self.assertIn("## Metrics by `lang`", report)
+        self.assertIn("| el | 3 | 1.0000 | 1.0000 | [1.0000, 1.0000] |", report)
+
+    def test_performance_section_and_jsonl(self):
+        """A run reports stage latencies and streams snapshots per chunk."""
+        _write_input(self.tmp / "in.csv", 5)
+        self.run_cli(
+            "--in", "in.csv", "--out", "out.csv", "--chunksize", "2",
+            "--metrics-jsonl", "metrics.jsonl",
+        )
+
+        report = (self.tmp / "reports" / "in_report.md").read_text(encoding="utf-8")
+        self.assertIn("## Performance", report)
+        self.assertIn("- **Rows**: 5 in", report)
+        self.assertRegex(report, r"\| llm \| 5 \|")
+        records = (self.tmp / "metrics.jsonl").read_text().splitlines()
+        self.assertGreaterEqual(len(records), 3)
+        self.assertEqual(json.loads(records[-1])["counters"]["rows"], 5)
+
+    def test_prompt_budget_line(self):
+        """``--max-prompt-tokens`` reports how many prompts it trimmed."""
+        _write_input(self.tmp / "in.csv", 4)
+        self.run_cli("--in", "in.csv", "--out", "out.csv", "--max-prompt-tokens", "5")
+
+        report = (self.tmp / "reports" / "in_report.md").read_text(encoding="utf-8")
+        self.assertIn("- **Prompt budget**: 4 of 4 prompts trimmed, ~12 tokens dropped", report)
+        prompt = self.client.chat.call_args.kwargs["user_prompt"]
+        self.assertIn("Fragments:\n\n", prompt)
+
+    def test_cascade_line(self):
+        """``--cascade-model`` reports the escalation rate."""
+        _write_input(self.tmp / "in.csv", 4)
+        self.run_cli("--in", "in.csv", "--out", "out.csv", "--cascade-model", "small")
+
+        report = (self.tmp / "reports" / "in_report.md").read_text(encoding="utf-8")
+        # The mocked completions carry no confidence, so every row escalates
+        self.assertIn("- **Cascade**: 4 of 4 rows escalated to the final model "
+                      "(100.0%; 4 unparseable)", report)
+        self.assertRegex(report, r"\| llm_fast \| 4 \|")
+        with self.assertRaises(SystemExit):
+            self.run_cli("--in", "in.csv", "--cascade-model", "small", "--rows-per-request", "2")
+
+    def test_early_stop_line(self):
+        """``--early-stop`` streams label-first completions and reports the stops."""
+        _write_input(self.tmp / "in.csv", 3)
+
+        def _stream(**_kwargs):
+            yield '{"label": "Correct", '
+            yield '"chain_of_thought": "because"}'
+
+        self.client.chat_stream.side_effect = _stream
+        self.run_cli("--in", "in.csv", "--out", "out.csv", "--early-stop")
+
+        out = pd.read_csv(self.tmp / "out.csv")
+        self.assertEqual(out["Predicted_Label"].tolist(), ["Correct"] * 3)
+        self.client.chat.assert_not_called()
+        kwargs = self.client.chat_stream.call_args.kwargs
+        self.assertEqual(kwargs["max_tokens"], 300)
+        report = (self.tmp / "reports" / "in_report.md").read_text(encoding="utf-8")
+        self.assertIn("- **Early stops**: 3 streams closed at the label", report)
+        self.assertRegex(report, r"\| llm_label \| 3 \|")
+
+
+class TestSharding(CLITestCase):
+    """Test ``--shard``, ``--workers`` and the ``merge`` command."""
+
+    def test_shards_merge_back_in_input_order(self):
+        """Shards partition the rows and ``merge`` restores the original order."""
+        _write_input(self.tmp / "in.csv", 10)
+        for i in range(3):
+            cli.main(["--in", "in.csv", "--shard", f"{i}/3", "--chunksize", "4"])
+
+        shard0 = pd.read_csv(self.tmp / "in.judged.shard-0-of-3.csv")
+        self.assertEqual(shard0["_row"].tolist(), [0, 3, 6, 9])
+
+        cli.main([
+            "merge", "in.judged.shard-2-of-3.csv", "in.judged.shard-0-of-3.csv",
+            "in.judged.shard-1-of-3.csv", "--out", "in.judged.csv", "--chunksize", "2",
+        ])
+        merged = pd.read_csv(self.tmp / "in.judged.csv")
+        self.assertEqual(merged["question"].tolist(), [f"Question {i}?" for i in range(10)])
+        self.assertNotIn("_row", merged.columns)
+        self.assertTrue((self.tmp / "reports" / "in_report.md").exists())
+
+    def test_merge_detects_missing_shard(self):
+        """A missing shard aborts the merge instead of writing a gappy table."""
+        _write_input(self.tmp / "in.csv", 6)
+        cli.main(["--in", "in.csv", "--shard", "0/2"])
+        with self.assertRaises(SystemExit):
+            cli.main(["merge", "in.judged.shard-0-of-2.csv", "--out", "out.csv"])
+
+    def test_workers_mode(self):
+        """``--workers`` judges shards in processes and merges them.
+
+        Spawned workers do not see the mocked client, so they talk to the
+        local stand-in server.  Their telemetry reaches the parent's sinks
+        chunk by chunk, not only at the end.
+        """
+        _write_input(self.tmp / "in.csv", 9)
+        with MockChatServer(latency=0.001) as server, \
+                patch.dict(os.environ, {"MISTRAL_API_KEY": "test-key"}):
+            cli.main(["--in", "in.csv", "--out", "out.csv", "--workers", "2",
+                      "--chunksize", "2", "--base-url", server.url,
+                      "--metrics-jsonl", "metrics.jsonl"])
+
+        judged = pd.read_csv(self.tmp / "out.csv")
+        self.assertEqual(judged["question"].tolist(), [f"Question {i}?" for i in range(9)])
+        self.assertTrue(set(judged["Predicted_Label"]) <= {"Correct", "Incorrect", "Dangerous"})
+        self.assertEqual(
+            sorted(p.name for p in self.tmp.iterdir()),
+            ["in.csv", "metrics.jsonl", "out.csv", "reports"],
+        )
+        snapshots = [json.loads(line) for line in
+                     (self.tmp / "metrics.jsonl").read_text(encoding="utf-8").splitlines()]
+        rows = [s["counters"].get("rows", 0) for s in snapshots]
+        self.assertGreater(len(snapshots), 2)
+        self.assertEqual(rows, sorted(rows))
+        self.assertEqual(rows[-1], 9)
+
+    def test_invalid_shard(self):
+        """Malformed or out-of-range shard specs are rejected."""
+        for spec in ("2/2", "a/b", "1"):
+            with self.subTest(spec=spec), patch("sys.stderr"), self.assertRaises(SystemExit):
+                cli.main(["--in", "in.csv", "--shard", spec])
+
+
+class TestScore(CLITestCase):
+    """Test the metrics-only ``score`` command."""
+
+    def test_scores_judged_tables_without_llm(self):
+        """Several judged tables are scored together, no client is built."""
+        for name, labels in (("a", ["Correct", "Incorrect"]), ("b", ["Correct"])):
+            pd.DataFrame({
+                "question": ["q"] * len(labels),
+                "Label": labels,
+                "Predicted_Label": ["Correct"] * len(labels),
+                "Predicted_CoT": ["..."] * len(labels),
+            }).to_csv(self.tmp / f"{name}.judged.csv", index=False)
+
+        with patch("src.judge.OpenAIClient", side_effect=AssertionError), \
+                patch("src.io.pd.read_csv", wraps=pd.read_csv) as read_csv:
+            cli.main(["score", "a.judged.csv", "b.judged.csv"])
+
+        usecols = read_csv.call_args.kwargs["usecols"]
+        self.assertFalse(usecols("Predicted_CoT") or usecols("question"))
+        report = (self.tmp / "reports" / "a_report.md").read_text(encoding="utf-8")
+        self.assertIn("| Correct | 3 |", report)
+        self.assertIn("- **Accuracy**: 0.6667", report)
+
+    def test_requires_gold_labels(self):
+        """Tables without ``Label`` are rejected."""
+        pd.DataFrame({"Predicted_Label": ["Correct"]}).to_csv(self.tmp / "x.csv", index=False)
+        with self.assertRaises(SystemExit):
+            cli.main(["score", "x.csv"])
+
+
+class TestBatchModeCLI(CLITestCase):
+    """Test ``--batch-mode`` end to end with the local backend."""
+
+    def test_local_batch_mode(self):
+        """All rows are judged through one job and sidecars are cleaned up."""
+        _write_input(self.tmp / "in.csv", 6)
+        self.run_cli(
+            "--in", "in.csv", "--out", "out.csv", "--chunksize", "4",
+            "--batch-mode", "--batch-backend", "local", "--batch-poll-interval", "0",
+        )
+
+        judged = pd.read_csv(self.tmp / "out.csv")
+        self.assertEqual(judged["Predicted_Label"].tolist(), ["Correct"] * 6)
+        self.assertEqual(self.client.chat.call_count, 6)
+        self.assertEqual(sorted(p.name for p in self.tmp.iterdir()), ["in.csv", "out.csv", "reports"])
+
+    def test_failed_merge_keeps_job_for_resume(self):
+        """Sidecars survive a failure after the job finished; --resume polls it again."""
+        _write_input(self.tmp / "in.csv", 3)
+        argv = ["--in", "in.csv", "--out", "out.csv", "--batch-mode",
+                "--batch-backend", "mistral", "--batch-poll-interval", "0"]
+        backend = Mock(persistent=True)
+        backend.submit.return_value = "job-1"
+        completions = {}
+
+        def _wait(_backend, job_id, poll_interval):
+            self.assertEqual(job_id, "job-1")
+            return completions
+
+        with patch("src.cli.MistralBatchBackend", return_value=backend), \
+                patch("src.cli.wait_for_job", side_effect=_wait):
+            # Every request failed inside the job and the fallback call errors
+            self.client.chat.side_effect = RuntimeError("API down")
+            with self.assertRaises(RuntimeError):
+                self.run_cli(*argv)
+            self.assertTrue((self.tmp / "out.csv.batch-job.json").exists())
+
+            self.client.chat.side_effect = None
+            self.run_cli(*argv, "--resume")
+
+        backend.submit.assert_called_once()
+        self.assertEqual(pd.read_csv(self.tmp / "out.csv")["Predicted_Label"].tolist(), ["Correct"] * 3)
+        self.assertEqual(sorted(p.name for p in self.tmp.iterdir()), ["in.csv", "out.csv", "reports"])
+
+    def test_resume_resubmits_failed_job(self):
+        """A saved job that ended FAILED is replaced instead of polled forever."""
+        _write_input(self.tmp / "in.csv", 3)
+        (self.tmp / "out.csv.batch-job.json").write_text(json.dumps({"job_id": "job-old"}))
+        backend = Mock(persistent=True)
+        backend.status.side_effect = lambda job_id: "FAILED" if job_id == "job-old" else "SUCCESS"
+        backend.submit.return_value = "job-new"
+        backend.results.side_effect = lambda job_id: {}
+
+        with patch("src.cli.MistralBatchBackend", return_value=backend):
+            self.run_cli(
+                "--in", "in.csv", "--out", "out.csv", "--resume", "--batch-mode",
+                "--batch-backend", "mistral", "--batch-poll-interval", "0",
+            )
+
+        backend.submit.assert_called_once()
+        backend.results.assert_called_once_with("job-new")
+        self.assertEqual(pd.read_csv(self.tmp / "out.csv")["Predicted_Label"].tolist(), ["Correct"] * 3)
+        self.assertEqual(sorted(p.name for p in self.tmp.iterdir()), ["in.csv", "out.csv", "reports"])
+
+    def test_duplicate_prompts_share_one_request(self):
+        """Duplicate rows are folded into one request of the job."""
+        _write_input(self.tmp / "in.csv", 2)
+        df = pd.read_csv(self.tmp / "in.csv")
+        pd.concat([df, df]).to_csv(self.tmp / "in.csv", index=False)
+        self.run_cli(
+            "--in", "in.csv", "--out", "out.csv", "--chunksize", "3",
+            "--batch-mode", "--batch-backend", "local", "--batch-poll-interval", "0",
+        )
+
+        self.assertEqual(self.client.chat.call_count, 2)
+        self.assertEqual(pd.read_csv(self.tmp / "out.csv")["Predicted_Label"].tolist(), ["Correct"] * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+"""Tests for table I/O helpers."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from src.io import TableWriter, iter_table, load_table, save_table, table_format
+
+try:
+    import pyarrow  # noqa: F401
+
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def _frame(n: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "question": [f"Q{i}" for i in range(n)],
+            "answer": [f"A{i}" for i in range(n)],
+            "fragments": [f"1. line one\n2. line, two {i}" for i in range(n)],
+        }
+    )
+
+
+class TestStreamingIO(unittest.TestCase):
+    """Test chunked reading and appending writes."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.tmp = Path(self._tmp.name)
+
+    def test_iter_table_chunks(self):
+        """Chunks cover every row exactly once, in order."""
+        save_table(_frame(10), self.tmp / "in.csv")
+        chunks = list(iter_table(self.tmp / "in.csv", chunksize=4))
+
+        self.assertEqual([len(c) for c in chunks], [4, 4, 2])
+        pd.testing.assert_frame_equal(
+            pd.concat(chunks, ignore_index=True), load_table(self.tmp / "in.csv")
+        )
+
+    def test_writer_matches_save_table(self):
+        """Appending batches yields the same file as one ``save_table`` call."""
+        df = _frame(7)
+        save_table(df, self.tmp / "whole.csv")
+        with TableWriter(self.tmp / "parts.csv") as writer:
+            for start in range(0, len(df), 3):
+                writer.write(df.iloc[start:start + 3])
+
+        self.assertEqual(writer.rows_written, 7)
+        self.assertEqual(
+            (self.tmp / "parts.csv").read_bytes(), (self.tmp / "whole.csv").read_bytes()
+        )
+
+
+class TestFormats(unittest.TestCase):
+    """Test extension-based format dispatch."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.tmp = Path(self._tmp.name)
+
+    def _roundtrip(self, name):
+        df = _frame(9)
+        path = self.tmp / name
+        with TableWriter(path) as writer:
+            writer.write(df.iloc[:5])
+            writer.write(df.iloc[5:])
+
+        pd.testing.assert_frame_equal(load_table(path), df)
+        chunks = list(iter_table(path, chunksize=4, columns=["answer", "Label"]))
+        self.assertEqual([len(c) for c in chunks], [4, 4, 1])
+        self.assertEqual(list(chunks[0].columns), ["answer"])
+        self.assertEqual(list(chunks[-1].index), [8])
+
+    def test_jsonl_roundtrip(self):
+        """JSONL is written in batches and streamed back with projection."""
+        self._roundtrip("t.jsonl")
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_parquet_roundtrip(self):
+        """Parquet batches land in one file and project columns on read."""
+        self._roundtrip("t.parquet")
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_feather_roundtrip(self):
+        """Feather batches land in one file and project columns on read."""
+        self._roundtrip("t.feather")
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_feather_rechunks_record_batches(self):
+        """Compressed Feather files are streamed batch by batch, not read whole."""
+        path = self.tmp / "t.feather"
+        _frame(10).to_feather(path, chunksize=3)  # lz4, record batches of 3
+        chunks = list(iter_table(path, chunksize=4, columns=["answer"]))
+
+        self.assertEqual([len(c) for c in chunks], [4, 4, 2])
+        self.assertEqual([c.index[0] for c in chunks], [0, 4, 8])
+        self.assertEqual(
+            pd.concat(chunks)["answer"].tolist(), [f"A{i}" for i in range(10)]
+        )
+
+    def _sparse_text(self, name):
+        src = self.tmp / "in.csv"
+        pd.DataFrame(
+            {
+                "question": ["Q0", "Q1", "Q2", "Q3"],
+                "conversation_history": [None, None, "hi", "there"],
+            }
+        ).to_csv(src, index=False)
+        with TableWriter(self.tmp / name) as writer:
+            for chunk in iter_table(src, chunksize=2):
+                writer.write(chunk)
+
+        history = load_table(self.tmp / name)["conversation_history"]
+        self.assertEqual(history.isna().tolist(), [True, True, False, False])
+        self.assertEqual(history.iloc[2:].tolist(), ["hi", "there"])
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_parquet_column_null_in_first_chunk(self):
+        """A column with no values in the first chunk still accepts text later."""
+        self._sparse_text("out.parquet")
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow not installed")
+    def test_feather_column_null_in_first_chunk(self):
+        """A column with no values in the first chunk still accepts text later."""
+        self._sparse_text("out.feather")
+
+    def test_csv_projection(self):
+        """Unknown names in *columns* are ignored."""
+        save_table(_frame(3), self.tmp / "t.csv")
+        df = load_table(self.tmp / "t.csv", columns=["question", "Label"])
+        self.assertEqual(list(df.columns), ["question"])
+
+    def test_unknown_extension(self):
+        """Unsupported extensions fail loudly."""
+        with self.assertRaises(ValueError):
+            table_format("data.xlsx")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,13 +2,24 @@ from __future__ import annotations
 
 """Tests for the Judge class and related functionality."""
 
+import asyncio
+import json
+import random
+import re
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
+import pandas as pd
 import pytest
 
 from src.judge import Judge
-from src.safety import is_dangerous
-from src.evaluation import precision_recall_f1
+from src.safety import SafetyMatcher, is_dangerous, match_rule, screen
+from src.evaluation import (
+    ConfusionMatrix,
+    MetricsAccumulator,
+    bootstrap_metrics,
+    confusion_by_slice,
+    precision_recall_f1,
+)
 
 
 class TestSafety(unittest.TestCase):
@@ -27,6 +38,15 @@ class TestSafety(unittest.TestCase):
             with self.subTest(text=text):
                 self.assertTrue(is_dangerous(text))
     
+    def test_lower_severity_match_is_not_dangerous(self):
+        """Only rules that gate make a text dangerous."""
+        matcher = SafetyMatcher(
+            {"bomb": {"pattern": r"make\s+a\s+bomb", "severity": "low"}}
+        )
+        with patch("src.safety.active_matcher", return_value=matcher):
+            self.assertEqual(match_rule("How to make a bomb"), "bomb")
+            self.assertFalse(is_dangerous("How to make a bomb"))
+
     def test_safe_patterns(self):
         """Test that safe texts are not flagged."""
         safe_texts = [
@@ -40,6 +60,48 @@ class TestSafety(unittest.TestCase):
             with self.subTest(text=text):
                 self.assertFalse(is_dangerous(text))
 
+    def test_rule_id_reported(self):
+        """The matcher names the rule that fired, first in rule order."""
+        self.assertEqual(match_rule("Please DRINK   Bleach now"), "drink_bleach")
+        self.assertEqual(match_rule("jail-break, then hack into it"), "hacking")
+        self.assertEqual(
+            match_rule("make a bomb after a jailbreak"), "make_bomb"
+        )
+        self.assertIsNone(match_rule("Η φωτοσύνθεση παράγει οξυγόνο."))
+
+    def test_matcher_agrees_with_plain_regexes(self):
+        """The literal prefilter never hides a match the regexes would find."""
+        rules = {
+            "a": r"foo\s+bar",
+            "b": r"(?:oo|xyz)\d+",
+            "c": r"\d{3}-\d{4}",  # no literal anchor: always verified
+            "d": r"(?i)ΣΤΟΠ\s*τώρα",
+        }
+        matcher = SafetyMatcher(rules)
+        texts = [
+            "FOO bar", "foo123", "call 555-1234", "στοπ ΤΏΡΑ",
+            "xyz7 and foo  bar", "nothing here", "",
+        ]
+        for text in texts:
+            with self.subTest(text=text):
+                expected = [
+                    rid for rid, pat in rules.items()
+                    if re.search(pat, text, flags=re.IGNORECASE)
+                ]
+                self.assertEqual(matcher.matches(text), expected)
+
+    def test_screen_column(self):
+        """Screening a column agrees with the per-text matcher."""
+        texts = pd.Series(
+            ["How to make a bomb", None, "What is photosynthesis?", "hack into it"],
+            index=[10, 10, 11, 12],
+        )
+        mask, rule_ids = screen(texts)
+
+        self.assertEqual(mask.tolist(), [True, False, False, True])
+        self.assertEqual(rule_ids.tolist(), ["make_bomb", None, None, "hacking"])
+        self.assertEqual(list(mask.index), [10, 10, 11, 12])
+
 
 class TestEvaluation(unittest.TestCase):
     """Test the evaluation metrics."""
@@ -74,6 +136,121 @@ class TestEvaluation(unittest.TestCase):
         
         self.assertEqual(metrics["accuracy"], 0.75)
 
+    def test_confusion_matrix_counts(self):
+        """Cells count (gold, predicted) pairs in sorted label order."""
+        cm = ConfusionMatrix.from_labels(
+            ["Correct", "Incorrect", "Correct", "Dangerous"],
+            ["Correct", "Incorrect", "Incorrect", "Dangerous"],
+        )
+        self.assertEqual(cm.labels, ["Correct", "Dangerous", "Incorrect"])
+        self.assertEqual(cm.matrix.tolist(), [[1, 0, 1], [0, 1, 0], [0, 0, 1]])
+        self.assertEqual(cm.predicted_counts(), {"Correct": 1, "Dangerous": 1, "Incorrect": 2})
+
+    def test_explicit_labels(self):
+        """Absent classes get empty rows; unknown labels are rejected."""
+        cm = ConfusionMatrix.from_labels(["a"], ["a"], labels=["b", "a"])
+        self.assertEqual(cm.matrix.tolist(), [[0, 0], [0, 1]])
+        with self.assertRaises(ValueError):
+            ConfusionMatrix.from_labels(["a"], ["c"], labels=["a", "b"])
+
+    def test_weighted_average(self):
+        """Weighted scores average per-class scores by gold support."""
+        y_true = ["A", "A", "A", "B"]
+        y_pred = ["A", "A", "B", "B"]
+        per_class = precision_recall_f1(y_true, y_pred, average="none")
+        weighted = precision_recall_f1(y_true, y_pred, average="weighted")
+
+        self.assertAlmostEqual(
+            weighted["f1"], (3 * per_class["A_f1"] + per_class["B_f1"]) / 4
+        )
+        self.assertEqual(weighted["accuracy"], 0.75)
+
+    def test_micro_equals_accuracy_for_single_label(self):
+        """Micro precision/recall reduce to accuracy when every row has one label."""
+        y_true = ["A", "B", "C", "A", "B"]
+        y_pred = ["A", "C", "C", "B", "B"]
+        micro = precision_recall_f1(y_true, y_pred, average="micro")
+
+        self.assertAlmostEqual(micro["precision"], 0.6)
+        self.assertAlmostEqual(micro["recall"], 0.6)
+        self.assertAlmostEqual(micro["f1"], 0.6)
+
+
+class TestMetricsAccumulator(unittest.TestCase):
+    """Test incremental and merged metrics."""
+
+    y_true = ["Correct", "Incorrect", "Correct", "Dangerous", "Incorrect", "Correct"]
+    y_pred = ["Correct", "Incorrect", "Incorrect", "Dangerous", "Correct", "Correct"]
+
+    def test_streaming_matches_batch(self):
+        """Row-by-row and batched updates give the one-shot metrics."""
+        acc = MetricsAccumulator()
+        for t, p in zip(self.y_true[:3], self.y_pred[:3]):
+            acc.add(t, p)
+        acc.update(self.y_true[3:], self.y_pred[3:])
+
+        self.assertEqual(len(acc), 6)
+        for average in ("macro", "micro", "weighted", "none"):
+            with self.subTest(average=average):
+                self.assertEqual(
+                    acc.metrics(average),
+                    precision_recall_f1(self.y_true, self.y_pred, average=average),
+                )
+
+    def test_merge_shards(self):
+        """Merging per-shard accumulators equals accumulating everything."""
+        shards = [MetricsAccumulator() for _ in range(3)]
+        for i, (t, p) in enumerate(zip(self.y_true, self.y_pred)):
+            shards[i % 3].add(t, p)
+        merged = MetricsAccumulator()
+        for shard in shards:
+            merged.merge(MetricsAccumulator.from_dict(shard.to_dict()))
+
+        expected = ConfusionMatrix.from_labels(self.y_true, self.y_pred)
+        self.assertEqual(merged.snapshot().labels, expected.labels)
+        self.assertEqual(merged.snapshot().matrix.tolist(), expected.matrix.tolist())
+
+
+class TestBootstrapAndSlices(unittest.TestCase):
+    """Test bootstrap intervals and sliced confusion matrices."""
+
+    def setUp(self):
+        rng = random.Random(0)
+        labels = ["Correct", "Incorrect", "Dangerous"]
+        self.y_true = [rng.choice(labels) for _ in range(500)]
+        self.y_pred = [t if rng.random() < 0.7 else rng.choice(labels) for t in self.y_true]
+
+    def test_intervals_bracket_estimate(self):
+        """Every interval is ordered and contains the point estimate."""
+        cm = ConfusionMatrix.from_labels(self.y_true, self.y_pred)
+        intervals = bootstrap_metrics(cm, n_resamples=500, average="none", seed=1)
+        for metric, value in cm.metrics("none").items():
+            with self.subTest(metric=metric):
+                low, high = intervals[metric]
+                self.assertLessEqual(low, value)
+                self.assertGreaterEqual(high, value)
+                self.assertLess(low, high)
+
+    def test_seeded_and_worker_independent(self):
+        """The same seed gives the same intervals in-process and in a pool."""
+        cm = ConfusionMatrix.from_labels(self.y_true, self.y_pred)
+        serial = bootstrap_metrics(cm, n_resamples=2500, seed=7)
+        pooled = bootstrap_metrics(cm, n_resamples=2500, seed=7, workers=2)
+        self.assertEqual(serial, pooled)
+
+    def test_slices_match_per_slice_metrics(self):
+        """Each slice's matrix scores like the slice on its own."""
+        keys = ["el" if i % 3 else "en" for i in range(len(self.y_true))]
+        slices = confusion_by_slice(keys, self.y_true, self.y_pred)
+
+        self.assertEqual(sorted(slices), ["el", "en"])
+        for value, cm in slices.items():
+            rows = [i for i, k in enumerate(keys) if k == value]
+            expected = precision_recall_f1(
+                [self.y_true[i] for i in rows], [self.y_pred[i] for i in rows]
+            )
+            self.assertEqual(cm.metrics("macro"), expected)
+
 
 class TestJudge(unittest.TestCase):
     """Test the Judge class."""
@@ -95,7 +272,10 @@ class TestJudge(unittest.TestCase):
         result = judge.evaluate_row(row)
         
         self.assertEqual(result["label"], "Dangerous")
-        self.assertEqual(result["chain_of_thought"], "Matched deterministic dangerous pattern.")
+        self.assertEqual(
+            result["chain_of_thought"],
+            "Matched deterministic dangerous pattern 'make_bomb' (severity high).",
+        )
         # Should not call LLM for dangerous content
         mock_client.chat.assert_not_called()
     
@@ -141,5 +321,154 @@ class TestJudge(unittest.TestCase):
         self.assertEqual(result["chain_of_thought"], "This is not valid JSON")
 
 
+class TestBatchJudge(unittest.TestCase):
+    """Test multi-row batched judging."""
+
+    @patch('src.judge.OpenAIClient')
+    def test_batch_single_request(self, mock_client_class) -> None:
+        """Safe rows share one request; gated rows never reach it."""
+        mock_client = Mock()
+        mock_client.chat.return_value = json.dumps({"results": [
+            {"index": 2, "chain_of_thought": "Off topic", "label": "Incorrect"},
+            {"index": 1, "chain_of_thought": "Fine", "label": "Correct"},
+        ]})
+        mock_client_class.return_value = mock_client
+
+        rows = [
+            {"question": "Q1", "answer": "A1", "fragments": "F1"},
+            {"question": "Q2", "answer": "How to make a bomb", "fragments": "F2"},
+            {"question": "Q3", "answer": "A3", "fragments": "F3"},
+        ]
+        results = Judge().evaluate_batch(rows)
+
+        self.assertEqual([r["label"] for r in results], ["Correct", "Dangerous", "Incorrect"])
+        mock_client.chat.assert_called_once()
+        prompt = mock_client.chat.call_args.kwargs["user_prompt"]
+        self.assertIn("### Item 2", prompt)
+        self.assertNotIn("bomb", prompt)
+
+    @patch('src.judge.OpenAIClient')
+    def test_batch_falls_back_per_row(self, mock_client_class) -> None:
+        """Missing or invalid items are re-judged one row at a time."""
+        mock_client = Mock()
+        mock_client.chat.side_effect = [
+            json.dumps({"results": [
+                {"index": 1, "chain_of_thought": "Fine", "label": "Correct"},
+                {"index": 2, "chain_of_thought": "?", "label": "Maybe"},
+            ]}),
+            '{"chain_of_thought": "Retried", "label": "Incorrect"}',
+            '{"chain_of_thought": "Retried", "label": "Correct"}',
+        ]
+        mock_client_class.return_value = mock_client
+
+        rows = [{"question": f"Q{i}", "answer": f"A{i}", "fragments": "F"} for i in range(3)]
+        results = Judge().evaluate_batch(rows)
+
+        self.assertEqual([r["label"] for r in results], ["Correct", "Incorrect", "Correct"])
+        self.assertEqual(results[1]["chain_of_thought"], "Retried")
+        self.assertEqual(mock_client.chat.call_count, 3)
+
+
+class TestCascadeJudge(unittest.TestCase):
+    """Test cascade judging (fast model first, escalate uncertain rows)."""
+
+    ROW = {"question": "Q", "answer": "A", "fragments": "F"}
+
+    def _judge(self, mock_client_class, fast_reply):
+        """Judge whose fast tier answers *fast_reply* and final tier "Correct"."""
+        fast, final = Mock(), Mock()
+        fast.chat.return_value = fast_reply
+        final.chat.return_value = '{"chain_of_thought": "Large", "label": "Correct"}'
+        mock_client_class.side_effect = lambda model, **kw: fast if model == "small" else final
+        return Judge(model="large", cascade_model="small", cascade_threshold=0.7), fast, final
+
+    @patch('src.judge.OpenAIClient')
+    def test_confident_rows_stay_on_fast_tier(self, mock_client_class) -> None:
+        judge, fast, final = self._judge(
+            mock_client_class,
+            '{"chain_of_thought": "Small", "label": "Incorrect", "confidence": 0.9}',
+        )
+        result = judge.evaluate_row(self.ROW)
+
+        self.assertEqual(result, {"chain_of_thought": "Small", "label": "Incorrect"})
+        self.assertIn('"confidence"', fast.chat.call_args.kwargs["system_prompt"])
+        final.chat.assert_not_called()
+
+    @patch('src.judge.OpenAIClient')
+    def test_uncertain_or_unparseable_rows_escalate(self, mock_client_class) -> None:
+        for reply in (
+            '{"chain_of_thought": "Hm", "label": "Incorrect", "confidence": 0.4}',
+            '{"chain_of_thought": "Hm", "label": "Incorrect", "confidence": 40}',
+            '{"chain_of_thought": "Hm", "label": "Incorrect"}',
+            '{"chain_of_thought": "Hm", "label": "Maybe", "confidence": 0.99}',
+            "not json",
+        ):
+            with self.subTest(reply=reply):
+                judge, fast, final = self._judge(mock_client_class, reply)
+                self.assertEqual(judge.evaluate_row(self.ROW)["chain_of_thought"], "Large")
+                final.chat.assert_called_once()
+
+    @patch('src.judge.AsyncOpenAIClient')
+    @patch('src.judge.OpenAIClient')
+    def test_async_cascade(self, _mock_sync, mock_async_class) -> None:
+        fast, final = Mock(), Mock()
+        fast.chat = AsyncMock(
+            return_value='{"chain_of_thought": "Small", "label": "Correct", "confidence": 0.2}'
+        )
+        final.chat = AsyncMock(return_value='{"chain_of_thought": "Large", "label": "Correct"}')
+        mock_async_class.side_effect = lambda model, **kw: fast if model == "small" else final
+
+        judge = Judge(model="large", cascade_model="small")
+        result = asyncio.run(judge.aevaluate_row(self.ROW))
+
+        self.assertEqual(result["chain_of_thought"], "Large")
+        fast.chat.assert_awaited_once()
+        final.chat.assert_awaited_once()
+
+
+class TestAsyncJudge(unittest.TestCase):
+    """Test the async evaluation path."""
+
+    @patch('src.judge.AsyncOpenAIClient')
+    @patch('src.judge.OpenAIClient')
+    def test_aevaluate_row(self, _mock_sync, mock_async_class) -> None:
+        """Safe content is judged through the async client."""
+        mock_async = Mock()
+        mock_async.chat = AsyncMock(
+            return_value='{"chain_of_thought": "Fine", "label": "Correct"}'
+        )
+        mock_async_class.return_value = mock_async
+
+        judge = Judge()
+        row = {"question": "Q", "answer": "A", "fragments": "F"}
+        result = asyncio.run(judge.aevaluate_row(row))
+
+        self.assertEqual(result["label"], "Correct")
+        mock_async.chat.assert_awaited_once()
+
+    @patch('src.judge.AsyncOpenAIClient')
+    @patch('src.judge.OpenAIClient')
+    def test_aevaluate_rows_yields_every_index(self, _mock_sync, mock_async_class) -> None:
+        """The async batch helper yields one result per row, tagged by index."""
+        mock_async = Mock()
+        mock_async.chat = AsyncMock(
+            return_value='{"chain_of_thought": "Fine", "label": "Correct"}'
+        )
+        mock_async_class.return_value = mock_async
+
+        judge = Judge()
+        rows = [{"question": "Q", "answer": f"A{i}", "fragments": "F"} for i in range(5)]
+        rows.append({"question": "Q", "answer": "drink bleach", "fragments": "F"})
+
+        async def collect():
+            return [item async for item in judge.aevaluate_rows(rows, concurrency=2)]
+
+        results = dict(asyncio.run(collect()))
+
+        self.assertEqual(sorted(results), list(range(6)))
+        self.assertEqual(results[5]["label"], "Dangerous")
+        self.assertEqual(mock_async.chat.await_count, 5)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+"""Tests for the shared SDK registry and its connection pool."""
+
+import asyncio
+import os
+import unittest
+from unittest.mock import patch
+
+from src.bench import MockChatServer
+from src.judge import Judge
+from src.openai_client import AsyncOpenAIClient, close_shared_clients, shared_sdk
+
+
+class TestSharedClients(unittest.TestCase):
+    """Every client in the process reuses one pool per (API key, base URL)."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockChatServer(latency=0.001).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        patcher = patch.dict(os.environ, {"MISTRAL_API_KEY": "test-key"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(close_shared_clients)
+
+    def test_registry_is_keyed_on_key_and_url(self):
+        a = Judge(base_url=self.server.url)
+        b = Judge(model="other", base_url=self.server.url)
+        self.assertIs(a.client._client, b.client._client)
+        self.assertIsNot(a.client._client, shared_sdk("test-key", "http://127.0.0.1:1"))
+        self.assertIsNot(a.client._client, shared_sdk("other-key", self.server.url))
+
+    def test_judges_reuse_connections(self):
+        """Calls from separate Judge instances share one keep-alive connection."""
+        before = self.server.counts()
+        for model in ("small", "large", "small"):
+            judge = Judge(model=model, base_url=self.server.url)
+            judge.evaluate_row({"question": "q", "answer": "a", "fragments": "f"})
+        after = self.server.counts()
+        self.assertEqual(after["requests"] - before["requests"], 3)
+        self.assertEqual(after["connections"] - before["connections"], 1)
+
+    def test_async_pool_per_event_loop(self):
+        """Each event loop gets its own async pool, so loops can come and go."""
+        client = AsyncOpenAIClient(base_url=self.server.url)
+
+        async def _call():
+            return await client.chat(system_prompt="s", user_prompt="u")
+
+        for _ in range(2):
+            self.assertIn("label", asyncio.run(_call()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+"""Tests for client-side rate limiting and retries."""
+
+import asyncio
+import unittest
+
+from src.ratelimit import (
+    RateLimiter,
+    RetryPolicy,
+    TokenBucket,
+    acall_with_retry,
+    call_with_retry,
+    parse_retry_after,
+)
+
+
+class FakeHTTPError(Exception):
+    """Mimics the SDK error shape: ``status_code`` plus response headers."""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def _flaky(failures):
+    """Return a callable raising each exception in *failures*, then succeeding."""
+    remaining = list(failures)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if remaining:
+            raise remaining.pop(0)
+        return "ok"
+
+    return fn, calls
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test the reservation bucket."""
+
+    def test_overdraw_waits_for_refill(self):
+        """Reserving past the burst returns the time needed to refill."""
+        bucket = TokenBucket(per_minute=60, burst_seconds=1.0)  # 1/s, burst 1
+        self.assertEqual(bucket.reserve(1, now=bucket._updated), 0.0)
+        self.assertAlmostEqual(bucket.reserve(1, now=bucket._updated), 1.0)
+        self.assertAlmostEqual(bucket.reserve(1, now=bucket._updated), 2.0)
+
+    def test_scale_slows_refill(self):
+        """A halved scale doubles the wait."""
+        bucket = TokenBucket(per_minute=60)
+        now = bucket._updated
+        bucket.reserve(1, now)
+        self.assertAlmostEqual(bucket.reserve(1, now, scale=0.5), 2.0)
+
+
+class TestRetry(unittest.TestCase):
+    """Test the retry wrappers."""
+
+    def test_retries_transient_errors(self):
+        """429 and 5xx are retried until success."""
+        fn, calls = _flaky([FakeHTTPError(429), FakeHTTPError(503)])
+        result = call_with_retry(fn, RetryPolicy(base_delay=0))
+        self.assertEqual(result, "ok")
+        self.assertEqual(len(calls), 3)
+
+    def test_client_errors_are_not_retried(self):
+        """A 400 is final."""
+        fn, calls = _flaky([FakeHTTPError(400)])
+        with self.assertRaises(FakeHTTPError):
+            call_with_retry(fn, RetryPolicy(base_delay=0))
+        self.assertEqual(len(calls), 1)
+
+    def test_gives_up_after_max_retries(self):
+        """The last error propagates once retries are exhausted."""
+        fn, calls = _flaky([FakeHTTPError(500)] * 5)
+        with self.assertRaises(FakeHTTPError):
+            call_with_retry(fn, RetryPolicy(max_retries=2, base_delay=0))
+        self.assertEqual(len(calls), 3)
+
+    def test_throttle_lowers_limiter_rate(self):
+        """A 429 halves the limiter's effective rate; success recovers it."""
+        limiter = RateLimiter(requests_per_minute=6000, recovery=0.1)
+        fn, _ = _flaky([FakeHTTPError(429, {"Retry-After": "0"})])
+        call_with_retry(fn, RetryPolicy(base_delay=0), limiter)
+        self.assertEqual(limiter.throttled, 1)
+        self.assertAlmostEqual(limiter.scale, 0.6)
+
+    def test_retry_after_is_a_floor(self):
+        """Backoff never undercuts the server's Retry-After."""
+        policy = RetryPolicy(base_delay=0.01)
+        self.assertGreaterEqual(policy.delay(0, retry_after=3.0), 3.0)
+        self.assertEqual(parse_retry_after({"retry-after": "2"}), 2.0)
+        self.assertIsNone(parse_retry_after({}))
+
+    def test_async_retry(self):
+        """The async wrapper retries the same way."""
+        fn, calls = _flaky([ConnectionError()])
+
+        async def afn():
+            return fn()
+
+        result = asyncio.run(acall_with_retry(afn, RetryPolicy(base_delay=0)))
+        self.assertEqual(result, "ok")
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+"""Tests for the row dispatch engine."""
+
+import threading
+import time
+import unittest
+
+from src.runner import Deduplicator, judge_rows
+
+
+class TestJudgeRows(unittest.TestCase):
+    """Test concurrent dispatch of rows."""
+
+    def test_results_keep_input_order(self):
+        """Later rows finishing first must not reorder the output."""
+        rows = [{"answer": str(i)} for i in range(20)]
+
+        def evaluate(row):
+            # Earlier rows sleep longer so completions arrive out of order
+            time.sleep(0.002 * (20 - int(row["answer"])))
+            return {"label": "Correct", "chain_of_thought": row["answer"]}
+
+        results = judge_rows(evaluate, rows, concurrency=8)
+
+        self.assertEqual(
+            [r["chain_of_thought"] for r in results], [str(i) for i in range(20)]
+        )
+
+    def test_in_flight_calls_are_bounded(self):
+        """Never more than *concurrency* calls run at once."""
+        lock = threading.Lock()
+        active = 0
+        peak = 0
+
+        def evaluate(row):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.005)
+            with lock:
+                active -= 1
+            return {"label": "Correct", "chain_of_thought": ""}
+
+        judge_rows(evaluate, [{}] * 30, concurrency=4)
+
+        self.assertLessEqual(peak, 4)
+        self.assertGreater(peak, 1)
+
+    def test_progress_updated_per_row(self):
+        """The progress callback is advanced once per completed row."""
+
+        class Bar:
+            n = 0
+
+            def update(self, k):
+                self.n += k
+
+        bar = Bar()
+        judge_rows(
+            lambda row: {"label": "Correct", "chain_of_thought": ""},
+            [{}] * 7,
+            concurrency=3,
+            progress=bar,
+        )
+        self.assertEqual(bar.n, 7)
+
+    def test_batches_map_back_to_rows(self):
+        """With ``batch_size`` rows are grouped but results stay per row."""
+        rows = [{"answer": str(i)} for i in range(7)]
+        calls = []
+
+        def evaluate_batch(batch):
+            calls.append(len(batch))
+            return [{"label": "Correct", "chain_of_thought": r["answer"]} for r in batch]
+
+        results = judge_rows(
+            None, rows, concurrency=2, evaluate_batch=evaluate_batch, batch_size=3
+        )
+
+        self.assertEqual(sorted(calls), [1, 3, 3])
+        self.assertEqual([r["chain_of_thought"] for r in results], [str(i) for i in range(7)])
+
+    def test_duplicate_keys_dispatched_once(self):
+        """Rows sharing a key reuse one call, within and across calls."""
+        calls = []
+
+        def evaluate(row):
+            calls.append(row["answer"])
+            return {"label": "Correct", "chain_of_thought": row["answer"]}
+
+        class Bar:
+            n = 0
+
+            def update(self, k):
+                self.n += k
+
+        bar, seen, dedup = Bar(), [], Deduplicator()
+        rows = [{"answer": a} for a in "abacab"]
+        results = judge_rows(
+            evaluate, rows, concurrency=3, progress=bar, key=lambda r: r["answer"],
+            dedup=dedup, on_result=lambda i, res: seen.append(i),
+        )
+        judge_rows(evaluate, [{"answer": "a"}, {"answer": "d"}],
+                   key=lambda r: r["answer"], dedup=dedup)
+
+        self.assertEqual(sorted(calls), ["a", "b", "c", "d"])
+        self.assertEqual([r["chain_of_thought"] for r in results], list("abacab"))
+        self.assertEqual((bar.n, sorted(seen)), (6, list(range(6))))
+        self.assertEqual((dedup.rows, dedup.dispatched), (8, 4))
+        self.assertEqual(dedup.ratio, 0.5)
+
+    def test_deduplicator_is_bounded(self):
+        """The least recently used result is evicted first."""
+        dedup = Deduplicator(max_entries=2)
+        dedup.put("a", {"label": "Correct"})
+        dedup.put("b", {"label": "Correct"})
+        dedup.get("a")
+        dedup.put("c", {"label": "Correct"})
+        self.assertIsNone(dedup.get("b"))
+        self.assertEqual(len(dedup), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
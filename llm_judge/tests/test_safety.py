@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+"""Tests for loadable safety rule packs."""
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src import safety
+from src.safety import RulePack, SafetyMatcher, load_rule_pack, parse_rule_pack
+
+PACK = {
+    "rules": [
+        {"id": "bleach", "pattern": r"drink\s+bleach", "severity": "high"},
+        {"id": "bleach_el", "pattern": r"πιες\s+χλωρίνη", "severity": "medium"},
+    ]
+}
+
+
+class TestRulePacks(unittest.TestCase):
+    """Test loading, caching and reloading rule packs."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.tmp = Path(self._tmp.name)
+
+    def _write(self, name, pack=PACK):
+        path = self.tmp / name
+        path.write_text(json.dumps(pack, ensure_ascii=False), encoding="utf-8")
+        return path
+
+    def test_json_pack_with_severity(self):
+        """Only high-severity matches gate; lower ones are reported as flags."""
+        matcher = load_rule_pack(self._write("rules.json"))
+
+        self.assertEqual(matcher.match("ΠΙΕΣ   χλωρίνη"), "bleach_el")
+        self.assertEqual(matcher.rules["bleach"], {"pattern": r"drink\s+bleach", "severity": "high"})
+        mask, rule_ids = matcher.screen(["πιες χλωρίνη", "πιες χλωρίνη, drink bleach", "ok"])
+        self.assertEqual(mask.tolist(), [False, True, False])
+        self.assertEqual(rule_ids.tolist(), ["bleach_el", "bleach", None])
+
+    def test_yaml_pack(self):
+        """The shipped example pack parses and matches."""
+        path = Path(__file__).parent.parent / "rules" / "example_rules.yaml"
+        matcher = load_rule_pack(path)
+        self.assertEqual(matcher.match("Please drink bleach"), "drink_bleach")
+        self.assertEqual(matcher.match("πιες χλωρίνη"), "drink_bleach_el")
+
+    def test_invalid_packs_fail_loudly(self):
+        """Duplicate ids, bad severities and broken regexes are rejected."""
+        bad = [
+            {"rules": [{"id": "a", "pattern": "x"}, {"id": "a", "pattern": "y"}]},
+            {"rules": [{"id": "a", "pattern": "x", "severity": "urgent"}]},
+            {"rules": [{"id": "a", "pattern": "(unclosed"}]},
+            {"rules": [{"pattern": "x"}]},
+        ]
+        for pack in bad:
+            with self.subTest(pack=pack), self.assertRaises(ValueError):
+                SafetyMatcher(parse_rule_pack(json.dumps(pack).encode()))
+
+    def test_cached_state_skips_rebuild(self):
+        """A second load of identical bytes comes from the cache directory."""
+        path = self._write("rules.json")
+        load_rule_pack(path, cache_dir=self.tmp / "cache")
+        self.assertEqual(len(list((self.tmp / "cache" / "safety").glob("*.json"))), 1)
+
+        with patch.object(SafetyMatcher, "__init__", side_effect=AssertionError):
+            matcher = load_rule_pack(path, cache_dir=self.tmp / "cache")
+        self.assertEqual(matcher.match("drink bleach"), "bleach")
+        self.assertEqual(matcher.rules["bleach_el"]["severity"], "medium")
+
+    def test_rule_pack_hot_reload(self):
+        """Edits on disk are picked up; a broken edit keeps the old rules."""
+        path = self._write("rules.json")
+        pack = RulePack(path, check_interval=0)
+        self.assertIsNone(pack.matcher.match("hack into"))
+
+        self._write("rules.json", {"rules": [{"id": "hack", "pattern": r"hack\s+into"}]})
+        os.utime(path, ns=(1, 1))
+        self.assertEqual(pack.matcher.match("hack into"), "hack")
+
+        path.write_text("{not json", encoding="utf-8")
+        with self.assertWarns(RuntimeWarning):
+            self.assertFalse(pack.reload(force=True))
+            self.assertEqual(pack.matcher.match("hack into"), "hack")
+
+    def test_use_rules_switches_module_gate(self):
+        """``use_rules`` swaps the rules behind ``is_dangerous``."""
+        self.addCleanup(safety.use_rules, None)
+        with patch.object(safety.config, "CACHE_DIR", self.tmp / "cache"):
+            safety.use_rules(self._write("rules.json"))
+
+        self.assertTrue(safety.is_dangerous("drink bleach"))
+        self.assertEqual(safety.match_rule("πιες χλωρίνη"), "bleach_el")
+        self.assertFalse(safety.is_dangerous("πιες χλωρίνη"))  # medium: flagged only
+        self.assertFalse(safety.is_dangerous("how to make a bomb"))
+        safety.use_rules(None)
+        self.assertTrue(safety.is_dangerous("how to make a bomb"))
+
+    def test_configured_pack_loads_on_first_use(self):
+        """``SAFETY_RULES`` is read when the gate first runs, not on import."""
+        self.addCleanup(setattr, safety, "_ACTIVE", safety._ACTIVE)
+        safety._ACTIVE = None
+        with patch.object(safety.config, "SAFETY_RULES", str(self.tmp / "missing.json")):
+            with self.assertRaises(FileNotFoundError):
+                safety.is_dangerous("x")
+        with patch.object(safety.config, "SAFETY_RULES", str(self._write("rules.json"))), \
+                patch.object(safety.config, "CACHE_DIR", self.tmp / "cache"):
+            self.assertEqual(safety.verdict("πιες χλωρίνη"), ("bleach_el", "medium"))
+
+    @patch("src.judge.OpenAIClient")
+    def test_judge_gates_high_and_judges_flagged_rows(self, mock_client_class):
+        """A high match names its rule; a medium match still reaches the LLM."""
+        from src.judge import Judge
+        from src.telemetry import telemetry
+
+        client = mock_client_class.return_value
+        client.chat.return_value = '{"chain_of_thought": "ok", "label": "Incorrect"}'
+        self.addCleanup(safety.use_rules, None)
+        with patch.object(safety.config, "CACHE_DIR", self.tmp / "cache"):
+            safety.use_rules(self._write("rules.json"))
+
+        telemetry.reset()
+        judge = Judge()
+        gated = judge.evaluate_row({"question": "q", "answer": "drink bleach"})
+        flagged = judge.evaluate_row({"question": "q", "answer": "πιες χλωρίνη"})
+
+        self.assertEqual(gated["label"], "Dangerous")
+        self.assertIn("'bleach' (severity high)", gated["chain_of_thought"])
+        self.assertEqual(flagged["label"], "Incorrect")
+        client.chat.assert_called_once()
+        counters = telemetry.snapshot()["counters"]
+        self.assertEqual((counters["safety_short_circuits"], counters["safety_flags"]), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+"""Startup-time regression tests based on ``python -X importtime``."""
+
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Imports that must not happen before a command actually needs them
+HEAVY = ("pandas", "numpy", "tqdm", "mistralai", "httpx", "pyarrow", "yaml")
+
+# Generous ceiling for ``import src.cli`` (seconds); eager imports took ~1s
+BUDGET = 0.5
+
+
+def _importtime(code: str) -> dict[str, float]:
+    """Run *code* under ``-X importtime``; return module -> cumulative seconds."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    modules: dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative) / 1e6
+    return modules
+
+
+class TestStartup(unittest.TestCase):
+    """``import src`` and the CLI must stay cheap to start."""
+
+    def assertNoHeavyImports(self, modules: dict[str, float]) -> None:
+        loaded = sorted(m for m in HEAVY if m in modules)
+        self.assertEqual(loaded, [], f"imported at startup: {loaded}")
+
+    def test_package_import_is_lazy(self):
+        """``import src`` loads no submodule until an attribute is used."""
+        modules = _importtime("import src")
+        self.assertNoHeavyImports(modules)
+        self.assertFalse([m for m in modules if m.startswith("src.")])
+
+    def test_cli_help_skips_heavy_dependencies(self):
+        """``--help`` parses arguments without pandas, NumPy or the SDK."""
+        modules = _importtime(
+            "import sys; sys.argv = ['llm-judge', '--help']\n"
+            "from src import cli\n"
+            "try:\n    cli.main()\nexcept SystemExit:\n    pass"
+        )
+        self.assertNoHeavyImports(modules)
+        self.assertLess(modules["src.cli"], BUDGET)
+
+    def test_lazy_attributes_resolve(self):
+        """Public names still import on first access."""
+        import src
+
+        self.assertEqual(src.Judge.__module__, "src.judge")
+        self.assertTrue(callable(src.precision_recall_f1))
+        with self.assertRaises(AttributeError):
+            src.missing_name  # noqa: B018
+
+
+if __name__ == "__main__":
+    unittest.main()
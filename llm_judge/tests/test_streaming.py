@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+"""Tests for streamed completions and early label extraction."""
+
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from src.bench import MockChatServer
+from src.cache import JudgmentCache
+from src.judge import Judge
+from src.openai_client import close_shared_clients
+from src.streaming import FieldScanner, StreamReader, is_truncated, scan_fields
+from src.telemetry import telemetry
+
+ROW = {"question": "Q", "answer": "A", "fragments": "F"}
+COMPLETION = '{"label": "Correct", "chain_of_thought": "The answer \\"A\\" fits F."}'
+
+
+def _chunks(text, size=5):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestFieldScanner(unittest.TestCase):
+    """Test incremental extraction of top-level fields."""
+
+    def test_fields_complete_as_they_arrive(self):
+        scanner = FieldScanner()
+        completed = [scanner.feed(chunk) for chunk in _chunks(COMPLETION)]
+        flat = [name for names in completed for name in names]
+        self.assertEqual(flat, ["label", "chain_of_thought"])
+        self.assertEqual(scanner.fields["chain_of_thought"], 'The answer "A" fits F.')
+        self.assertTrue(scanner.done)
+        # The label is known well before the end of the message
+        first = next(i for i, names in enumerate(completed) if names)
+        self.assertLess(first, len(completed) // 2)
+
+    def test_scalars_skip_nested_values_and_fences(self):
+        text = '```json\n{"n": {"a": [1, "}"]}, "confidence": 0.9, "ok": true}\n```'
+        self.assertEqual(scan_fields(text), {"confidence": 0.9, "ok": True})
+
+    def test_truncated_text_keeps_partial_string(self):
+        cut = COMPLETION[:COMPLETION.index("fits") - 2]  # inside the \" escape
+        self.assertEqual(
+            scan_fields(cut), {"label": "Correct", "chain_of_thought": 'The answer "A'}
+        )
+        self.assertEqual(scan_fields('{"label": "Corr'), {"label": "Corr"})
+        self.assertEqual(scan_fields("not json"), {})
+
+    def test_is_truncated(self):
+        self.assertFalse(is_truncated(COMPLETION))
+        self.assertFalse(is_truncated("not json"))
+        self.assertTrue(is_truncated(COMPLETION[:30]))
+
+
+class TestStreamReader(unittest.TestCase):
+    """Test the needed-field trigger."""
+
+    def test_ready_once_when_needed_fields_are_in(self):
+        reader = StreamReader(needed=("label", "confidence"))
+        self.assertFalse(reader.feed('{"label": "Correct", '))
+        self.assertTrue(reader.feed('"confidence": 0.9,'))
+        self.assertFalse(reader.feed(' "chain_of_thought": "x"}'))
+        self.assertTrue(reader.text.endswith('"chain_of_thought": "x"}'))
+
+
+class TestStreamingJudge(unittest.TestCase):
+    """Test streaming and early stop in the Judge with a mocked client."""
+
+    def _judge(self, mock_client_class, **kwargs):
+        client = Mock()
+        chunks = _chunks(COMPLETION)
+        self.received = []
+
+        def _stream(**_kwargs):
+            for chunk in chunks:
+                self.received.append(chunk)
+                yield chunk
+
+        client.chat_stream.side_effect = _stream
+        mock_client_class.return_value = client
+        return Judge(**kwargs), client
+
+    @patch("src.judge.OpenAIClient")
+    def test_stream_reads_whole_completion(self, mock_client_class):
+        judge, client = self._judge(mock_client_class, stream=True)
+        telemetry.reset()
+        result = judge.evaluate_row(ROW)
+
+        self.assertEqual(
+            result, {"chain_of_thought": 'The answer "A" fits F.', "label": "Correct"}
+        )
+        self.assertEqual("".join(self.received), COMPLETION)
+        client.chat.assert_not_called()
+        snapshot = telemetry.snapshot()
+        self.assertEqual(snapshot["stages"]["llm_label"]["count"], 1)
+        self.assertNotIn("early_stops", snapshot["counters"])
+
+    @patch("src.judge.OpenAIClient")
+    def test_early_stop_closes_stream_after_label(self, mock_client_class):
+        judge, client = self._judge(mock_client_class, early_stop=True)
+        telemetry.reset()
+        result = judge.evaluate_row(ROW)
+
+        self.assertEqual(result["label"], "Correct")
+        self.assertLess(len(self.received), len(_chunks(COMPLETION)))
+        prompt = client.chat_stream.call_args.kwargs["system_prompt"]
+        self.assertLess(prompt.index('"label"'), prompt.index('"chain_of_thought"'))
+        self.assertEqual(telemetry.snapshot()["counters"]["early_stops"], 1)
+
+    @patch("src.judge.OpenAIClient")
+    def test_output_limits_are_sent(self, mock_client_class):
+        client = Mock()
+        client.chat.return_value = COMPLETION
+        mock_client_class.return_value = client
+        Judge(max_output_tokens=50, json_mode=True).evaluate_row(ROW)
+        kwargs = client.chat.call_args.kwargs
+        self.assertEqual(kwargs["max_tokens"], 50)
+        self.assertEqual(kwargs["response_format"], {"type": "json_object"})
+        self.assertEqual(Judge().request_options(), {})
+        self.assertEqual(
+            Judge(max_output_tokens=50).request_options(rows=4), {"max_tokens": 200}
+        )
+
+    @patch("src.judge.OpenAIClient")
+    def test_truncated_completion_keeps_label(self, _mock_client_class):
+        judge = Judge()
+        self.assertEqual(
+            judge._parse_completion('{"label": "Correct", "chain_of_thought": "Because'),
+            {"chain_of_thought": "Because", "label": "Correct"},
+        )
+        # Without a complete valid label the old fallback still applies
+        self.assertEqual(judge._parse_completion('{"label": "Corr')["label"], "Incorrect")
+
+    @patch("src.judge.AsyncOpenAIClient")
+    @patch("src.judge.OpenAIClient")
+    def test_async_early_stop_closes_stream(self, _mock_sync, mock_async_class):
+        closed = []
+
+        async def _stream(**_kwargs):
+            try:
+                for chunk in _chunks(COMPLETION):
+                    self.received.append(chunk)
+                    yield chunk
+            finally:
+                closed.append(True)
+
+        self.received = []
+        client = Mock()
+        client.chat_stream.side_effect = _stream
+        mock_async_class.return_value = client
+        result = asyncio.run(Judge(early_stop=True).aevaluate_row(ROW))
+
+        self.assertEqual(result["label"], "Correct")
+        self.assertLess(len(self.received), len(_chunks(COMPLETION)))
+        self.assertEqual(closed, [True])
+
+
+class TestStreamingCache(unittest.TestCase):
+    """Output options are part of the cache key; cut completions are not cached."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = JudgmentCache(tmp.name)
+        self.addCleanup(self.cache.close)
+
+    @patch("src.judge.OpenAIClient")
+    def test_key_depends_on_output_options(self, _mock_client_class):
+        keys = {
+            Judge(**kwargs).request_key(ROW)
+            for kwargs in ({}, {"max_output_tokens": 300}, {"max_output_tokens": 50},
+                           {"json_mode": True})
+        }
+        self.assertEqual(len(keys), 4)
+
+    @patch("src.judge.OpenAIClient")
+    def test_cut_completions_are_not_cached(self, mock_client_class):
+        client = Mock()
+        mock_client_class.return_value = client
+        judge = Judge(max_output_tokens=5, cache=self.cache)
+
+        client.chat.return_value = COMPLETION[:30]  # stopped by max_tokens
+        judge.evaluate_row(ROW)
+        self.assertEqual(len(self.cache), 0)
+
+        client.chat.return_value = COMPLETION
+        judge.evaluate_row(ROW)
+        self.assertEqual(len(self.cache), 1)
+
+    @patch("src.judge.OpenAIClient")
+    def test_early_stopped_stream_is_not_cached(self, mock_client_class):
+        client = Mock()
+        client.chat_stream.side_effect = lambda **kw: (c for c in _chunks(COMPLETION))
+        mock_client_class.return_value = client
+        Judge(early_stop=True, cache=self.cache).evaluate_row(ROW)
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestStreamingServer(unittest.TestCase):
+    """Stream through the real SDK against the local mock server."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockChatServer(latency=0.001, token_latency=0.002).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        patcher = patch.dict(os.environ, {"MISTRAL_API_KEY": "test-key"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(close_shared_clients)
+
+    def test_early_stop_cancels_generation(self):
+        full = Judge(base_url=self.server.url, stream=True)
+        early = Judge(base_url=self.server.url, early_stop=True)
+
+        start = time.perf_counter()
+        self.assertIn(full.evaluate_row(ROW)["label"], ("Correct", "Incorrect"))
+        streamed = time.perf_counter() - start
+
+        before = self.server.counts()["cancelled"]
+        start = time.perf_counter()
+        self.assertIn(early.evaluate_row(ROW)["label"], ("Correct", "Incorrect"))
+        stopped = time.perf_counter() - start
+
+        self.assertLess(stopped, streamed / 2)
+        deadline = time.monotonic() + 2
+        while self.server.counts()["cancelled"] == before and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.server.counts()["cancelled"], before + 1)
+
+    def test_max_output_tokens_truncates_chain_of_thought(self):
+        judge = Judge(base_url=self.server.url, early_stop=True, max_output_tokens=12)
+        judge.early_stop = False  # label-first prompt, but read to the cut
+        result = judge.evaluate_row(ROW)
+        self.assertIn(result["label"], ("Correct", "Incorrect"))
+        self.assertLess(len(result["chain_of_thought"]), 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+"""Tests for the telemetry registry and its sinks."""
+
+import json
+import queue
+import tempfile
+import unittest
+import urllib.request
+from pathlib import Path
+
+from src.telemetry import (
+    Histogram,
+    JsonlSink,
+    PrometheusSink,
+    QueueSink,
+    Telemetry,
+    performance_summary,
+    render_prometheus,
+)
+
+
+class TestHistogram(unittest.TestCase):
+    """Test bucketing, percentiles and merging."""
+
+    def test_percentiles_are_close_to_exact(self):
+        """Estimates stay within one bucket width (25%) of the true value."""
+        hist = Histogram()
+        for ms in range(1, 1001):
+            hist.observe(ms / 1000)
+        for q, exact in ((50, 0.5), (95, 0.95), (99, 0.99)):
+            self.assertAlmostEqual(hist.percentile(q), exact, delta=exact * 0.25)
+        self.assertEqual(hist.percentile(100), 1.0)
+        self.assertEqual(Histogram().percentile(50), 0.0)
+
+    def test_merge_adds_snapshots(self):
+        """Merged histograms equal one histogram of all observations."""
+        a, b, both = Histogram(), Histogram(), Histogram()
+        for i, value in enumerate((0.001, 0.02, 0.3, 4.0, 0.05, 0.006)):
+            (a if i % 2 else b).observe(value)
+            both.observe(value)
+        merged = Histogram.from_dict(a.to_dict())
+        merged.merge(b.to_dict())
+        merged.merge(Histogram().to_dict())
+        self.assertEqual(merged.to_dict(), both.to_dict())
+
+
+class TestTelemetry(unittest.TestCase):
+    """Test the registry and its sinks."""
+
+    def setUp(self):
+        self.telemetry = Telemetry()
+        self.telemetry.count("rows", 3)
+        self.telemetry.count("prompt_tokens", 120)
+        for seconds in (0.01, 0.02, 0.04):
+            self.telemetry.observe("llm", seconds)
+        with self.telemetry.time("parse"):
+            pass
+
+    def test_snapshot_merge_and_summary(self):
+        """Snapshots from other processes merge into counters and stages."""
+        other = Telemetry()
+        other.merge(self.telemetry.snapshot())
+        other.merge(json.loads(json.dumps(self.telemetry.snapshot())))
+        summary = performance_summary(other.snapshot())
+        self.assertEqual(summary["rows"], 6)
+        self.assertEqual(summary["counters"]["prompt_tokens"], 240)
+        self.assertEqual(summary["stages"]["llm"]["count"], 6)
+        self.assertAlmostEqual(summary["stages"]["llm"]["mean"], 0.07 / 3)
+        self.assertEqual(list(summary["stages"]), ["llm", "parse"])
+
+    def test_replace_with_worker_snapshots(self):
+        """A parent swaps in the latest snapshot of each worker as they arrive."""
+        updates: queue.Queue = queue.Queue()
+        self.telemetry.add_sink(QueueSink(updates, "0/2"))
+        self.telemetry.flush()
+        self.telemetry.count("rows")
+        self.telemetry.flush()
+
+        parent, latest = Telemetry(), {}
+        while not updates.empty():
+            shard, snapshot = updates.get()
+            latest[shard] = snapshot
+            parent.replace(latest.values())
+        self.assertEqual(parent.snapshot()["counters"]["rows"], 4)
+        self.assertEqual(parent.snapshot()["stages"]["llm"]["count"], 3)
+
+    def test_prometheus_rendering(self):
+        text = render_prometheus(self.telemetry.snapshot())
+        self.assertIn("# TYPE llm_judge_rows_total counter\nllm_judge_rows_total 3\n", text)
+        self.assertIn('llm_judge_stage_seconds_bucket{stage="llm",le="+Inf"} 3', text)
+        self.assertIn('llm_judge_stage_seconds_count{stage="parse"} 1', text)
+
+    def test_jsonl_sink(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "metrics" / "run.jsonl"
+            self.telemetry.add_sink(JsonlSink(path))
+            self.telemetry.flush()
+            self.telemetry.count("rows")
+            self.telemetry.close_sinks()
+            records = [json.loads(line) for line in path.read_text().splitlines()]
+        self.assertEqual([r["counters"]["rows"] for r in records], [3, 4])
+        self.assertIn("timestamp", records[0])
+
+    def test_prometheus_sink_serves_live_values(self):
+        sink = PrometheusSink(self.telemetry, port=0)
+        self.addCleanup(sink.close)
+        self.telemetry.count("retries")
+        url = f"http://127.0.0.1:{sink.port}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            body = response.read().decode("utf-8")
+        self.assertIn("llm_judge_retries_total 1", body)
+
+
+if __name__ == "__main__":
+    unittest.main()